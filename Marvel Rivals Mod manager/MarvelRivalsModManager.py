@@ -9,13 +9,139 @@ import zipfile
 import py7zr
 import rarfile
 import tempfile 
+import re
+import time
+import hashlib
+import threading
+import functools
+import mmap
+import multiprocessing
+import queue
+import itertools
+import struct
+import bisect
+import io
+import contextlib
+import fnmatch
+import abc
+import glob
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing.connection import Listener, Client
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+IS_WINDOWS = os.name == "nt"
+STEAM_APP_ID = "2767030"
+# Windows-only Tk system color names have no equivalent on X11
+SYSTEM_FACE_COLOR = "SystemButtonFace" if IS_WINDOWS else "#d9d9d9"
+SYSTEM_HIGHLIGHT_COLOR = "SystemHighlight" if IS_WINDOWS else "#4a6984"
+
+def app_data_root():
+    """Per-user data folder: %LOCALAPPDATA% on Windows, $XDG_DATA_HOME (~/.local/share) elsewhere."""
+    if IS_WINDOWS:
+        return os.getenv("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+    return os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
 
 # Persistent file paths
-APPDATA_FOLDER = os.path.join(os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager")
+APPDATA_FOLDER = os.path.join(app_data_root(), "MarvelRivalsModManager")
 CONFIG_FILE = os.path.join(APPDATA_FOLDER, "config.json")
-BACKUP_FOLDER = os.path.join(
-    os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "backup"
-)
+BACKUP_FOLDER = os.path.join(APPDATA_FOLDER, "backup")
+PROFILES_FOLDER = os.path.join(APPDATA_FOLDER, "profiles")
+
+# Single-instance lock, IPC key and the lock that serializes config/profile writes
+INSTANCE_LOCK_FILE = os.path.join(APPDATA_FOLDER, "instance.lock")
+INSTANCE_KEY_FILE = os.path.join(APPDATA_FOLDER, "instance.key")
+WRITE_LOCK_FILE = os.path.join(APPDATA_FOLDER, "write.lock")
+# Pending Mods -> profile write-backs recorded on exit, one journal per session
+SYNC_JOURNAL_FILE = os.path.join(APPDATA_FOLDER, "pending_sync.json")  # Single journal of older versions
+SYNC_JOURNAL_PATTERN = os.path.join(APPDATA_FOLDER, "pending_sync-*.json")
+SYNC_LOCK_FILE = os.path.join(APPDATA_FOLDER, "pending_sync.lock")
+# Cross-profile bulk edit in progress, replayed like the write-back journal
+BULK_JOURNAL_FILE = os.path.join(APPDATA_FOLDER, "pending_bulk.json")
+BULK_LOCK_FILE = os.path.join(APPDATA_FOLDER, "pending_bulk.lock")
+# Held by every process while it changes profile folders: journal replays, bulk edits and the window's apply/load/save
+PROFILES_LOCK_FILE = os.path.join(APPDATA_FOLDER, "profiles.lock")
+PROFILES_LOCK_WAIT = 600  # Seconds a replay or bulk edit waits for a change in another process to finish
+# Content hashes keyed by path, valid while size and mtime are unchanged
+HASH_CACHE_FILE = os.path.join(APPDATA_FOLDER, "hash_cache.json")
+# Per-profile summary (mod count, size, last use) shown by the load dialog
+PROFILE_CATALOG_FILE = os.path.join(APPDATA_FOLDER, "profile_catalog.json")
+# Content-addressed copies of every file a snapshot refers to, and the snapshots themselves
+CONTENT_STORE_FOLDER = os.path.join(APPDATA_FOLDER, "store")
+SNAPSHOTS_FOLDER = os.path.join(APPDATA_FOLDER, "snapshots")
+# Snapshots kept per profile; older ones are pruned when a new one is taken
+SNAPSHOT_LIMIT = 30
+# Inverted index from asset path to the paks (in any profile, backup or the library) containing it
+ASSET_INDEX_FILE = os.path.join(APPDATA_FOLDER, "asset_index.json")
+# Inbox files already taken in, so a restart does not queue them again
+INBOX_STATE_FILE = os.path.join(APPDATA_FOLDER, "inbox.json")
+# Per-pak metadata keyed by content hash (asset lists, chunk signatures)
+PAK_INDEX_FILE = os.path.join(APPDATA_FOLDER, "pak_index.json")
+# Block size for delta updates of replaced paks
+DELTA_CHUNK_SIZE = 4 * 1024 * 1024
+# Marker older versions kept next to a pak while patching it in place
+DELTA_MARKER_SUFFIX = ".delta"
+# Copies at least this large are checkpointed so an interrupted copy resumes where it stopped
+RESUMABLE_COPY_THRESHOLD = 256 * 1024 * 1024
+RESUMABLE_CHUNK_SIZE = 16 * 1024 * 1024
+# Checkpoint kept next to a resumable copy's temporary file
+CHECKPOINT_SUFFIX = ".checkpoint"
+# A mod is a .pak plus, for IoStore mods, the .utoc/.ucas containers sharing its name
+MOD_EXTENSIONS = (".pak", ".utoc", ".ucas")
+# Marker listing a mod group's staged files while they are renamed into place
+GROUP_MARKER_SUFFIX = ".group"
+# Extracted archives kept between sessions, keyed by archive hash
+EXTRACT_CACHE_FOLDER = os.path.join(APPDATA_FOLDER, "cache", "extract")
+# Session scratch space; folders are named after the owning process id
+TEMP_FOLDER = os.path.join(APPDATA_FOLDER, "tmp")
+
+# Optional settings stored in config.json alongside the core values
+DEFAULT_SETTINGS = {
+    "extract_cache_limit_mb": 4096,
+    "extract_memory_limit_mb": 1024,  # Per extraction process; 0 extracts whole archives in-process without a ceiling
+    "archive_backends": {},  # Fastest backend per format, measured by the benchmark
+    "copy_throughput_mb_s": 0,  # Running average of measured copy speed, 0 until measured
+    "inbox_folder": "",  # Watched for downloaded mods when set
+    "game_io_limit_mb_s": 20,  # Cap on background disk work while the game runs, 0 for none
+    "favorite_profiles": [],  # Hotbar order; Ctrl+1.. switches to them
+}
+
+# Favorite profiles are mirrored here, on the game's volume but outside Paks, so a switch only links files
+STAGE_FOLDER_NAME = ".mrmm_stage"
+FAVORITES_LIMIT = 9
+
+# Free space an operation should leave on a volume before it is warned about
+PLAN_FREE_MARGIN = 512 * 1024 * 1024
+# Copies smaller than this are too short to measure throughput from
+THROUGHPUT_MIN_SAMPLE = 32 * 1024 * 1024
+
+# Streaming buffer used when copying archive members to disk
+EXTRACT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Archive formats are detected from their leading bytes, not the file extension
+ARCHIVE_SIGNATURES = [
+    (b"PK\x03\x04", "zip"),
+    (b"PK\x05\x06", "zip"),  # Empty zip
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"Rar!\x1a\x07\x01\x00", "rar5"),
+    (b"Rar!\x1a\x07\x00", "rar"),
+]
+# Archives at least this large go to a native tool when one is installed
+NATIVE_ARCHIVE_THRESHOLD = 64 * 1024 * 1024
+# Archives inside archives (e.g. one zip per hero in a mod pack)
+NESTED_ARCHIVE_EXTENSIONS = (".zip", ".7z", ".rar")
+NESTED_ARCHIVE_MAX_DEPTH = 4
+# Inner archives up to this size are buffered in memory, larger ones spill to a scratch file
+NESTED_SPOOL_THRESHOLD = 64 * 1024 * 1024
+
+# The game's own executable; the launcher alone does not count as playing
+GAME_PROCESS_NAME = "Marvel-Win64-Shipping.exe"
+GAME_POLL_INTERVAL = 5.0
+# Read size for copies the I/O governor throttles, small enough to pace smoothly
+GOVERNED_CHUNK_SIZE = 1024 * 1024
 
 # Ensure AppData folder exists
 os.makedirs(APPDATA_FOLDER, exist_ok=True)
@@ -28,9 +154,340 @@ def create_popup(parent, title, size="300x150", resizable=False, icon_path=None)
     if not resizable:
         popup.resizable(False, False)
     if icon_path and os.path.exists(icon_path):
-        popup.iconbitmap(icon_path)
+        set_window_icon(popup)
     return popup
 
+def resource_path(name):
+    """Path of a bundled resource, inside the PyInstaller bundle when frozen."""
+    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, name)
+
+def set_window_icon(window):
+    """Use app.ico as the window icon; .ico bitmaps only work on Windows, elsewhere Pillow converts it."""
+    icon_path = resource_path("app.ico")
+    if not os.path.exists(icon_path):
+        return
+    try:
+        if IS_WINDOWS:
+            window.iconbitmap(icon_path)
+        else:
+            from PIL import Image, ImageTk  # Optional on Linux; the window just keeps the default icon
+
+            window._icon_image = ImageTk.PhotoImage(Image.open(icon_path))
+            window.iconphoto(False, window._icon_image)
+    except Exception as e:
+        print(f"DEBUG: Could not set window icon: {e}")
+
+def open_path(path):
+    """Open a folder or URL with the platform's handler (Explorer, xdg-open, open)."""
+    if IS_WINDOWS:
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def steam_roots():
+    """Candidate Steam install folders for this platform."""
+    if IS_WINDOWS:
+        return [
+            os.path.join(os.getenv("ProgramFiles(x86)", r"C:\Program Files (x86)"), "Steam"),
+            os.path.join(os.getenv("ProgramFiles", r"C:\Program Files"), "Steam"),
+        ]
+    return [
+        os.path.expanduser("~/.steam/steam"),
+        os.path.expanduser("~/.local/share/Steam"),
+        os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam"),  # Flatpak
+    ]
+
+def steam_library_folders():
+    """Every Steam library listed in libraryfolders.vdf, plus the Steam roots themselves."""
+    libraries = []
+    for steam_root in steam_roots():
+        if not os.path.isdir(steam_root):
+            continue
+        libraries.append(steam_root)
+        vdf_path = os.path.join(steam_root, "steamapps", "libraryfolders.vdf")
+        try:
+            with open(vdf_path, "r", encoding="utf-8", errors="replace") as f:
+                for match in re.finditer(r'"path"\s+"([^"]+)"', f.read()):
+                    libraries.append(match.group(1).replace("\\\\", "\\"))
+        except OSError:
+            pass
+    unique = []
+    for library in libraries:
+        real = os.path.realpath(library)
+        if real not in unique and os.path.isdir(real):
+            unique.append(real)
+    return unique
+
+def find_game_folder():
+    """Locate the Marvel Rivals install in any Steam library, or return None."""
+    for library in steam_library_folders():
+        common = os.path.join(library, "steamapps", "common")
+        if not os.path.isdir(common):
+            continue
+        for name in os.listdir(common):
+            candidate = os.path.join(common, name)
+            if verify_game_folder(candidate):
+                return candidate
+    return None
+
+def find_proton_prefix():
+    """The game's Proton compatdata prefix on Linux, or None."""
+    if IS_WINDOWS:
+        return None
+    for library in steam_library_folders():
+        prefix = os.path.join(library, "steamapps", "compatdata", STEAM_APP_ID)
+        if os.path.isdir(prefix):
+            return prefix
+    return None
+
+def game_process_running():
+    """True while the game itself (not just the launcher) is running, natively or under Proton."""
+    if IS_WINDOWS:
+        try:
+            output = subprocess.run(
+                ["tasklist", "/FI", f"IMAGENAME eq {GAME_PROCESS_NAME}", "/NH", "/FO", "CSV"],
+                capture_output=True, text=True, timeout=10, creationflags=subprocess.CREATE_NO_WINDOW,
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return False
+        return GAME_PROCESS_NAME.lower() in output.lower()
+    # Wine keeps the Windows executable name on the process command line
+    needle = GAME_PROCESS_NAME.lower().encode()
+    try:
+        pids = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return False
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if needle in f.read().lower():
+                    return True
+        except OSError:
+            continue
+    return False
+
+def set_thread_io_priority(low):
+    """Lower (or restore) the disk priority of the calling thread; best effort."""
+    try:
+        import ctypes
+        if IS_WINDOWS:
+            THREAD_MODE_BACKGROUND_BEGIN, THREAD_MODE_BACKGROUND_END = 0x00010000, 0x00020000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(
+                kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN if low else THREAD_MODE_BACKGROUND_END
+            )
+        elif sys.platform.startswith("linux"):
+            syscall_number = {"x86_64": 251, "aarch64": 30, "i686": 289}.get(os.uname().machine)
+            if syscall_number is None:
+                return
+            IOPRIO_WHO_PROCESS, IOPRIO_CLASS_IDLE = 1, 3
+            # ioprio_set on a thread id changes just that thread; class 0 restores the default
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.syscall(syscall_number, IOPRIO_WHO_PROCESS, threading.get_native_id(), (IOPRIO_CLASS_IDLE << 13) if low else 0)
+    except Exception as e:
+        print(f"ERROR: Failed to change I/O priority: {e}")
+
+class IoGovernor:
+    """Keeps the manager's background disk work out of the game's way.
+
+    A watcher thread polls for the game process. While the game runs, copy and hash
+    loops on governed threads (background jobs, the inbox, the exit write-back helper)
+    draw from one token bucket refilled at limit bytes per second and run at low I/O
+    priority, and the scheduler holds jobs marked heavy until the game exits. Work the
+    user started from the window is never throttled.
+    """
+
+    def __init__(self, limit=0):
+        self.limit = limit  # Bytes per second while the game runs, 0 for no cap
+        self.game_running = False
+        self._listeners = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._refilled = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.game_running = game_process_running()
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def add_listener(self, callback):
+        """callback(game_running) is called from the watcher thread whenever the game starts or exits."""
+        self._listeners.append(callback)
+
+    def _watch(self):
+        while not self._stop.wait(GAME_POLL_INTERVAL):
+            running = game_process_running()
+            if running == self.game_running:
+                continue
+            self.game_running = running
+            print(f"DEBUG: Game {'started' if running else 'exited'}; background I/O {'throttled' if running else 'at full speed'}.")
+            for callback in list(self._listeners):
+                try:
+                    callback(running)
+                except Exception as e:
+                    print(f"ERROR: I/O governor listener failed: {e}")
+
+    @contextlib.contextmanager
+    def governed(self):
+        """Mark the calling thread's I/O as background work for the duration of the block."""
+        previous = getattr(self._local, "governed", False)
+        self._local.governed = True
+        try:
+            yield
+        finally:
+            self._local.governed = previous
+            if not previous and getattr(self._local, "low_priority", False):
+                set_thread_io_priority(False)
+                self._local.low_priority = False
+
+    def active(self):
+        """True when I/O on the calling thread is being held back for the game right now."""
+        return self.game_running and getattr(self._local, "governed", False)
+
+    def throttle(self, num_bytes):
+        """Account for num_bytes of I/O on this thread, sleeping as needed to stay under the cap."""
+        active = self.active()
+        # Follow the game starting or exiting in the middle of a long job
+        if active != getattr(self._local, "low_priority", False):
+            set_thread_io_priority(active)
+            self._local.low_priority = active
+        if not active or self.limit <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # At most one second of burst; the balance goes negative when a thread overdraws it
+            self._tokens = min(self.limit, self._tokens + (now - self._refilled) * self.limit)
+            self._refilled = now
+            self._tokens -= num_bytes
+            wait = -self._tokens / self.limit if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+IO_GOVERNOR = IoGovernor()
+
+def governed_copy(source, destination):
+    """Copy in small chunks through the I/O governor, preserving metadata like copy2."""
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        for chunk in iter(lambda: src.read(GOVERNED_CHUNK_SIZE), b""):
+            IO_GOVERNOR.throttle(len(chunk))
+            dst.write(chunk)
+    shutil.copystat(source, destination)
+
+def reflink_copy(source, destination):
+    """Clone a file's blocks on copy-on-write filesystems (btrfs, XFS); False if unsupported."""
+    if not sys.platform.startswith("linux"):
+        return False
+    FICLONE = 0x40049409
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        try:
+            os.remove(destination)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+def copy_file(source, destination):
+    """shutil.copy2 with a reflink fast path where the filesystem supports it."""
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(source))
+    if reflink_copy(source, destination):
+        return destination
+    if IO_GOVERNOR.active():
+        governed_copy(source, destination)
+    else:
+        shutil.copy2(source, destination)
+    return destination
+
+class DirectoryWatcher:
+    """Calls on_change() when files in a folder are created, replaced, moved or deleted.
+
+    Uses inotify on Linux and falls back to polling a directory snapshot elsewhere.
+    The callback runs on the watcher's thread.
+    """
+
+    POLL_INTERVAL = 2.0
+
+    def __init__(self, folder, on_change):
+        self.folder = folder
+        self.on_change = on_change
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                print(f"DEBUG: inotify unavailable, polling {self.folder}: {e}")
+        self._run_polling()
+
+    def _snapshot(self):
+        try:
+            return {
+                entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns)
+                for entry in os.scandir(self.folder)
+                if entry.is_file()
+            }
+        except OSError:
+            return {}
+
+    def _run_polling(self):
+        snapshot = self._snapshot()
+        while not self._stop.wait(self.POLL_INTERVAL):
+            current = self._snapshot()
+            if current != snapshot:
+                snapshot = current
+                self.on_change()
+
+    def _run_inotify(self):
+        import ctypes
+        import select
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x8, 0x40, 0x80, 0x100, 0x200
+        IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            if libc.inotify_add_watch(fd, self.folder.encode(), mask) < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {self.folder}")
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], 0.5)
+                if not readable:
+                    continue
+                try:
+                    os.read(fd, 64 * 1024)  # Drain the batch; any event means "rescan"
+                except BlockingIOError:
+                    continue
+                self.on_change()
+        finally:
+            os.close(fd)
+
 # Helper Functions
 def save_config(game_dir, dark_theme, current_profile):
     config = {
@@ -43,9 +500,7 @@ def save_config(game_dir, dark_theme, current_profile):
 
 def load_config():
     """Load configuration from the config.json file."""
-    config_path = os.path.join(
-        os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "config.json"
-    )
+    config_path = CONFIG_FILE
     if not os.path.exists(config_path):
         return None, False, None  # Default values if config doesn't exist
 
@@ -54,9 +509,7 @@ def load_config():
             config_data = json.load(config_file)
 
         # Validate current_profile against existing profiles
-        profiles_folder = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-        )
+        profiles_folder = PROFILES_FOLDER
         current_profile = config_data.get("current_profile")
         if current_profile:
             profile_path = os.path.join(profiles_folder, current_profile)
@@ -72,41 +525,3192 @@ def load_config():
         return None, False, None  # Default values in case of error
 
 
+class FileLock:
+    """Exclusive lock on a file, shared between processes (msvcrt on Windows, flock elsewhere)."""
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self, blocking=True):
+        self._file = open(self.path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if IS_WINDOWS:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                if not blocking or time.monotonic() >= deadline:
+                    self._file.close()
+                    self._file = None
+                    if not blocking:
+                        return False
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.05)
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if IS_WINDOWS:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file and swap it in so a crash never leaves a torn file.
+
+    Writes from every process and thread are serialized under the shared write lock.
+    """
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with FileLock(WRITE_LOCK_FILE):
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+def instance_address():
+    """Named pipe on Windows, Unix socket in the app data folder elsewhere."""
+    if IS_WINDOWS:
+        user = os.getenv("USERNAME", "user")
+        return r"\\.\pipe\MarvelRivalsModManager-" + user
+    return os.path.join(APPDATA_FOLDER, "instance.sock")
+
+class InstanceServer:
+    """Holds the single-instance lock and receives arguments forwarded by later launches."""
+
+    def __init__(self):
+        self.lock = FileLock(INSTANCE_LOCK_FILE)
+        self.listener = None
+        self.on_message = None
+
+    def acquire(self):
+        """Return False if another instance is already running."""
+        return self.lock.acquire(blocking=False)
+
+    def listen(self, on_message):
+        self.on_message = on_message
+        authkey = os.urandom(32)
+        address = instance_address()
+        if not IS_WINDOWS and os.path.exists(address):
+            os.remove(address)  # Left behind by a crashed instance; we hold the lock now
+        self.listener = Listener(address, authkey=authkey)
+        with open(INSTANCE_KEY_FILE, "wb") as f:
+            f.write(authkey)
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return  # Listener closed on exit
+            except Exception as e:
+                print(f"DEBUG: Rejected instance connection: {e}")
+                continue
+            try:
+                message = connection.recv()
+                connection.send("ok")
+            except Exception as e:
+                print(f"DEBUG: Failed to receive forwarded arguments: {e}")
+                continue
+            finally:
+                connection.close()
+            self.on_message(message)
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        self.lock.release()
+
+def forward_to_running_instance(argv, timeout=15.0):
+    """Hand arguments to the running instance; returns True once it has acknowledged them."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(INSTANCE_KEY_FILE, "rb") as f:
+                authkey = f.read()
+            connection = Client(instance_address(), authkey=authkey)
+            try:
+                connection.send({"argv": argv})
+                return connection.recv() == "ok"
+            finally:
+                connection.close()
+        except (OSError, EOFError, ConnectionError):
+            # The running instance may still be starting up
+            time.sleep(0.1)
+        except Exception as e:
+            print(f"ERROR: Failed to contact the running instance: {e}")
+            return False
+    return False
+
+def pid_alive(pid):
+    """Return True if a process with the given id is still running."""
+    if not pid:
+        return False
+    if IS_WINDOWS:
+        import ctypes
+        # os.kill would terminate the process on Windows, so query it instead
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def acquire_pid_lock(lock_path):
+    """Create a lock file owned by this process; stale locks from dead processes are taken over."""
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        except FileExistsError:
+            try:
+                with open(lock_path, "r") as f:
+                    owner = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            if pid_alive(owner) and owner != os.getpid():
+                return False
+            try:
+                os.remove(lock_path)  # Stale lock left behind by a crashed process
+            except OSError:
+                return False
+    return False
+
+def release_pid_lock(lock_path):
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+
+def write_sync_journal(mods_folder, profile_path):
+    """Record the Mods -> profile write-back as a durable journal and return the number of steps."""
+    mods_files = set(list_mod_files(mods_folder))
+    profile_files = set(list_mod_files(profile_path))
+
+    # A mod with any file missing from the profile is copied as a whole group
+    ops = [
+        {
+            "op": "copy_group",
+            "files": [[os.path.join(mods_folder, file), os.path.join(profile_path, file)] for file in members],
+        }
+        for members in group_mod_files(mods_files).values()
+        if not profile_files.issuperset(members)
+    ]
+    ops += [
+        {"op": "remove", "path": os.path.join(profile_path, file)}
+        for file in sorted(profile_files - mods_files)
+    ]
+    if ops:
+        # The written-back state becomes the profile's exit snapshot
+        ops.append({"op": "snapshot", "profile": os.path.basename(profile_path), "reason": "exit"})
+        # Each session gets its own journal, so a helper still replaying an older one never touches it
+        session = f"{time.time_ns():020d}-{os.getpid()}"
+        journal_path = SYNC_JOURNAL_PATTERN.replace("*", session)
+        write_json_atomic(journal_path, {"id": session, "created": time.time(), "done": 0, "ops": ops})
+    return len(ops)
+
+def pending_sync_journals():
+    """Write-back journals still to replay, oldest first."""
+    paths = sorted(glob.glob(SYNC_JOURNAL_PATTERN))
+    return ([SYNC_JOURNAL_FILE] if os.path.exists(SYNC_JOURNAL_FILE) else []) + paths
+
+def replay_sync_journals():
+    """Replay every pending write-back in the order the sessions exited."""
+    if not pending_sync_journals():
+        return True
+    if not acquire_pid_lock(SYNC_LOCK_FILE):
+        print("DEBUG: Pending write-backs are already being replayed by another process.")
+        return False
+    try:
+        # No other process changes profile folders while the write-back lands in them
+        with FileLock(PROFILES_LOCK_FILE, timeout=PROFILES_LOCK_WAIT):
+            for journal_path in pending_sync_journals():
+                _replay_journal(journal_path)
+        return True
+    finally:
+        release_pid_lock(SYNC_LOCK_FILE)
+
+def replay_sync_journal(journal_path, lock_path):
+    """Finish a pending bulk edit (or one write-back), resuming after the last step that completed."""
+    if not os.path.exists(journal_path):
+        return True
+    if not acquire_pid_lock(lock_path):
+        print(f"DEBUG: {os.path.basename(journal_path)} is already being replayed by another process.")
+        return False
+    try:
+        _replay_journal(journal_path)
+        return True
+    finally:
+        release_pid_lock(lock_path)
+
+def replay_bulk_journal():
+    """Finish a bulk edit left pending by an earlier session, under the profiles lock."""
+    with FileLock(PROFILES_LOCK_FILE, timeout=PROFILES_LOCK_WAIT):
+        return replay_sync_journal(BULK_JOURNAL_FILE, BULK_LOCK_FILE)
+
+def _journal_is(journal_path, journal):
+    """True while the file on disk is still the journal being replayed (not replaced or removed)."""
+    try:
+        with open(journal_path, "r") as f:
+            return json.load(f).get("id") == journal.get("id")
+    except (OSError, ValueError):
+        return False
+
+def _replay_journal(journal_path):
+    """Replay one journal; the caller holds its lock.
+
+    Every step is idempotent (copies land under a temporary name and are renamed into
+    place), so a replay interrupted by a shutdown can simply be run again. A step that
+    fails stops the replay and is raised, with the journal left to resume from it.
+    """
+    try:
+        with open(journal_path, "r") as f:
+            journal = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Discarding unreadable journal {journal_path}: {e}")
+        os.remove(journal_path)
+        return
+
+    ops = journal.get("ops", [])
+    for index in range(journal.get("done", 0), len(ops)):
+        op = ops[index]
+        try:
+            if op["op"] == "copy" and os.path.exists(op["src"]):
+                os.makedirs(os.path.dirname(op["dst"]), exist_ok=True)
+                full_copy(op["src"], op["dst"])
+                print(f"DEBUG: Added {os.path.basename(op['dst'])} to {op['dst']}")
+            elif op["op"] in ("copy_group", "link_group"):
+                pairs = [(src, dst) for src, dst in op["files"] if os.path.exists(src)]
+                if pairs:
+                    os.makedirs(os.path.dirname(pairs[0][1]), exist_ok=True)
+                    copy_mod_group(pairs, link=op["op"] == "link_group")
+                    print(f"DEBUG: Added {os.path.basename(pairs[0][1])} group to {os.path.dirname(pairs[0][1])}")
+            elif op["op"] == "manifest" and os.path.isdir(os.path.join(PROFILES_FOLDER, op["profile"])):
+                profile_path = os.path.join(PROFILES_FOLDER, op["profile"])
+                manifest = scan_profile_manifest(profile_path)
+                write_json_atomic(os.path.join(profile_path, "profile.json"), manifest)
+                update_profile_catalog(op["profile"], manifest)
+            elif op["op"] == "snapshot" and os.path.isdir(os.path.join(PROFILES_FOLDER, op["profile"])):
+                take_snapshot(op["profile"], op["reason"])
+            elif op["op"] == "remove" and os.path.exists(op["path"]):
+                os.remove(op["path"])
+                print(f"DEBUG: Removed {os.path.basename(op['path'])} from {op['path']}")
+        except Exception as e:
+            print(f"ERROR: Failed to replay sync step {op}: {e}")
+            raise
+
+        # Checkpoint after every step so a restart resumes here, unless the file is no longer ours
+        if not _journal_is(journal_path, journal):
+            print(f"DEBUG: {os.path.basename(journal_path)} changed during replay; leaving it alone.")
+            return
+        journal["done"] = index + 1
+        write_json_atomic(journal_path, journal)
+
+    if _journal_is(journal_path, journal):
+        os.remove(journal_path)
+
+def spawn_sync_helper():
+    """Start a detached process that replays the sync journal after the window has closed."""
+    if getattr(sys, "frozen", False):
+        command = [sys.executable, "--finish-sync"]
+    else:
+        command = [sys.executable, os.path.abspath(__file__), "--finish-sync"]
+
+    kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if IS_WINDOWS:
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW
+    else:
+        kwargs["start_new_session"] = True
+    subprocess.Popen(command, **kwargs)
+
+_hash_cache = None
+# Guards every read-modify-write of _hash_cache; the save lock keeps saves in order
+_hash_cache_lock = threading.RLock()
+_hash_cache_save_lock = threading.Lock()
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            IO_GOVERNOR.throttle(len(chunk))
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_hash_cache():
+    """The shared hash cache; hold _hash_cache_lock while reading, iterating or changing it."""
+    global _hash_cache
+    with _hash_cache_lock:
+        if _hash_cache is None:
+            try:
+                with open(HASH_CACHE_FILE, "r") as f:
+                    _hash_cache = json.load(f)
+            except (OSError, ValueError):
+                _hash_cache = {}
+        return _hash_cache
+
+def save_hash_cache():
+    with _hash_cache_save_lock:
+        with _hash_cache_lock:
+            if _hash_cache is None:
+                return
+            snapshot = dict(_hash_cache)  # Entries are replaced, never changed in place
+        try:
+            write_json_atomic(HASH_CACHE_FILE, snapshot)
+        except Exception as e:
+            print(f"ERROR: Failed to save hash cache: {e}")
+
+def cached_hash(path):
+    """Return the content hash of a file, reusing the cached value while size and mtime match."""
+    stat = os.stat(path)
+    key = os.path.normcase(os.path.abspath(path))
+    with _hash_cache_lock:
+        entry = load_hash_cache().get(key)
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+    digest = hash_file(path)  # Not under the lock, so other threads keep their lookups
+    with _hash_cache_lock:
+        load_hash_cache()[key] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest
+
+def lookup_cached_hash(path):
+    """Return the cached hash of a file if its size and mtime still match, without reading it."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with _hash_cache_lock:
+        entry = load_hash_cache().get(os.path.normcase(os.path.abspath(path)))
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+    return None
+
+def hash_file_mmap(path, chunk_size=8 * 1024 * 1024):
+    """SHA-256 of a file read through a memory map in fixed-size chunks (same digest as hash_file)."""
+    digest = hashlib.sha256()
+    size = os.path.getsize(path)
+    if size == 0:
+        return digest.hexdigest()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, size, chunk_size):
+                digest.update(view[offset:offset + chunk_size])
+        finally:
+            view.release()
+    return digest.hexdigest()
+
+def _hash_worker(path):
+    """Process pool entry point: hash one file and report the stat it was hashed at."""
+    try:
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns, hash_file_mmap(path), None
+    except Exception as e:
+        return path, None, None, None, str(e)
+
+def hash_files_parallel(paths, workers=None, progress=None):
+    """Hash many files across all cores and return {path: digest}.
+
+    Files whose size and mtime match the hash cache are not read at all, so a repeat
+    run only hashes what changed. Unreadable files are left out of the result.
+    progress(done, total) is called as files finish and may raise to cancel.
+    """
+    results = {}
+    pending = []
+    for path in paths:
+        digest = lookup_cached_hash(path)
+        if digest:
+            results[path] = digest
+        else:
+            pending.append(path)
+    if not pending:
+        return results
+
+    if len(pending) == 1 or IO_GOVERNOR.active():
+        # Pool workers are separate processes the governor cannot pace, so hash here one by one
+        outcomes = []
+        for path in pending:
+            try:
+                stat = os.stat(path)
+                outcomes.append((path, stat.st_size, stat.st_mtime_ns, hash_file(path), None))
+            except Exception as e:
+                outcomes.append((path, None, None, None, str(e)))
+            if progress:
+                progress(len(outcomes), len(pending))
+    else:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        outcomes = []
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(_hash_worker, path) for path in pending]
+            for future in as_completed(futures):
+                outcomes.append(future.result())
+                if progress:
+                    progress(len(outcomes), len(pending))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    with _hash_cache_lock:
+        cache = load_hash_cache()
+        for path, size, mtime_ns, digest, error in outcomes:
+            if error:
+                print(f"ERROR: Failed to hash {path}: {error}")
+                continue
+            cache[os.path.normcase(os.path.abspath(path))] = [size, mtime_ns, digest]
+            results[path] = digest
+    save_hash_cache()
+    return results
+
+def load_profile_manifest(profile_path):
+    """Read a profile's profile.json, accepting the older bare-list format."""
+    try:
+        with open(os.path.join(profile_path, "profile.json"), "r") as json_file:
+            manifest = json.load(json_file)
+    except (OSError, ValueError):
+        manifest = {}
+    if isinstance(manifest, list):
+        manifest = {"mods": manifest}
+    manifest.setdefault("mods", [])
+    manifest.setdefault("files", {})
+    return manifest
+
+def verify_integrity(mods_folder, profiles_folder, current_profile, progress=None):
+    """Check every mod file in each profile and in the Mods folder against the stored manifests.
+
+    Returns {target: [(status, file, detail)]} where status is one of "missing",
+    "corrupt" (same size and mtime as recorded but different content), "changed" or
+    "untracked" (not in the manifest). Manifest records without a hash yet get the
+    current hash stored as their baseline.
+    """
+    targets = {}
+    if os.path.exists(profiles_folder):
+        for profile_name in sorted(os.listdir(profiles_folder)):
+            profile_path = os.path.join(profiles_folder, profile_name)
+            if os.path.isdir(profile_path):
+                targets[f"Profile '{profile_name}'"] = (profile_path, load_profile_manifest(profile_path)["files"])
+    if current_profile and os.path.exists(mods_folder):
+        # The Mods folder mirrors the active profile
+        profile_files = load_profile_manifest(os.path.join(profiles_folder, current_profile))["files"]
+        targets["Mods folder"] = (mods_folder, profile_files)
+
+    all_paths = [
+        os.path.join(folder, file)
+        for folder, _ in targets.values()
+        for file in list_mod_files(folder)
+    ]
+    hashes = hash_files_parallel(all_paths, progress=progress)
+
+    report = {}
+    baselined = set()
+    for label, (folder, records) in targets.items():
+        issues = []
+        on_disk = set(list_mod_files(folder))
+        for file in sorted(set(records) | on_disk):
+            record = records.get(file)
+            path = os.path.join(folder, file)
+            if file not in on_disk:
+                issues.append(("missing", file, "recorded but not on disk"))
+            elif record is None:
+                issues.append(("untracked", file, "not in the manifest"))
+            elif path not in hashes:
+                issues.append(("corrupt", file, "could not be read"))
+            elif not record.get("hash"):
+                if folder != mods_folder:
+                    record["hash"] = hashes[path]
+                    baselined.add(folder)
+            elif hashes[path] != record["hash"]:
+                stat = os.stat(path)
+                if stat.st_size == record.get("size") and stat.st_mtime_ns == record.get("mtime"):
+                    issues.append(("corrupt", file, "content changed without a new timestamp"))
+                else:
+                    issues.append(("changed", file, f"{record.get('size', 0)} -> {stat.st_size} bytes"))
+        report[label] = issues
+
+    # Store the hashes recorded as a first baseline
+    for folder in baselined:
+        manifest = load_profile_manifest(folder)
+        manifest["files"] = next(records for path, records in targets.values() if path == folder)
+        write_json_atomic(os.path.join(folder, "profile.json"), manifest)
+    return report
+
+def scan_profile_manifest(profile_path):
+    """Build a profile's manifest from the files on disk, keeping what is already recorded for them."""
+    mod_files = list_mod_files(profile_path)
+
+    # Keep the recorded size/mtime/hash of known files so verify can spot changes
+    recorded = load_profile_manifest(profile_path)["files"]
+    files = {}
+    for file in mod_files:
+        if file in recorded:
+            files[file] = recorded[file]
+            continue
+        file_path = os.path.join(profile_path, file)
+        stat = os.stat(file_path)
+        files[file] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": lookup_cached_hash(file_path),
+        }
+    return {"mods": sorted(group_mod_files(mod_files)), "files": files}
+
+def record_manifest_hashes(profile_path):
+    """Accept a profile's current files as its new baseline in profile.json."""
+    manifest = load_profile_manifest(profile_path)
+    mod_files = list_mod_files(profile_path)
+    hashes = hash_files_parallel([os.path.join(profile_path, file) for file in mod_files])
+    files = {}
+    for file in mod_files:
+        path = os.path.join(profile_path, file)
+        stat = os.stat(path)
+        files[file] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": hashes.get(path)}
+    manifest["mods"] = sorted(group_mod_files(mod_files))
+    manifest["files"] = files
+    write_json_atomic(os.path.join(profile_path, "profile.json"), manifest)
+    update_profile_catalog(os.path.basename(profile_path), manifest)
+
+_profile_catalog = None
+_profile_catalog_lock = threading.Lock()
+
+def catalog_entry(manifest, last_used=0):
+    """Summarize a profile manifest for the catalog."""
+    files = manifest["files"]
+    return {
+        "mods": len(manifest["mods"]),
+        "bytes": sum(record.get("size", 0) for record in files.values()),
+        # Content keys let savings be worked out across profiles without opening manifests
+        "content": {
+            record.get("hash") or f"{file}:{record.get('size', 0)}": record.get("size", 0)
+            for file, record in files.items()
+        },
+        "last_used": last_used,
+    }
+
+def load_profile_catalog():
+    """Return the profile catalog, building it from the profile manifests the first time."""
+    global _profile_catalog
+    with _profile_catalog_lock:
+        if _profile_catalog is None:
+            try:
+                with open(PROFILE_CATALOG_FILE, "r") as f:
+                    _profile_catalog = json.load(f)
+            except (OSError, ValueError):
+                _profile_catalog = {}
+                if os.path.exists(PROFILES_FOLDER):
+                    for name in os.listdir(PROFILES_FOLDER):
+                        profile_path = os.path.join(PROFILES_FOLDER, name)
+                        if os.path.isdir(profile_path):
+                            _profile_catalog[name] = catalog_entry(load_profile_manifest(profile_path))
+                _save_profile_catalog()
+        return _profile_catalog
+
+def _save_profile_catalog():
+    try:
+        write_json_atomic(PROFILE_CATALOG_FILE, _profile_catalog)
+    except Exception as e:
+        print(f"ERROR: Failed to save profile catalog: {e}")
+
+def update_profile_catalog(profile_name, manifest=None, used=False):
+    """Refresh one profile's catalog entry from its manifest; used=True stamps it as last used."""
+    catalog = load_profile_catalog()
+    if manifest is None:
+        manifest = load_profile_manifest(os.path.join(PROFILES_FOLDER, profile_name))
+    with _profile_catalog_lock:
+        last_used = time.time() if used else catalog.get(profile_name, {}).get("last_used", 0)
+        catalog[profile_name] = catalog_entry(manifest, last_used)
+        _save_profile_catalog()
+
+def reconcile_profile_catalog(manifests):
+    """Replace the catalog with entries for exactly these {profile: manifest}, keeping last-used times."""
+    catalog = load_profile_catalog()
+    with _profile_catalog_lock:
+        fresh = {
+            name: catalog_entry(manifest, catalog.get(name, {}).get("last_used", 0))
+            for name, manifest in manifests.items()
+        }
+        catalog.clear()
+        catalog.update(fresh)
+        _save_profile_catalog()
+
+def remove_from_profile_catalog(*profile_names):
+    catalog = load_profile_catalog()
+    with _profile_catalog_lock:
+        for name in profile_names:
+            catalog.pop(name, None)
+        _save_profile_catalog()
+
+def catalog_savings(catalog):
+    """Bytes per profile whose content is also held by another profile (what dedupe saves)."""
+    holders = {}
+    for entry in catalog.values():
+        for key in entry.get("content", {}):
+            holders[key] = holders.get(key, 0) + 1
+    return {
+        name: sum(size for key, size in entry.get("content", {}).items() if holders[key] > 1)
+        for name, entry in catalog.items()
+    }
+
+def content_path(digest):
+    """Where the content store keeps the file with this hash."""
+    return os.path.join(CONTENT_STORE_FOLDER, digest[:2], digest)
+
+def store_content(path, digest):
+    """Make sure the content store holds this file's content, hard linking it when possible."""
+    stored = content_path(digest)
+    if os.path.exists(stored):
+        return stored
+    os.makedirs(os.path.dirname(stored), exist_ok=True)
+    partial_path = stored + ".partial"
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    try:
+        # Linked files are never patched in place: delta_copy rewrites files with other links
+        os.link(path, partial_path)
+    except OSError:
+        copy_file(path, partial_path)  # Different volume or no hard link support
+    os.replace(partial_path, stored)
+    return stored
+
+def list_snapshots(profile_name):
+    """Return [(path, snapshot)] for a profile, oldest first."""
+    folder = os.path.join(SNAPSHOTS_FOLDER, profile_name)
+    snapshots = []
+    if os.path.isdir(folder):
+        for file in sorted(os.listdir(folder)):
+            if not file.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(folder, file), "r") as f:
+                    snapshots.append((os.path.join(folder, file), json.load(f)))
+            except (OSError, ValueError) as e:
+                print(f"ERROR: Skipping unreadable snapshot {file}: {e}")
+    return snapshots
+
+# Held while a snapshot stores its content and is written, so the store sweep never sees one half done
+_snapshot_lock = threading.RLock()
+_snapshot_generation = 0  # Bumped by every snapshot written
+
+def take_snapshot(profile_name, reason):
+    """Record a profile's current files as a snapshot; returns its path, or None when nothing changed.
+
+    The snapshot itself is only the manifest. The files it names are put in the content
+    store (hard linked from the profile folder where possible), so a snapshot of an
+    unchanged mod costs no space at all.
+    """
+    profile_path = os.path.join(PROFILES_FOLDER, profile_name)
+    mod_files = list_mod_files(profile_path)
+    hashes = hash_files_parallel([os.path.join(profile_path, file) for file in mod_files])
+
+    with _snapshot_lock:
+        return _write_snapshot(profile_name, reason, profile_path, mod_files, hashes)
+
+def _write_snapshot(profile_name, reason, profile_path, mod_files, hashes):
+    global _snapshot_generation
+    files = {}
+    for file in mod_files:
+        path = os.path.join(profile_path, file)
+        if path not in hashes:
+            continue  # Unreadable; already reported by hash_files_parallel
+        stat = os.stat(path)
+        store_content(path, hashes[path])
+        files[file] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": hashes[path]}
+
+    history = list_snapshots(profile_name)
+    if history:
+        latest = history[-1][1]["files"]
+        if {file: record["hash"] for file, record in latest.items()} == {file: record["hash"] for file, record in files.items()}:
+            return None
+
+    created = time.time()
+    snapshot = {
+        "profile": profile_name,
+        "created": created,
+        "reason": reason,
+        "mods": sorted(group_mod_files(files)),
+        "files": files,
+    }
+    snapshot_path = os.path.join(SNAPSHOTS_FOLDER, profile_name, f"{int(created * 1000)}.json")
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    write_json_atomic(snapshot_path, snapshot)
+    _snapshot_generation += 1
+    print(f"DEBUG: Snapshot of profile '{profile_name}' ({reason}): {len(files)} files")
+
+    # Only the manifests are pruned; stored content is left for the garbage collector
+    for old_path, _ in history[: max(0, len(history) + 1 - SNAPSHOT_LIMIT)]:
+        os.remove(old_path)
+    return snapshot_path
+
+def plan_restore(folder, files):
+    """Work out how to bring a folder to exactly a snapshot's files.
+
+    Returns (groups, removals): [(stored copy, destination)] lists for the files that
+    differ, grouped as copy_mod_group takes them, and the files the snapshot does not
+    have. Files that already match are left alone, so rolling back a few mods only
+    touches those mods.
+    """
+    removals = [os.path.join(folder, file) for file in list_mod_files(folder) if file not in files]
+    groups = []
+    for members in group_mod_files(files).values():
+        pairs = []
+        for file in members:
+            record = files[file]
+            path = os.path.join(folder, file)
+            if os.path.exists(path):
+                stat = os.stat(path)
+                if (stat.st_size == record["size"] and stat.st_mtime_ns == record["mtime"]) or lookup_cached_hash(path) == record["hash"]:
+                    continue
+            stored = content_path(record["hash"])
+            if not os.path.exists(stored):
+                raise FileNotFoundError(f"The stored copy of '{file}' is missing from the content store.")
+            pairs.append((stored, path))
+        if pairs:
+            groups.append(pairs)
+    return groups, removals
+
+def restore_files(groups, removals):
+    """Carry out a plan_restore result."""
+    for path in removals:
+        os.remove(path)
+    for pairs in groups:
+        os.makedirs(os.path.dirname(pairs[0][1]), exist_ok=True)
+        copy_mod_group(pairs)
+
+def profiles_matching(pattern):
+    """Names of the profiles matching a wildcard pattern (case-insensitive)."""
+    if not os.path.isdir(PROFILES_FOLDER):
+        return []
+    return sorted(
+        name for name in os.listdir(PROFILES_FOLDER)
+        if os.path.isdir(os.path.join(PROFILES_FOLDER, name)) and fnmatch.fnmatch(name.lower(), pattern.lower())
+    )
+
+def mod_matches(pak_name, pattern):
+    """True if a mod matches a wildcard pattern, with or without its .pak extension."""
+    pattern = pattern.lower()
+    return fnmatch.fnmatch(pak_name.lower(), pattern) or fnmatch.fnmatch(os.path.splitext(pak_name)[0].lower(), pattern)
+
+def plan_bulk_change(profile_pattern, remove_pattern="", add_paths=(), mods_folder=None, active_profile=None, stage=True):
+    """Work out one journaled transaction that edits every profile matching profile_pattern.
+
+    Mods matching remove_pattern are removed, then the mod groups of add_paths are added
+    (both together replace one mod with another). Added files are put in the content
+    store once and hard linked into each profile, so no profile is loaded, applied or
+    copied in full. Each edited profile is snapshotted first, so the edit can be rolled
+    back from its history, and gets its manifest rewritten after. The Mods folder is only
+    touched when the active profile is one of the edited ones. With stage=False nothing
+    is written and the result is only good for a preview.
+
+    Returns (ops, {profile: (removed mods, added mods)}) for the profiles that change.
+    """
+    # Every added group, as [(source, file name)] with the .pak first
+    add_groups = {}
+    for path in add_paths:
+        pak_path = group_pak_path(path)
+        if not pak_path:
+            raise FileNotFoundError(f"'{os.path.basename(path)}' has no matching .pak file.")
+        members = []
+        for member in mod_group_paths(pak_path):
+            source = store_content(member, cached_hash(member)) if stage else member
+            members.append((source, os.path.basename(member)))
+        add_groups[os.path.basename(pak_path)] = members
+    if stage:
+        save_hash_cache()
+
+    ops, changes = [], {}
+    for profile in profiles_matching(profile_pattern):
+        profile_path = os.path.join(PROFILES_FOLDER, profile)
+        present = group_mod_files(list_mod_files(profile_path))
+        removed = sorted(pak for pak in present if remove_pattern and mod_matches(pak, remove_pattern) and pak not in add_groups)
+        added = sorted(
+            pak for pak, members in add_groups.items()
+            if not all(files_match(source, os.path.join(profile_path, file)) for source, file in members)
+        )
+        if not removed and not added:
+            continue
+        changes[profile] = (removed, added)
+
+        targets = [profile_path]
+        if profile == active_profile and mods_folder:
+            targets.append(mods_folder)
+        ops.append({"op": "snapshot", "profile": profile, "reason": "before bulk edit"})
+        for folder in targets:
+            for pak in removed:
+                ops += [{"op": "remove", "path": path} for path in mod_group_paths(os.path.join(folder, pak))]
+            for pak in added:
+                # Replacing a group drops containers the new version does not have
+                files = {file for _, file in add_groups[pak]}
+                ops += [
+                    {"op": "remove", "path": path} for path in mod_group_paths(os.path.join(folder, pak))
+                    if os.path.basename(path) not in files
+                ]
+                ops.append({
+                    "op": "link_group" if folder == profile_path else "copy_group",
+                    "files": [[source, os.path.join(folder, file)] for source, file in add_groups[pak]],
+                })
+        ops.append({"op": "manifest", "profile": profile})
+    return ops, changes
+
+def run_bulk_change(profile_pattern, remove_pattern="", add_paths=(), mods_folder=None, active_profile=None):
+    """Plan, journal and carry out a bulk edit; an interrupted run finishes on the next launch.
+
+    Returns the changes as plan_bulk_change reports them, or None when another process
+    holds the journal. A failed step is raised with the journal kept, so the edit
+    resumes on the next launch (each profile also has its "before bulk edit" snapshot).
+    """
+    # Held throughout: the profiles lock keeps other processes out of the profile folders, and
+    # the snapshot lock stops the store sweep taking staged content before it is linked
+    with FileLock(PROFILES_LOCK_FILE, timeout=PROFILES_LOCK_WAIT), _snapshot_lock:
+        # An earlier edit that stopped part-way is finished before a new journal replaces it
+        if not replay_sync_journal(BULK_JOURNAL_FILE, BULK_LOCK_FILE):
+            return None
+        ops, changes = plan_bulk_change(profile_pattern, remove_pattern, add_paths, mods_folder, active_profile)
+        if not ops:
+            return changes
+        write_json_atomic(BULK_JOURNAL_FILE, {"id": f"{time.time_ns()}-{os.getpid()}", "created": time.time(), "done": 0, "ops": ops})
+        if not replay_sync_journal(BULK_JOURNAL_FILE, BULK_LOCK_FILE):
+            return None
+    return changes
+
+# Held while stages are written; a switch that cannot get it goes straight to the profile instead
+_stage_lock = threading.Lock()
+
+def stage_path(game_dir, profile_name=None):
+    """Stage folder for a favorite profile (or the root of all stages) inside the game folder."""
+    root = os.path.join(game_dir, STAGE_FOLDER_NAME)
+    return os.path.join(root, profile_name) if profile_name else root
+
+def stage_profile(game_dir, profile_name):
+    """Bring a favorite's stage folder up to date with the profile; only changed mod groups are copied.
+
+    Staging is skipped (returns None) when it would leave less than PLAN_FREE_MARGIN
+    free on the game volume; switching to that favorite then copies from the profile.
+    """
+    profile_path = os.path.join(PROFILES_FOLDER, profile_name)
+    stage = stage_path(game_dir, profile_name)
+    recover_group_updates(stage)
+    wanted = set(list_mod_files(profile_path))
+    for file in list_mod_files(stage):
+        if file not in wanted:
+            os.remove(os.path.join(stage, file))
+
+    plan = plan_copies(mod_group_pairs(profile_path, stage))
+    for info in plan["volumes"].values():
+        if info["need"] > 0 and info["free"] - info["need"] < PLAN_FREE_MARGIN:
+            print(
+                f"DEBUG: Not staging '{profile_name}': needs {format_size(info['need'])} on {info['path']}, "
+                f"{format_size(info['free'])} free"
+            )
+            return None
+    written = copy_mod_groups(profile_path, stage)
+    if written:
+        print(f"DEBUG: Staged profile '{profile_name}': {format_size(written)} written")
+    return written
+
+def stage_is_current(game_dir, profile_name):
+    """True when the stage holds exactly the profile's files (checked by size and mtime only)."""
+    profile_path = os.path.join(PROFILES_FOLDER, profile_name)
+    stage = stage_path(game_dir, profile_name)
+    files = list_mod_files(profile_path)
+    if not os.path.isdir(stage) or set(files) != set(list_mod_files(stage)):
+        return False
+    return all(files_match(os.path.join(profile_path, file), os.path.join(stage, file)) for file in files)
+
+def prune_stages(game_dir, keep):
+    """Delete the stage folders of profiles that are no longer favorites."""
+    root = stage_path(game_dir)
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        if name not in keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            print(f"DEBUG: Removed stage of '{name}'")
+
+def switch_mods(source_folder, mods_folder, link=False):
+    """Make the Mods folder hold exactly source_folder's mods, touching only the groups that differ.
+
+    The diff is worked out from sizes and mtimes alone. With link=True (a stage on the
+    same volume) changed groups are hard linked, so a switch costs a few renames and
+    unlinks however large the mods are. Returns the number of bytes written.
+    """
+    wanted = set(list_mod_files(source_folder))
+    for file in list_mod_files(mods_folder):
+        if file not in wanted:
+            os.remove(os.path.join(mods_folder, file))
+    written = 0
+    for pairs in mod_group_pairs(source_folder, mods_folder):
+        written += copy_mod_group(pairs, link=link)
+    return written
+
+def folder_content(folder):
+    """{content key: (size, file)} for the mod files in a folder, from its listing and the hash cache.
+
+    Nothing is read: the key is the cached hash while the file's size and mtime still
+    match, otherwise name and size (the same fallback the profile catalog uses).
+    """
+    with _hash_cache_lock:
+        cache = dict(load_hash_cache())
+    content = {}
+    try:
+        entries = [entry for entry in os.scandir(folder) if entry.is_file() and is_mod_file(entry.name)]
+    except OSError:
+        return content
+    for entry in entries:
+        stat = entry.stat()
+        cached = cache.get(os.path.normcase(os.path.abspath(entry.path)))
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            key = cached[2]
+        else:
+            key = f"{entry.name}:{stat.st_size}"
+        content[key] = (stat.st_size, entry.name)
+    return content
+
+def storage_report(mods_folder=None, extraction_cache=None, top=10, stage_root=None):
+    """Where the manager's disk space goes, worked out from listings and indexes rather than file reads.
+
+    Returns {"locations": [(label, files, bytes, unique bytes)], "other": [(label, bytes)],
+    "largest": [(size, file, [labels])]}. Unique bytes are content held by no other
+    location; the rest is shared (the same hash kept in Mods, another profile, a backup
+    or the snapshot store).
+    """
+    locations = []
+    if mods_folder:
+        locations.append(("Mods", folder_content(mods_folder)))
+    # Favorite stages in the game folder; what is currently linked into Mods shows as shared
+    for name in sorted(os.listdir(stage_root)) if stage_root and os.path.isdir(stage_root) else []:
+        locations.append((f"Favorite stage: {name}", folder_content(os.path.join(stage_root, name))))
+    for label, folder in (("Profile", PROFILES_FOLDER), ("Backup", os.path.join(BACKUP_FOLDER, "Profiles"))):
+        names = sorted(name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name))) if os.path.isdir(folder) else []
+        for name in names:
+            locations.append((f"{label}: {name}", folder_content(os.path.join(folder, name))))
+    loose_backups = folder_content(BACKUP_FOLDER)
+    if loose_backups:
+        locations.append(("Backup", loose_backups))
+
+    # Stored snapshot content is named by its hash; copies hard linked from a profile cost nothing extra
+    stored = {}
+    for prefix in os.listdir(CONTENT_STORE_FOLDER) if os.path.isdir(CONTENT_STORE_FOLDER) else []:
+        for entry in os.scandir(os.path.join(CONTENT_STORE_FOLDER, prefix)):
+            stat = entry.stat()
+            if entry.is_file() and stat.st_nlink == 1:
+                stored[entry.name] = (stat.st_size, entry.name[:12])
+    if stored:
+        locations.append(("Snapshot store", stored))
+
+    holders = {}
+    for label, content in locations:
+        for key, (size, file) in content.items():
+            # The store comes last, so a stored hash is only shown when no file carries that content
+            holders.setdefault(key, [size, file, []])[2].append(label)
+
+    rows = []
+    for label, content in locations:
+        total = sum(size for size, _ in content.values())
+        unique = sum(size for key, (size, _) in content.items() if len(holders[key][2]) == 1)
+        rows.append((label, len(content), total, unique))
+
+    other = []
+    if extraction_cache is not None:
+        with extraction_cache.lock:
+            other.append(("Extraction cache", sum(entry.get("size", 0) for entry in extraction_cache.entries.values())))
+    other.append(("Temp", folder_size(TEMP_FOLDER)))  # Scratch only, normally near empty
+
+    largest = sorted((tuple(holder) for holder in holders.values()), key=lambda holder: holder[0], reverse=True)[:top]
+    return {"locations": rows, "other": other, "largest": largest}
+
+def load_pak_index():
+    """Return the pak metadata index ({hash: {...}}); entries only exist for paks already analysed."""
+    try:
+        with open(PAK_INDEX_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_pak_index(pak_index):
+    try:
+        write_json_atomic(PAK_INDEX_FILE, pak_index)
+    except Exception as e:
+        print(f"ERROR: Failed to save pak index: {e}")
+
+# Held for every read-modify-write of pak_index.json
+_pak_index_lock = threading.RLock()
+
+def update_pak_index(updates):
+    """Merge {hash: fields} into a fresh read of the pak index and save it; returns the merged index."""
+    with _pak_index_lock:
+        pak_index = load_pak_index()
+        for digest, fields in updates.items():
+            pak_index.setdefault(digest, {}).update(fields)
+        save_pak_index(pak_index)
+        return pak_index
+
+def chunk_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def chunk_signature(path, chunk_size=DELTA_CHUNK_SIZE):
+    """Per-block hashes of a file, used to find the blocks a new version changed."""
+    signature = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            IO_GOVERNOR.throttle(len(chunk))
+            signature.append(chunk_digest(chunk))
+    return signature
+
+def _write_checkpoint(checkpoint_path, checkpoint):
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, checkpoint_path)
+
+def resumable_copy(source, partial_path, chunk_size=RESUMABLE_CHUNK_SIZE):
+    """Copy source to partial_path, checkpointing every chunk so a rerun resumes after the last good one.
+
+    Each chunk is fsynced before its digest is added to the checkpoint, so everything
+    the checkpoint lists is on disk. A resume re-reads the last listed chunk to make sure
+    it survived, then continues from there. When the source changed since the checkpoint
+    the copy starts over. Before returning, the whole copy is read back and compared
+    with the source's chunk digests; the caller renames it into place afterwards.
+    """
+    checkpoint_path = partial_path + CHECKPOINT_SUFFIX
+    stat = os.stat(source)
+    identity = {"source": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime_ns, "chunk_size": chunk_size}
+
+    checkpoint = None
+    try:
+        with open(checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if checkpoint is None or any(checkpoint.get(key) != value for key, value in identity.items()) or not os.path.exists(partial_path):
+        checkpoint = dict(identity, chunks=[])
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)  # Left by a copy of an older version of the source
+        if reflink_copy(source, partial_path):
+            return  # Cloned: nothing to checkpoint
+        open(partial_path, "wb").close()
+
+    chunks = checkpoint["chunks"]
+    with open(source, "rb") as src, open(partial_path, "r+b") as dst:
+        # The last checkpointed chunk must read back intact, otherwise redo it
+        if chunks:
+            dst.seek((len(chunks) - 1) * chunk_size)
+            if chunk_digest(dst.read(chunk_size)) != chunks[-1]:
+                chunks.pop()
+        if chunks:
+            print(f"DEBUG: Resuming copy of {os.path.basename(source)} at {len(chunks) * chunk_size // (1024 * 1024)} MB")
+
+        offset = len(chunks) * chunk_size
+        src.seek(offset)
+        dst.seek(offset)
+        dst.truncate(offset)
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            IO_GOVERNOR.throttle(2 * len(chunk))  # Read and written
+            dst.write(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+            chunks.append(chunk_digest(chunk))
+            _write_checkpoint(checkpoint_path, checkpoint)
+
+    # Verify what is on disk before it may be renamed into place
+    with open(partial_path, "rb") as dst:
+        for index, digest in enumerate(chunks):
+            IO_GOVERNOR.throttle(chunk_size)
+            if chunk_digest(dst.read(chunk_size)) != digest:
+                checkpoint["chunks"] = chunks[:index]
+                _write_checkpoint(checkpoint_path, checkpoint)
+                raise IOError(f"Copy of {os.path.basename(source)} failed verification at {index * chunk_size} bytes")
+        if dst.read(1):
+            raise IOError(f"Copy of {os.path.basename(source)} is longer than its source")
+    shutil.copystat(source, partial_path)
+    os.remove(checkpoint_path)
+
+def stage_copy(source, partial_path):
+    """Write a copy of source to a temporary path, resumably when the file is large."""
+    if os.path.getsize(source) >= RESUMABLE_COPY_THRESHOLD:
+        resumable_copy(source, partial_path)
+    else:
+        copy_file(source, partial_path)
+
+def discard_partial(partial_path):
+    """Remove an unfinished copy unless it has a checkpoint to resume from."""
+    if os.path.exists(partial_path) and not os.path.exists(partial_path + CHECKPOINT_SUFFIX):
+        os.remove(partial_path)
+
+def full_copy(source, destination):
+    """Copy through a temporary name so the destination is never half written."""
+    partial_path = destination + ".partial"
+    try:
+        stage_copy(source, partial_path)
+    except Exception:
+        discard_partial(partial_path)
+        raise
+    os.replace(partial_path, destination)
+
+def delta_copy(source, destination, chunk_size=DELTA_CHUNK_SIZE):
+    """Bring an existing destination up to date with source by rewriting only changed blocks.
+
+    The patch is built in a temporary file that starts as a copy-on-write clone of the
+    destination and is renamed over it once complete, so the destination (which the
+    game may be loading) is never half written. Without cloning a patch saves nothing
+    over a full copy, so a full (resumable) copy is made instead; the same goes for a
+    destination hard linked to another copy or left mid-update by an older version.
+    The destination's block signature comes from the pak index when it was recorded
+    for that content, otherwise it is computed; either way the patched file's digest is
+    checked against the source before the rename, and a full copy is made on a
+    mismatch. The new version's signature is stored in the pak index so the next
+    update skips that read. Returns the number of bytes written.
+    """
+    marker_path = destination + DELTA_MARKER_SUFFIX
+    partial_path = destination + ".partial"
+    if os.path.exists(partial_path + CHECKPOINT_SUFFIX):
+        os.remove(partial_path + CHECKPOINT_SUFFIX)  # The clone below replaces that unfinished copy
+    if (
+        not os.path.exists(destination)
+        or os.path.exists(marker_path)
+        or os.stat(destination).st_nlink > 1
+        or not reflink_copy(destination, partial_path)
+    ):
+        full_copy(source, destination)
+        if os.path.exists(marker_path):
+            os.remove(marker_path)
+        return os.path.getsize(destination)
+
+    new_signature = []
+    written = 0
+    full_digest = hashlib.sha256()
+    try:
+        pak_index = load_pak_index()
+        old_entry = pak_index.get(lookup_cached_hash(destination) or "", {})
+        if old_entry.get("chunk_size") == chunk_size and "chunks" in old_entry:
+            old_signature = old_entry["chunks"]
+        else:
+            old_signature = chunk_signature(destination, chunk_size)
+
+        with open(source, "rb") as src, open(partial_path, "r+b") as dst:
+            for index, chunk in enumerate(iter(lambda: src.read(chunk_size), b"")):
+                IO_GOVERNOR.throttle(len(chunk))
+                full_digest.update(chunk)
+                digest = chunk_digest(chunk)
+                new_signature.append(digest)
+                if index >= len(old_signature) or old_signature[index] != digest:
+                    dst.seek(index * chunk_size)
+                    dst.write(chunk)
+                    written += len(chunk)
+            dst.truncate(src.tell())
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copystat(source, partial_path)
+    except Exception:
+        discard_partial(partial_path)
+        raise
+
+    # The old signature is trusted by size and mtime only, so the patched file must match the source
+    new_hash = full_digest.hexdigest()
+    if hash_file(partial_path) != new_hash:
+        print(f"DEBUG: Delta update of {os.path.basename(destination)} did not match its source; copying in full")
+        os.remove(partial_path)
+        full_copy(source, destination)
+        return os.path.getsize(destination)
+    os.replace(partial_path, destination)
+
+    # Remember the new version's signature and hash for the next update
+    update_pak_index({new_hash: {"size": os.path.getsize(destination), "chunk_size": chunk_size, "chunks": new_signature}})
+    for path in (source, destination):
+        stat = os.stat(path)
+        with _hash_cache_lock:
+            load_hash_cache()[os.path.normcase(os.path.abspath(path))] = [stat.st_size, stat.st_mtime_ns, new_hash]
+    save_hash_cache()
+
+    print(f"DEBUG: Delta updated {os.path.basename(destination)}: {written} of {os.path.getsize(destination)} bytes written")
+    return written
+
+def files_match(source, destination):
+    """True when destination is an intact copy of source (copy2 preserves mtime)."""
+    if not os.path.exists(destination) or os.path.exists(destination + DELTA_MARKER_SUFFIX):
+        return False
+    src_stat, dst_stat = os.stat(source), os.stat(destination)
+    return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+def update_file(source, destination):
+    """Copy source over destination, skipping identical files and delta-patching replaced ones."""
+    if os.path.exists(destination):
+        if files_match(source, destination):
+            return 0
+        return delta_copy(source, destination)
+    full_copy(source, destination)
+    return os.path.getsize(destination)
+
+def recover_delta_updates(folder):
+    """Redo in-place updates an older version left interrupted by a crash, using the recorded source."""
+    if not os.path.isdir(folder):
+        return
+    for file in os.listdir(folder):
+        if not file.endswith(DELTA_MARKER_SUFFIX):
+            continue
+        marker_path = os.path.join(folder, file)
+        destination = marker_path[: -len(DELTA_MARKER_SUFFIX)]
+        try:
+            with open(marker_path, "r") as marker:
+                source = json.load(marker).get("source")
+            if source and os.path.exists(source):
+                full_copy(source, destination)
+                os.remove(marker_path)
+                print(f"DEBUG: Recovered interrupted update of {os.path.basename(destination)}")
+            else:
+                print(f"ERROR: {os.path.basename(destination)} was interrupted mid-update and its source is gone.")
+        except Exception as e:
+            print(f"ERROR: Failed to recover {destination}: {e}")
+
+def is_mod_file(file_name):
+    """True for any file that belongs to a mod group (.pak, .utoc or .ucas)."""
+    return file_name.lower().endswith(MOD_EXTENSIONS)
+
+def list_mod_files(folder):
+    """Names of all mod group files directly inside a folder."""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(file for file in os.listdir(folder) if is_mod_file(file))
+
+def group_mod_files(file_names):
+    """Map each .pak in a listing to the files of its group, the .pak first.
+
+    IoStore containers without a .pak of the same name are not a loadable mod and
+    are left out.
+    """
+    names = set(file_names)
+    # Extensions match in any case, like is_mod_file (Mod_P.pak + Mod_P.UTOC is one group)
+    by_stem = {}
+    for name in names:
+        stem, extension = os.path.splitext(name)
+        by_stem.setdefault(os.path.normcase(stem), {})[extension.lower()] = name
+    groups = {}
+    for name in sorted(names):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() == ".pak":
+            siblings = by_stem[os.path.normcase(stem)]
+            groups[name] = [name] + [siblings[ext] for ext in MOD_EXTENSIONS[1:] if ext in siblings]
+    return groups
+
+def mod_group_paths(pak_path):
+    """Return the existing files of the mod group a .pak belongs to, the .pak first."""
+    folder, name = os.path.split(pak_path)
+    stem = os.path.normcase(os.path.splitext(name)[0])
+    try:
+        listing = os.listdir(folder or ".")
+    except OSError:
+        return [pak_path]
+    siblings = {}
+    for entry in listing:
+        entry_stem, extension = os.path.splitext(entry)
+        if os.path.normcase(entry_stem) == stem and extension.lower() in MOD_EXTENSIONS[1:]:
+            siblings[extension.lower()] = entry
+    return [pak_path] + [os.path.join(folder, siblings[ext]) for ext in MOD_EXTENSIONS[1:] if ext in siblings]
+
+def group_pak_path(file_path):
+    """The .pak of the group a mod file belongs to, matched in any case, or None."""
+    folder, name = os.path.split(file_path)
+    stem = os.path.normcase(os.path.splitext(name)[0])
+    try:
+        listing = os.listdir(folder or ".")
+    except OSError:
+        return None
+    for entry in listing:
+        entry_stem, extension = os.path.splitext(entry)
+        if extension.lower() == ".pak" and os.path.normcase(entry_stem) == stem:
+            return os.path.join(folder, entry)
+    return None
+
+def group_hash(paths):
+    """Content hash of a whole mod group; a lone .pak keeps its plain file hash."""
+    if len(paths) == 1:
+        return cached_hash(paths[0])
+    # IoStore .pak stubs are often identical across mods, so the containers must count too
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f"{os.path.splitext(path)[1].lower()}:{cached_hash(path)}\n".encode())
+    return digest.hexdigest()
+
+def stage_link(source, partial_path):
+    """Stage a hard link to source instead of a copy; False when the volume cannot link it."""
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    try:
+        os.link(source, partial_path)
+        return True
+    except OSError:
+        return False
+
+def copy_mod_group(pairs, workers=len(MOD_EXTENSIONS), link=False):
+    """Copy the files of one mod group so the destination never holds half a group.
+
+    pairs is [(source, destination)] for every file of the group. A lone .pak goes
+    through update_file. For IoStore groups every changed file is staged under a
+    temporary name in parallel, so a large .ucas copies alongside its siblings, and
+    only once all of them are complete are they renamed into place under a marker
+    that recover_group_updates uses to finish an interrupted commit. With link=True
+    files are hard linked where the volume allows it (delta_copy never patches a
+    linked file). Returns the number of bytes written.
+    """
+    if len(pairs) == 1 and not link:
+        return update_file(*pairs[0])
+
+    pending = [(source, destination) for source, destination in pairs if not files_match(source, destination)]
+    if not pending:
+        return 0
+
+    def stage(pair):
+        source, destination = pair
+        if link and stage_link(source, destination + ".partial"):
+            return 0
+        stage_copy(source, destination + ".partial")
+        return os.path.getsize(source)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            written = sum(pool.map(stage, pending))
+    except Exception:
+        # Nothing has been renamed yet, so the destination still holds the old group
+        for _, destination in pending:
+            discard_partial(destination + ".partial")
+        raise
+
+    destinations = [destination for _, destination in pending]
+    marker_path = os.path.splitext(destinations[0])[0] + GROUP_MARKER_SUFFIX
+    with open(marker_path, "w") as marker:
+        json.dump(destinations, marker)
+        marker.flush()
+        os.fsync(marker.fileno())
+    for destination in destinations:
+        os.replace(destination + ".partial", destination)
+    os.remove(marker_path)
+    return written
+
+def mod_group_pairs(source_folder, destination_folder):
+    """[(source, destination)] lists for every mod group of source_folder, as copy_mod_group takes them."""
+    return [
+        [(os.path.join(source_folder, file), os.path.join(destination_folder, file)) for file in members]
+        for members in group_mod_files(list_mod_files(source_folder)).values()
+    ]
+
+def copy_mod_groups(source_folder, destination_folder):
+    """Bring every mod group of source_folder over to destination_folder, one group at a time."""
+    os.makedirs(destination_folder, exist_ok=True)
+    written = 0
+    for pairs in mod_group_pairs(source_folder, destination_folder):
+        written += copy_mod_group(pairs)
+    return written
+
+def remove_mod_group(folder, pak_name):
+    """Delete a mod's .pak and its IoStore containers from a folder; returns the names removed."""
+    removed = []
+    # The .pak goes first so the game never mounts it without its containers
+    for path in mod_group_paths(os.path.join(folder, pak_name)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(os.path.basename(path))
+    return removed
+
+def recover_group_updates(folder):
+    """Finish mod group commits cut off mid-rename and drop copies that were never committed."""
+    if not os.path.isdir(folder):
+        return
+    for file in os.listdir(folder):
+        if not file.endswith(GROUP_MARKER_SUFFIX):
+            continue
+        marker_path = os.path.join(folder, file)
+        try:
+            with open(marker_path, "r") as marker:
+                destinations = json.load(marker)
+            # Every staged file was complete before the marker was written
+            for destination in destinations:
+                if os.path.exists(destination + ".partial"):
+                    os.replace(destination + ".partial", destination)
+            os.remove(marker_path)
+            print(f"DEBUG: Finished interrupted update of {os.path.splitext(file)[0]}")
+        except Exception as e:
+            print(f"ERROR: Failed to recover {marker_path}: {e}")
+
+    for file in os.listdir(folder):
+        if file.endswith(".partial") and is_mod_file(file[: -len(".partial")]):
+            partial_path = os.path.join(folder, file)
+            checkpoint_path = partial_path + CHECKPOINT_SUFFIX
+            try:
+                # A checkpointed copy is kept for the next attempt while its source is still around
+                with open(checkpoint_path, "r") as f:
+                    if os.path.exists(json.load(f).get("source", "")):
+                        print(f"DEBUG: Keeping resumable copy {file}")
+                        continue
+            except (OSError, ValueError):
+                pass
+            try:
+                os.remove(partial_path)
+                if os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                print(f"DEBUG: Removed incomplete copy {file}")
+            except OSError as e:
+                print(f"ERROR: Failed to remove {file}: {e}")
+
+def volume_of(path):
+    """Return (device id, nearest existing path) for the volume a possibly not yet created path is on."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return os.stat(path).st_dev, path
+
+_reflink_support = {}
+
+def supports_reflink(folder):
+    """Probe once per volume whether copy_file can clone instead of copying."""
+    device, existing = volume_of(folder)
+    if device not in _reflink_support:
+        probe_path = None
+        try:
+            fd, probe_path = tempfile.mkstemp(dir=existing, prefix=".mrmm-probe-")
+            with os.fdopen(fd, "wb") as probe:
+                probe.write(b"\0")
+            _reflink_support[device] = reflink_copy(probe_path, probe_path + ".clone")
+        except OSError:
+            _reflink_support[device] = False
+        finally:
+            for path in (probe_path, (probe_path or "") + ".clone"):
+                if path and os.path.exists(path):
+                    os.remove(path)
+    return _reflink_support[device]
+
+def estimate_delta_bytes(source, destination):
+    """Bytes a delta update will rewrite, from the pak index signatures when both are known."""
+    pak_index = load_pak_index()
+    old_entry = pak_index.get(lookup_cached_hash(destination) or "", {})
+    new_entry = pak_index.get(lookup_cached_hash(source) or "", {})
+    if old_entry.get("chunk_size") == new_entry.get("chunk_size") == DELTA_CHUNK_SIZE and "chunks" in old_entry and "chunks" in new_entry:
+        old_chunks, new_chunks = old_entry["chunks"], new_entry["chunks"]
+        changed = sum(
+            1 for index, digest in enumerate(new_chunks)
+            if index >= len(old_chunks) or old_chunks[index] != digest
+        )
+        return min(changed * DELTA_CHUNK_SIZE, os.path.getsize(source))
+    return os.path.getsize(source)
+
+def plan_copies(groups, removals=()):
+    """Work out what copying these mod groups will cost before anything is touched.
+
+    groups is a list of [(source, destination)] lists as taken by copy_mod_group, and
+    removals are files deleted before the copy starts. Files the copy will skip cost
+    nothing, clones on a reflink-capable volume take no space, a delta update (made on a
+    clone of the old file) needs room for the blocks it rewrites, and anything else is
+    staged next to the old file until it is renamed.
+    Returns {"write": bytes of I/O, "volumes": {device: {"path", "need", "free"}}}.
+    """
+    plan = {"write": 0, "volumes": {}}
+    removals = set(removals)
+
+    def volume(path):
+        device, existing = volume_of(os.path.dirname(path))
+        if device not in plan["volumes"]:
+            plan["volumes"][device] = {"path": existing, "need": 0, "free": shutil.disk_usage(existing).free}
+        return plan["volumes"][device]
+
+    for path in removals:
+        if os.path.exists(path):
+            volume(path)["need"] -= os.path.getsize(path)
+
+    seen = set()
+    for pairs in groups:
+        for source, destination in pairs:
+            if destination in seen or (destination not in removals and files_match(source, destination)):
+                continue
+            seen.add(destination)
+            size = os.path.getsize(source)
+            target = volume(destination)
+            delta = (
+                len(pairs) == 1
+                and os.path.exists(destination)
+                and destination not in removals
+                and not os.path.exists(destination + DELTA_MARKER_SUFFIX)
+                and os.stat(destination).st_nlink == 1
+                and supports_reflink(os.path.dirname(destination))
+            )
+            if delta:
+                rewritten = estimate_delta_bytes(source, destination)
+                plan["write"] += rewritten
+                target["need"] += rewritten
+            elif volume_of(source)[0] == volume_of(destination)[0] and supports_reflink(os.path.dirname(destination)):
+                continue  # Cloned: no data written and no space taken
+            else:
+                plan["write"] += size
+                target["need"] += size
+
+    for info in plan["volumes"].values():
+        info["need"] = max(0, info["need"])
+    return plan
+
+def format_duration(seconds):
+    """Short duration text for estimates."""
+    if seconds < 60:
+        return f"{max(1, round(seconds))} s"
+    return f"{seconds // 60:.0f} min {seconds % 60:.0f} s"
+
+def format_size(num_bytes):
+    """Human readable byte count for the UI."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+def diff_manifests(current_files, target_files, pak_index=None):
+    """Compare two profile manifests ({file: {"size", "hash", ...}}) without touching the paks.
+
+    Files count as changed when both sides have a hash and the hashes differ, or when
+    no hash is known and the sizes differ. When the pak index has asset lists for the
+    paks involved, the asset paths gained and lost by the switch are included as well.
+    """
+    added = sorted((file, target_files[file].get("size", 0)) for file in set(target_files) - set(current_files))
+    removed = sorted((file, current_files[file].get("size", 0)) for file in set(current_files) - set(target_files))
+    changed = []
+    unchanged = 0
+    for file in sorted(set(current_files) & set(target_files)):
+        old, new = current_files[file], target_files[file]
+        if old.get("hash") and new.get("hash"):
+            differs = old["hash"] != new["hash"]
+        else:
+            differs = old.get("size") != new.get("size")
+        if differs:
+            changed.append((file, old.get("size", 0), new.get("size", 0)))
+        else:
+            unchanged += 1
+
+    diff = {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": unchanged,
+        "bytes_to_copy": sum(size for _, size in added) + sum(new for _, _, new in changed),
+        "assets": None,
+    }
+
+    # Asset-level overlap, only when every hashed pak on both sides has been analysed
+    if pak_index:
+        def asset_set(files):
+            assets = set()
+            for file, record in files.items():
+                if not file.lower().endswith(".pak"):
+                    continue  # IoStore containers are covered by their group's .pak entry
+                entry = pak_index.get(record.get("hash") or "")
+                if entry is None or "assets" not in entry:
+                    return None
+                assets.update(entry["assets"])
+            return assets
+
+        current_assets = asset_set(current_files)
+        target_assets = asset_set(target_files)
+        if current_assets is not None and target_assets is not None:
+            diff["assets"] = {
+                "added": sorted(target_assets - current_assets),
+                "removed": sorted(current_assets - target_assets),
+                "shared": len(current_assets & target_assets),
+            }
+    return diff
+
+def summarize_diff(diff):
+    """One line summary of a diff_manifests result."""
+    summary = (
+        f"+{len(diff['added'])}  -{len(diff['removed'])}  ~{len(diff['changed'])}  "
+        f"={diff['unchanged']}  ({format_size(diff['bytes_to_copy'])} to copy)"
+    )
+    if diff["assets"] is not None:
+        summary += f"\nAssets: +{len(diff['assets']['added'])} -{len(diff['assets']['removed'])} shared {diff['assets']['shared']}"
+    return summary
+
+# Job priorities: lower runs first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
+
+class JobCancelled(Exception):
+    """Raised inside a job that was cancelled or superseded."""
+
+class Job:
+    """A unit of scheduled work with a cancellation flag and structured status."""
+
+    def __init__(self, scheduler, key, func, priority, background, description, heavy=False):
+        self.scheduler = scheduler
+        self.key = key
+        self.func = func
+        self.priority = priority
+        self.background = background
+        self.description = description
+        self.heavy = heavy  # Held while the game runs
+        self.state = "pending"  # pending (-> deferred) -> running -> done / failed / cancelled
+        self.message = description
+        self.progress = None  # 0.0 - 1.0 when known
+        self.error = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check_cancelled(self):
+        """Call from long loops; stops the job if it was cancelled."""
+        if self._cancelled.is_set():
+            raise JobCancelled(self.key)
+
+    def report(self, message=None, progress=None):
+        """Publish progress to the UI; also a cancellation point."""
+        if message is not None:
+            self.message = message
+        self.progress = progress
+        self.scheduler.publish(self)
+        self.check_cancelled()
+
+class JobScheduler:
+    """Central queue for refresh, sync, apply and other long-running work.
+
+    Submitting a key that is already pending, or queued for the worker and not yet
+    started, coalesces into that job (taking the newer func, which captured the newer
+    state), user
+    work runs ahead of background work, and supersede=True cancels a running job
+    with the same key. Foreground jobs run on the Tk thread because they touch
+    widgets; background jobs run one at a time on a worker thread, under the I/O
+    governor. Heavy background jobs that come up while the game is running are
+    deferred until it exits. Status updates are always delivered to on_status on the
+    Tk thread.
+    """
+
+    def __init__(self, root, on_status=None, governor=IO_GOVERNOR):
+        self.root = root
+        self.on_status = on_status
+        self.governor = governor
+        self.pending = {}
+        self.queued = {}  # Background jobs on the worker's queue, until the worker takes them
+        self.running = {}
+        self.deferred = {}
+        self._lock = threading.Lock()
+        self._tick_scheduled = False
+        self._sequence = itertools.count()
+        self._background_queue = queue.PriorityQueue()
+        self._worker = threading.Thread(target=self._background_loop, daemon=True)
+        self._worker.start()
+        governor.add_listener(lambda game_running: game_running or self.release_deferred())
+
+    def submit(self, key, func, priority=PRIORITY_BACKGROUND, background=False, description="", supersede=False, heavy=False):
+        """Queue func(job); returns the job (an existing pending one when coalesced)."""
+        with self._lock:
+            if key in self.deferred:
+                # The held job will run once the game exits; a new request adds nothing
+                return self.deferred[key]
+            waiting = self.pending.get(key) or self.queued.get(key)
+            if waiting is not None and not waiting.cancelled:
+                waiting.func = func
+                waiting.priority = min(waiting.priority, priority)  # Takes effect if still pending
+                print(f"DEBUG: Coalesced job '{key}'")
+                return waiting
+            if supersede and key in self.running:
+                self.running[key].cancel()
+            job = Job(self, key, func, priority, background, description or key, heavy)
+            self.pending[key] = job
+        self._schedule_tick()
+        return job
+
+    def cancel(self, key):
+        with self._lock:
+            for jobs in (self.pending, self.queued, self.running, self.deferred):
+                if key in jobs:
+                    jobs[key].cancel()
+            self.deferred.pop(key, None)
+
+    def shutdown(self):
+        """Cancel everything; used when the window closes."""
+        with self._lock:
+            for job in list(self.pending.values()) + list(self.queued.values()) + list(self.running.values()) + list(self.deferred.values()):
+                job.cancel()
+            self.pending.clear()
+            self.queued.clear()
+            self.deferred.clear()
+
+    def release_deferred(self):
+        """Queue the jobs held while the game was running (called from the governor's thread)."""
+        with self._lock:
+            jobs = list(self.deferred.values())
+            self.deferred.clear()
+            for job in jobs:
+                print(f"DEBUG: Running deferred job '{job.key}'")
+                job.state = "pending"
+                self.queued[job.key] = job
+                self._background_queue.put((job.priority, next(self._sequence), job))
+
+    def publish(self, job):
+        if self.on_status:
+            try:
+                self.root.after(0, lambda: self.on_status(job))
+            except RuntimeError:
+                pass  # Window already closed
+
+    def _schedule_tick(self):
+        if not self._tick_scheduled:
+            self._tick_scheduled = True
+            try:
+                self.root.after_idle(self._tick)
+            except RuntimeError:
+                self._tick_scheduled = False
+
+    def _tick(self):
+        """Dispatch pending jobs in priority order (runs on the Tk thread)."""
+        self._tick_scheduled = False
+        while True:
+            with self._lock:
+                if not self.pending:
+                    return
+                job = min(self.pending.values(), key=lambda j: j.priority)
+                del self.pending[job.key]
+                if job.cancelled:
+                    continue
+                if job.background:
+                    self.queued[job.key] = job
+                    self._background_queue.put((job.priority, next(self._sequence), job))
+                    continue
+                self.running[job.key] = job
+            self._run(job)
+
+    def _background_loop(self):
+        while True:
+            _, _, job = self._background_queue.get()
+            # Decided under the lock: release_deferred may flip job.state back to "pending" right after
+            with self._lock:
+                if self.queued.get(job.key) is job:
+                    del self.queued[job.key]  # From here on a new submit queues a fresh job
+                if job.cancelled:
+                    continue
+                deferred = job.heavy and self.governor.game_running
+                if deferred:
+                    self.deferred[job.key] = job
+                    job.state = "deferred"
+                else:
+                    self.running[job.key] = job
+            if deferred:
+                print(f"DEBUG: Deferred job '{job.key}' until the game exits.")
+                self.publish(job)
+                # The game may have exited between the check and now
+                if not self.governor.game_running:
+                    self.release_deferred()
+                continue
+            with self.governor.governed():
+                self._run(job)
+
+    def _run(self, job):
+        job.state = "running"
+        self.publish(job)
+        try:
+            job.func(job)
+            job.state = "done"
+        except JobCancelled:
+            job.state = "cancelled"
+            print(f"DEBUG: Job '{job.key}' cancelled.")
+        except Exception as e:
+            job.state = "failed"
+            job.error = e
+            print(f"ERROR: Job '{job.key}' failed: {e}")
+        finally:
+            with self._lock:
+                if self.running.get(job.key) is job:
+                    del self.running[job.key]
+            self.publish(job)
+
 def verify_game_folder(folder):
     return os.path.isfile(os.path.join(folder, "MarvelRivals_Launcher.exe"))
 
 def list_paks(directory):
     mods_folder = os.path.join(directory, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
-    if os.path.exists(mods_folder):
-        return [f for f in os.listdir(mods_folder) if f.endswith(".pak")]
-    return []
+    # One entry per mod group, named by its .pak
+    return sorted(group_mod_files(list_mod_files(mods_folder)))
 
-def extract_archive(self, archive_path, extract_to):
-    """Extract an archive and add .pak files to the Applied Mods list."""
+def load_settings():
+    """Return the optional settings from config.json with defaults filled in."""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(CONFIG_FILE, "r") as config_file:
+            config_data = json.load(config_file)
+        settings.update({key: config_data[key] for key in DEFAULT_SETTINGS if key in config_data})
+    except (OSError, ValueError):
+        pass
+    return settings
+
+def folder_size(folder):
+    """Total size in bytes of all files below a folder."""
+    total = 0
+    for root, _, files in os.walk(folder):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass
+    return total
+
+def find_paks(folder):
+    """Return the paths of all .pak files below a folder."""
+    pak_paths = []
+    for root, _, files in os.walk(folder):
+        for file in files:
+            if file.endswith(".pak"):
+                pak_paths.append(os.path.join(root, file))
+    return pak_paths
+
+def make_temp_dir():
+    """Create a session scratch folder that the startup sweep can attribute to this process."""
+    os.makedirs(TEMP_FOLDER, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=TEMP_FOLDER)
+
+def sweep_orphaned_temp_dirs():
+    """Delete scratch folders left behind by sessions that crashed before cleaning up."""
+    if not os.path.exists(TEMP_FOLDER):
+        return
+    for name in os.listdir(TEMP_FOLDER):
+        owner = name.split("-", 1)[0]
+        if owner.isdigit() and pid_alive(int(owner)):
+            continue
+        shutil.rmtree(os.path.join(TEMP_FOLDER, name), ignore_errors=True)
+        print(f"DEBUG: Removed orphaned temp folder -> {name}")
+
+def extract_archive_files(archive_path, extract_to):
+    """Extract a zip, 7z or rar archive into a folder."""
+    archive_format = detect_archive_format(archive_path)
+    if archive_format == "zip":
+        with zipfile.ZipFile(archive_path, "r") as archive:
+            archive.extractall(extract_to)
+    elif archive_format == "7z":
+        with py7zr.SevenZipFile(archive_path, "r") as archive:
+            archive.extractall(extract_to)
+    elif archive_format in ("rar", "rar5"):
+        with rarfile.RarFile(archive_path, "r") as archive:
+            archive.extractall(extract_to)
+    else:
+        raise ValueError(f"Unsupported archive format: {archive_path}")
+
+def current_rss(pid=None):
+    """Resident set size in bytes of a process (this one by default), or 0 once it has exited."""
+    if IS_WINDOWS:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if pid is None:
+            handle = kernel32.GetCurrentProcess()
+        else:
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return 0
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return 0
+        finally:
+            if pid is not None:
+                kernel32.CloseHandle(handle)
+        return counters.WorkingSetSize
     try:
-        if archive_path.endswith(".zip"):
-            with zipfile.ZipFile(archive_path, "r") as archive:
-                archive.extractall(extract_to)
-        elif archive_path.endswith(".7z"):
-            with py7zr.SevenZipFile(archive_path, "r") as archive:
-                archive.extractall(extract_to)
-        elif archive_path.endswith(".rar"):
-            with rarfile.RarFile(archive_path, "r") as archive:
-                archive.extractall(extract_to)
+        with open(f"/proc/{pid or 'self'}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        if pid is not None:
+            return 0
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class RSSMonitor:
+    """Sample a process's memory while an extraction runs and record the peak above the baseline.
+
+    Without a pid this watches the manager itself, where other threads' work shows up
+    too, and the figure is only logged. extract_archive_bounded watches its extraction
+    process instead and passes a limit: once the child grows more than limit bytes past
+    its baseline, on_exceeded is called (it kills the child).
+    """
+
+    def __init__(self, interval=0.05, pid=None, limit=0, baseline=None, on_exceeded=None):
+        self.interval = interval
+        self.pid = pid
+        self.limit = limit
+        self.baseline = baseline or 0
+        self.peak = 0
+        self.exceeded = False
+        self.on_exceeded = on_exceeded
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        current = current_rss(self.pid)
+        if not self.baseline:
+            self.baseline = current
+        self.peak = max(self.baseline, current)
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    @property
+    def peak_delta(self):
+        return max(0, self.peak - self.baseline)
+
+    def sample(self):
+        self.peak = max(self.peak, current_rss(self.pid))
+        if self.limit > 0 and not self.exceeded and self.peak_delta > self.limit:
+            self.exceeded = True
+            if self.on_exceeded:
+                self.on_exceeded()
+
+def lzma_dictionary_size(coder):
+    """Decoder dictionary size in bytes of a 7z LZMA/LZMA2 coder, or 0 for other methods."""
+    method = coder.get("method")
+    properties = coder.get("properties") or b""
+    if method == b"\x21" and properties:  # LZMA2
+        prop = properties[0]
+        return 0xFFFFFFFF if prop >= 40 else (2 | (prop & 1)) << (prop // 2 + 11)
+    if method == b"\x03\x01\x01" and len(properties) >= 5:  # LZMA
+        return int.from_bytes(properties[1:5], "little")
+    return 0
+
+def coder_memory_size(coder):
+    """Bytes a 7z coder allocates to decode: its LZMA/LZMA2 dictionary or PPMd model, else 0."""
+    properties = coder.get("properties") or b""
+    if coder.get("method") == b"\x03\x04\x01" and len(properties) >= 5:  # PPMd
+        return int.from_bytes(properties[1:5], "little")
+    return lzma_dictionary_size(coder)
+
+def safe_member_path(extract_to, member_name):
+    """Resolve an archive member below the extraction folder, rejecting paths that escape it."""
+    target = os.path.normpath(os.path.join(extract_to, member_name))
+    if os.path.commonpath([os.path.abspath(extract_to), os.path.abspath(target)]) != os.path.abspath(extract_to):
+        raise ValueError(f"Unsafe path in archive: {member_name}")
+    return target
+
+def _stream_to_file(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as destination:
+        if not IO_GOVERNOR.active():
+            shutil.copyfileobj(source, destination, EXTRACT_CHUNK_SIZE)
+            return
+        for chunk in iter(lambda: source.read(GOVERNED_CHUNK_SIZE), b""):
+            IO_GOVERNOR.throttle(len(chunk))
+            destination.write(chunk)
+
+def _nested_folder(extract_to, member_name):
+    """Folder for the contents of an inner archive, so same-named paks of different heroes don't collide.
+
+    The full member name is kept (inner.7z -> inner.7z.d) so inner.zip and inner.7z
+    next to each other get separate folders too.
+    """
+    return safe_member_path(extract_to, member_name + ".d")
+
+def _extract_nested_stream(stream, member_name, extract_to, monitor, memory_limit, depth):
+    """Ingest an inner archive straight from its parent's member stream.
+
+    The compressed bytes go through a spooled buffer that stays in memory below the
+    threshold and only spills to a scratch file above it; the inner archive's contents
+    are never expanded anywhere except for the .pak files themselves.
+    """
+    if depth >= NESTED_ARCHIVE_MAX_DEPTH:
+        print(f"DEBUG: Skipping {member_name}: archives nested deeper than {NESTED_ARCHIVE_MAX_DEPTH}")
+        return
+    spool_limit = NESTED_SPOOL_THRESHOLD if memory_limit <= 0 else min(NESTED_SPOOL_THRESHOLD, memory_limit // 4)
+    os.makedirs(TEMP_FOLDER, exist_ok=True)
+    with tempfile.SpooledTemporaryFile(max_size=spool_limit, dir=TEMP_FOLDER) as buffer:
+        shutil.copyfileobj(stream, buffer, EXTRACT_CHUNK_SIZE)
+        buffer.seek(0)
+        archive_format = detect_stream_format(buffer)
+        if not archive_format:
+            print(f"DEBUG: {member_name} is not a recognised archive, skipping.")
+            return
+        # Whatever the spool holds in memory is unavailable to the inner archive's decoder
+        inner_limit = max(1, memory_limit - spool_limit) if memory_limit > 0 else 0
+        _extract_archive_members(
+            archive_format, buffer, _nested_folder(extract_to, member_name), monitor, inner_limit, depth + 1
+        )
+
+def _stream_members(archive, extract_to, monitor, memory_limit, depth):
+    """Copy zip/rar mod files (.pak/.utoc/.ucas) to disk through a fixed-size buffer and descend into inner archives."""
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        if is_mod_file(info.filename):
+            with archive.open(info) as source:
+                _stream_to_file(source, safe_member_path(extract_to, info.filename))
+        elif info.filename.lower().endswith(NESTED_ARCHIVE_EXTENSIONS):
+            with archive.open(info) as source:
+                _extract_nested_stream(source, info.filename, extract_to, monitor, memory_limit, depth)
         else:
-            messagebox.showerror("Error", f"Unsupported archive format: {archive_path}")
+            continue
+        monitor.sample()
+
+class DecoderMemoryError(MemoryError):
+    """An archive's decoder state alone would not fit under the extraction memory limit."""
+
+def _extract_7z_blockwise(source, extract_to, monitor, memory_limit, depth, label):
+    """Decode the 7z solid blocks holding a mod file or inner archive in one pass, front to back."""
+    with py7zr.SevenZipFile(source, "r") as archive:
+        main_streams = archive.header.main_streams
+        folders = main_streams.unpackinfo.folders if main_streams else []
+
+        # Group the wanted members by the solid block (folder) that stores them
+        blocks = {}
+        nested = []
+        for member in archive.files:
+            if member.is_directory:
+                continue
+            if member.filename.lower().endswith(NESTED_ARCHIVE_EXTENSIONS):
+                nested.append(member.filename)
+            elif not is_mod_file(member.filename):
+                continue
+            folder = getattr(member, "folder", None)
+            index = next((i for i, f in enumerate(folders) if f is folder), -1)
+            blocks.setdefault(index, []).append(member.filename)
+
+        # Refuse before decoding anything: chained coders (e.g. BCJ + LZMA2) all hold their
+        # state while a block decodes, and blocks without a wanted member are never opened
+        for index in blocks:
+            if index < 0:
+                continue
+            needed = sum(coder_memory_size(c) for c in folders[index].coders)
+            if needed + EXTRACT_CHUNK_SIZE > memory_limit > 0:
+                raise DecoderMemoryError(
+                    f"'{label}' needs {needed // (1024 * 1024)} MB of decoder "
+                    f"memory, over the {memory_limit // (1024 * 1024)} MB limit."
+                )
+
+        # One reader pass in file order; py7zr only resets a block's decoder when it moves on.
+        # It has no per-member stream, so inner archives come out whole and are expanded after
+        targets = [name for names in blocks.values() for name in names]
+        if targets:
+            archive.extract(path=extract_to, targets=targets)
+        monitor.sample()
+
+    for name in nested:
+        inner_path = safe_member_path(extract_to, name)
+        with open(inner_path, "rb") as stream:
+            _extract_nested_stream(stream, name, extract_to, monitor, memory_limit, depth)
+        os.remove(inner_path)
+
+def _extract_archive_members(archive_format, source, extract_to, monitor, memory_limit, depth=0, label=""):
+    label = label or getattr(source, "name", "archive")
+    if archive_format == "zip":
+        with zipfile.ZipFile(source, "r") as archive:
+            _stream_members(archive, extract_to, monitor, memory_limit, depth)
+    elif archive_format == "7z":
+        _extract_7z_blockwise(source, extract_to, monitor, memory_limit, depth, label)
+    elif archive_format in ("rar", "rar5"):
+        with rarfile.RarFile(source, "r") as archive:
+            _stream_members(archive, extract_to, monitor, memory_limit, depth)
+    else:
+        raise ValueError(f"Unsupported archive format: {label}")
+
+def _isolated_extract(connection, archive_path, extract_to, memory_limit, io_limit):
+    """Extraction process body for extract_archive_bounded; reports back over connection."""
+    try:
+        governed = contextlib.nullcontext()
+        if io_limit is not None:
+            IO_GOVERNOR.limit = io_limit
+            governed = IO_GOVERNOR.start().governed()
+        # The parent measures growth from here, so the interpreter itself is not counted
+        connection.send(("ready", current_rss()))
+        with governed, RSSMonitor() as monitor:
+            _extract_archive_members(
+                detect_archive_format(archive_path), archive_path, extract_to, monitor, memory_limit,
+                label=os.path.basename(archive_path),
+            )
+        connection.send(("done", monitor.peak_delta))
+    except DecoderMemoryError as e:
+        connection.send(("too_large", str(e)))
+    except Exception as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
+
+def extract_archive_bounded(archive_path, extract_to, memory_limit):
+    """Extract only the mod files of an archive in a separate process held under a memory limit.
+
+    Members are written straight to disk through a fixed-size buffer, the 7z solid
+    blocks holding mod files are decoded in one pass, and an archive whose coders
+    (LZMA dictionary, PPMd model) would not fit is refused before anything is decoded
+    with DecoderMemoryError. Inner archives are opened from the parent's stream. The
+    work runs in a child process whose RSS is sampled from here; if it grows more than
+    memory_limit past its start-up size the child is killed and MemoryError raised.
+    A memory_limit of 0 still isolates the decoding but does not cap it. Rar decoding
+    runs in the external unrar tool and is not counted. Returns the child's peak growth.
+    """
+    label = os.path.basename(archive_path)
+    os.makedirs(extract_to, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    reader, writer = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_isolated_extract,
+        args=(writer, archive_path, extract_to, memory_limit, IO_GOVERNOR.limit if IO_GOVERNOR.active() else None),
+        daemon=True,
+    )
+    process.start()
+    writer.close()
+    monitor = None
+    try:
+        kind, value = reader.recv()
+        if kind == "ready":
+            with RSSMonitor(pid=process.pid, limit=memory_limit, baseline=value, on_exceeded=process.kill) as monitor:
+                kind, value = reader.recv()
+    except EOFError:
+        kind, value = "exited", None
+    finally:
+        reader.close()
+        process.join()
+
+    if monitor and monitor.exceeded:
+        raise MemoryError(
+            f"Extracting '{label}' went over the {memory_limit // (1024 * 1024)} MB limit and was stopped."
+        )
+    if kind == "too_large":
+        raise DecoderMemoryError(value)
+    if kind == "error":
+        raise RuntimeError(value)
+    if kind != "done":
+        raise RuntimeError(f"The extraction process for '{label}' exited unexpectedly (code {process.exitcode}).")
+
+    peak = monitor.peak_delta if monitor else value
+    print(
+        f"DEBUG: Extracted {label} with peak RSS +{peak // (1024 * 1024)} MB "
+        f"(limit {memory_limit // (1024 * 1024)} MB)"
+    )
+    return peak
+
+def expand_nested_archives(extract_to, memory_limit=0):
+    """Pull the .pak files out of inner archives left in an extraction folder, then delete them."""
+    inner_archives = [
+        (root, file)
+        for root, _, files in os.walk(extract_to)
+        for file in files
+        if file.lower().endswith(NESTED_ARCHIVE_EXTENSIONS)
+    ]
+    with RSSMonitor() as monitor:
+        for root, file in inner_archives:
+            path = os.path.join(root, file)
+            with open(path, "rb") as stream:
+                _extract_nested_stream(stream, file, root, monitor, memory_limit, 1)
+            os.remove(path)
+
+def detect_stream_format(stream):
+    """Like detect_archive_format, for an open seekable binary stream (position is restored)."""
+    position = stream.tell()
+    header = stream.read(8)
+    stream.seek(position)
+    for signature, archive_format in ARCHIVE_SIGNATURES:
+        if header.startswith(signature):
+            return archive_format
+    return None
+
+def detect_archive_format(path):
+    """Return "zip", "7z", "rar" or "rar5" from the file's magic bytes, or None."""
+    try:
+        with open(path, "rb") as f:
+            return detect_stream_format(f)
+    except OSError:
+        return None
+
+class ArchiveBackend(abc.ABC):
+    """An implementation that can extract the .pak files of some archive formats."""
+
+    name = ""
+    formats = ()
+    native = False
+
+    def available(self):
+        return True
+
+    @abc.abstractmethod
+    def extract_paks(self, archive_path, extract_to, memory_limit=0):
+        """Extract the mod files of an archive (and of archives nested in it) into extract_to."""
+
+class PythonArchiveBackend(ArchiveBackend):
+    """zipfile, py7zr and rarfile, running inside this process."""
+
+    name = "python"
+    formats = ("zip", "7z", "rar", "rar5")
+
+    def extract_paks(self, archive_path, extract_to, memory_limit=0):
+        if memory_limit <= 0:
+            extract_archive_files(archive_path, extract_to)
+            expand_nested_archives(extract_to)
+            return
+        try:
+            extract_archive_bounded(archive_path, extract_to, memory_limit)
             return
+        except MemoryError as e:
+            print(f"DEBUG: {e}")
+            shutil.rmtree(extract_to, ignore_errors=True)
+            over_limit = e
+
+        # A native tool decodes in its own process and spills to disk as it goes
+        archive_format = detect_archive_format(archive_path)
+        native = next(
+            (b for b in ARCHIVE_BACKENDS if b.native and archive_format in b.formats and b.available()), None
+        )
+        if native:
+            print(f"DEBUG: Handing {os.path.basename(archive_path)} to {native.name}")
+            native.extract_paks(archive_path, extract_to, memory_limit)
+        elif isinstance(over_limit, DecoderMemoryError):
+            # The decoder cannot be made smaller; decode in a throwaway process without the cap
+            print(f"DEBUG: No native tool for {os.path.basename(archive_path)}; extracting without the memory limit")
+            extract_archive_bounded(archive_path, extract_to, 0)
+        else:
+            raise over_limit
+
+class NativeArchiveBackend(ArchiveBackend):
+    """A command line tool found on PATH or in its default install folder."""
+
+    native = True
+    executables = ()
+    install_paths = ()
+
+    def __init__(self):
+        self._executable = None
+
+    def executable(self):
+        if self._executable is None:
+            found = next((shutil.which(name) for name in self.executables if shutil.which(name)), None)
+            if not found:
+                found = next((path for path in self.install_paths if os.path.isfile(path)), None)
+            self._executable = found or ""
+        return self._executable
+
+    def available(self):
+        return bool(self.executable())
+
+    @abc.abstractmethod
+    def command(self, archive_path, extract_to):
+        """Command line that extracts the mod files and inner archives of an archive into extract_to."""
+
+    def extract_paks(self, archive_path, extract_to, memory_limit=0):
+        # The tool runs in its own process, so the in-process memory ceiling does not apply
+        os.makedirs(extract_to, exist_ok=True)
+        kwargs = {"stdout": subprocess.DEVNULL, "stderr": subprocess.PIPE}
+        if IS_WINDOWS:
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        result = subprocess.run(self.command(archive_path, extract_to), **kwargs)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"{self.name} failed ({result.returncode}): {result.stderr.decode(errors='replace').strip()}"
+            )
+        # Inner archives come out whole; their paks are streamed out in-process
+        expand_nested_archives(extract_to, memory_limit)
+
+class SevenZipBackend(NativeArchiveBackend):
+    name = "7z"
+    formats = ("zip", "7z", "rar", "rar5")
+    executables = ("7z", "7zz", "7za")
+    install_paths = (
+        r"C:\Program Files\7-Zip\7z.exe",
+        r"C:\Program Files (x86)\7-Zip\7z.exe",
+    )
+
+    def command(self, archive_path, extract_to):
+        return [
+            self.executable(), "x", "-y", "-bd", f"-o{extract_to}", archive_path,
+            "*.pak", "*.utoc", "*.ucas", "*.zip", "*.7z", "*.rar", "-r",
+        ]
+
+class UnrarBackend(NativeArchiveBackend):
+    name = "unrar"
+    formats = ("rar", "rar5")
+    executables = ("unrar", "UnRAR")
+    install_paths = (
+        r"C:\Program Files\WinRAR\UnRAR.exe",
+        r"C:\Program Files (x86)\WinRAR\UnRAR.exe",
+    )
 
-        # Add all extracted .pak files to the Applied Mods list
-        for root, _, files in os.walk(extract_to):
-            for extracted_file in files:
-                if extracted_file.endswith(".pak"):
-                    extracted_path = os.path.join(root, extracted_file)
-                    self.add_pak_to_list(extracted_path)
+    def command(self, archive_path, extract_to):
+        return [
+            self.executable(), "x", "-o+", "-idq", archive_path,
+            "*.pak", "*.utoc", "*.ucas", "*.zip", "*.7z", "*.rar", extract_to + os.sep,
+        ]
+
+ARCHIVE_BACKENDS = [PythonArchiveBackend(), SevenZipBackend(), UnrarBackend()]
+
+def select_archive_backend(archive_path, archive_format, preferences=None):
+    """Pick a backend for an archive by format, size and availability.
+
+    A benchmark result for the format wins. Otherwise a native tool is used for 7z and
+    rar (LZMA2/RAR5 decode much faster natively) and for any large archive, while small
+    zips stay in-process where there is no tool start-up cost.
+    """
+    candidates = [b for b in ARCHIVE_BACKENDS if archive_format in b.formats and b.available()]
+    if not candidates:
+        raise ValueError(f"Unsupported archive format: {archive_path}")
+
+    preferred = (preferences or {}).get(archive_format)
+    for backend in candidates:
+        if backend.name == preferred:
+            return backend
+
+    native = [b for b in candidates if b.native]
+    if native and (archive_format != "zip" or os.path.getsize(archive_path) >= NATIVE_ARCHIVE_THRESHOLD):
+        return native[0]
+    return candidates[0]
+
+def extract_with_backend(archive_path, extract_to, memory_limit=0, preferences=None):
+    """Extract an archive's .pak files with the selected backend, falling back to Python."""
+    archive_format = detect_archive_format(archive_path)
+    if not archive_format:
+        raise ValueError(f"Unsupported archive format: {archive_path}")
+
+    backend = select_archive_backend(archive_path, archive_format, preferences)
+    print(f"DEBUG: Extracting {os.path.basename(archive_path)} ({archive_format}) with {backend.name}")
+    try:
+        backend.extract_paks(archive_path, extract_to, memory_limit)
+    except Exception as e:
+        if not backend.native:
+            raise
+        print(f"DEBUG: {backend.name} failed, falling back to python: {e}")
+        shutil.rmtree(extract_to, ignore_errors=True)
+        ARCHIVE_BACKENDS[0].extract_paks(archive_path, extract_to, memory_limit)
+
+def benchmark_archive_backends(sample_size=16 * 1024 * 1024):
+    """Time every available backend on generated zip and 7z samples.
+
+    Returns the fastest backend name per format plus the raw timings. rar archives
+    cannot be created here, so rar keeps the default selection.
+    """
+    work_dir = make_temp_dir()
+    try:
+        # Half random, half repetitive data, roughly like a real pak
+        payload = os.urandom(sample_size // 2) + bytes(range(256)) * (sample_size // 512)
+        source_dir = os.path.join(work_dir, "source")
+        os.makedirs(source_dir)
+        with open(os.path.join(source_dir, "sample.pak"), "wb") as f:
+            f.write(payload)
+
+        samples = {"zip": os.path.join(work_dir, "sample.zip"), "7z": os.path.join(work_dir, "sample.7z")}
+        with zipfile.ZipFile(samples["zip"], "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(os.path.join(source_dir, "sample.pak"), "sample.pak")
+        with py7zr.SevenZipFile(samples["7z"], "w") as archive:
+            archive.write(os.path.join(source_dir, "sample.pak"), "sample.pak")
+
+        fastest = {}
+        timings = {}
+        for archive_format, sample_path in samples.items():
+            for backend in ARCHIVE_BACKENDS:
+                if archive_format not in backend.formats or not backend.available():
+                    continue
+                out_dir = os.path.join(work_dir, f"out-{archive_format}-{backend.name}")
+                try:
+                    start = time.perf_counter()
+                    backend.extract_paks(sample_path, out_dir)
+                    elapsed = time.perf_counter() - start
+                except Exception as e:
+                    print(f"DEBUG: Benchmark of {backend.name} on {archive_format} failed: {e}")
+                    continue
+                timings[f"{archive_format}/{backend.name}"] = elapsed
+                if archive_format not in fastest or elapsed < timings[f"{archive_format}/{fastest[archive_format]}"]:
+                    fastest[archive_format] = backend.name
+        return fastest, timings
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+PAK_MAGIC = 0x5A6F12E1
+# (footer size, offset of the magic in it), newest layout first: v9 adds a frozen-index
+# flag, v8 has 5 (or in 4.22, 4) compression names, v7 an encryption key GUID and v4 an
+# encrypted-index flag
+PAK_FOOTER_LAYOUTS = [(222, 17), (221, 17), (189, 17), (61, 17), (45, 1), (44, 0)]
+
+def _read_fstring(stream):
+    """Read an Unreal FString (length-prefixed, ANSI or UTF-16, null terminated)."""
+    (length,) = struct.unpack("<i", stream.read(4))
+    if length == 0:
+        return ""
+    if abs(length) > 65536:
+        raise ValueError("corrupt string in pak index")
+    if length < 0:
+        return stream.read(-length * 2)[:-2].decode("utf-16-le")
+    return stream.read(length)[:-1].decode("utf-8", errors="replace")
+
+def _skip_pak_entry(stream, version, compression_u8):
+    """Step over one serialized FPakEntry of a pre-v10 index."""
+    stream.read(24)  # Offset, size, uncompressed size
+    if version < 8:
+        (compression,) = struct.unpack("<i", stream.read(4))
+    elif compression_u8:
+        (compression,) = struct.unpack("<B", stream.read(1))
+    else:
+        (compression,) = struct.unpack("<I", stream.read(4))
+    if version <= 1:
+        stream.read(8)  # Timestamp
+    stream.read(20)  # SHA-1
+    if version >= 3:
+        if compression:
+            (blocks,) = struct.unpack("<i", stream.read(4))
+            stream.read(16 * blocks)
+        stream.read(5)  # Flags, compression block size
+
+def normalize_asset_path(path):
+    """Map a pak file path to the /Game/... form the engine and modding tools use."""
+    path = path.replace("\\", "/")
+    while path.startswith("../"):
+        path = path[3:]
+    path = path.lstrip("/")
+    match = re.match(r"[^/]+/Content/", path)
+    if match:
+        return "/Game/" + path[match.end():]
+    return "/" + path
+
+def read_pak_asset_paths(pak_path):
+    """List the asset paths stored in a .pak by reading its footer and index (versions 3 to 11).
+
+    Raises ValueError for files that are not paks and for encrypted indexes, which
+    cannot be read without the key. The assets of IoStore mods live in the .utoc, which
+    is not parsed, so their .pak lists only its few loose files.
+    """
+    file_size = os.path.getsize(pak_path)
+    with open(pak_path, "rb") as f:
+        for footer_size, magic_at in PAK_FOOTER_LAYOUTS:
+            if footer_size > file_size:
+                continue
+            f.seek(file_size - footer_size)
+            footer = f.read(footer_size)
+            magic, version, index_offset, index_size = struct.unpack_from("<IiqQ", footer, magic_at)
+            if magic == PAK_MAGIC:
+                break
+        else:
+            raise ValueError("no pak footer found")
+        if magic_at and footer[magic_at - 1]:
+            raise ValueError("pak index is encrypted")
+        if not 1 <= version <= 11 or index_offset < 0 or index_offset + index_size > file_size:
+            raise ValueError(f"unsupported pak version {version}")
+
+        f.seek(index_offset)
+        index = io.BytesIO(f.read(index_size))
+        mount_point = _read_fstring(index)
+        (entry_count,) = struct.unpack("<i", index.read(4))
+
+        paths = []
+        if version < 10:
+            for _ in range(entry_count):
+                paths.append(mount_point + _read_fstring(index))
+                _skip_pak_entry(index, version, footer_size == 189)
+        else:
+            index.read(8)  # Path hash seed
+            (has_path_hash_index,) = struct.unpack("<i", index.read(4))
+            if has_path_hash_index:
+                index.read(36)
+            (has_directory_index,) = struct.unpack("<i", index.read(4))
+            if not has_directory_index:
+                raise ValueError("pak has no directory index")
+            directory_offset, directory_size = struct.unpack("<qq", index.read(16))
+            if directory_offset < 0 or directory_offset + directory_size > file_size:
+                raise ValueError("corrupt directory index offset")
+            f.seek(directory_offset)
+            directory = io.BytesIO(f.read(directory_size))
+            (directory_count,) = struct.unpack("<i", directory.read(4))
+            for _ in range(directory_count):
+                directory_name = _read_fstring(directory)
+                (file_count,) = struct.unpack("<i", directory.read(4))
+                for _ in range(file_count):
+                    file_name = _read_fstring(directory)
+                    directory.read(4)  # Encoded entry offset
+                    paths.append(mount_point + directory_name.lstrip("/") + file_name)
+    return sorted({normalize_asset_path(path) for path in paths})
+
+_asset_index = None
+_asset_index_lock = threading.Lock()
+
+def shared_asset_index():
+    """The one AssetIndex every caller uses, loaded from disk on first use."""
+    global _asset_index
+    with _asset_index_lock:
+        if _asset_index is None:
+            _asset_index = AssetIndex()
+        return _asset_index
+
+def reset_asset_index():
+    """Drop the loaded AssetIndex so the next use reloads it from disk."""
+    global _asset_index
+    with _asset_index_lock:
+        _asset_index = None
+
+class AssetIndex:
+    """Which paks, anywhere the manager keeps them, contain a given asset path.
+
+    Asset lists are parsed once per content hash and kept in the pak index. This index
+    persists the stat and hash of every pak location and the postings from asset path
+    to content hashes, so a refresh only reads paks that are new or changed. Queries
+    are a bisect over the sorted asset paths.
+    """
+
+    def __init__(self, path=ASSET_INDEX_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.locations = {}  # pak path -> [size, mtime_ns, hash]
+        self.postings = {}  # asset path -> [hashes]
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            self.locations = data.get("locations", {})
+            self.postings = data.get("postings", {})
+        except (OSError, ValueError):
+            pass
+        # (lowercased, original) pairs so prefix queries ignore case like the engine does
+        self.sorted_assets = sorted((asset.lower(), asset) for asset in self.postings)
+
+    def save(self):
+        with self.lock:
+            data = {"locations": dict(self.locations), "postings": {k: list(v) for k, v in self.postings.items()}}
+        try:
+            write_json_atomic(self.path, data)
+        except Exception as e:
+            print(f"ERROR: Failed to save asset index: {e}")
+
+    def _add(self, digest, assets):
+        for asset in assets:
+            hashes = self.postings.get(asset)
+            if hashes is None:
+                hashes = self.postings[asset] = []
+                bisect.insort(self.sorted_assets, (asset.lower(), asset))
+            if digest not in hashes:
+                hashes.append(digest)
+
+    def _drop(self, path, pak_index):
+        digest = self.locations.pop(path)[2]
+        if any(location[2] == digest for location in self.locations.values()):
+            return  # Another copy still holds the same content
+        for asset in pak_index.get(digest, {}).get("assets", []):
+            hashes = self.postings.get(asset, [])
+            if digest in hashes:
+                hashes.remove(digest)
+            if not hashes and asset in self.postings:
+                del self.postings[asset]
+                position = bisect.bisect_left(self.sorted_assets, (asset.lower(), asset))
+                if position < len(self.sorted_assets) and self.sorted_assets[position][1] == asset:
+                    del self.sorted_assets[position]
+
+    def refresh(self, folders, progress=None):
+        """Bring the index up to date with the paks currently below the given folders."""
+        found = {}
+        for folder in folders:
+            for path in find_paks(folder):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (stat.st_size, stat.st_mtime_ns)
+        changed = [
+            path for path, (size, mtime) in found.items()
+            if self.locations.get(path, [None, None])[:2] != [size, mtime]
+        ]
+        removed = [path for path in self.locations if path not in found]
+        if not changed and not removed:
+            return False
+
+        hashes = hash_files_parallel(changed, progress=progress)
+        pak_index = load_pak_index()
+        parsed = {}
+        for path in changed:
+            digest = hashes.get(path)
+            entry = pak_index.get(digest or "", {})
+            if digest and digest not in parsed and "assets" not in entry and "assets_error" not in entry:
+                try:
+                    parsed[digest] = {"assets": read_pak_asset_paths(path)}
+                except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+                    print(f"DEBUG: No asset list for {os.path.basename(path)}: {e}")
+                    parsed[digest] = {"assets_error": str(e)}
+        if parsed:
+            # Merge into a fresh read so concurrent pak index writers are not overwritten
+            pak_index = update_pak_index(parsed)
+
+        with self.lock:
+            for path in removed + [path for path in changed if path in self.locations]:
+                self._drop(path, pak_index)
+            for path in changed:
+                digest = hashes.get(path)
+                if digest:
+                    self.locations[path] = [found[path][0], found[path][1], digest]
+                    self._add(digest, pak_index.get(digest, {}).get("assets", []))
+        self.save()
+        print(f"DEBUG: Asset index updated: {len(changed)} changed, {len(removed)} removed paks")
+        return True
+
+    def query(self, prefix, limit=1000):
+        """Return [(asset path, [pak paths])] for assets starting with prefix (case-insensitive)."""
+        prefix = prefix.strip().replace("\\", "/").lower()
+        with self.lock:
+            holders = {}
+            for path, (_, _, digest) in self.locations.items():
+                holders.setdefault(digest, []).append(path)
+            results = []
+            position = bisect.bisect_left(self.sorted_assets, (prefix,))
+            while position < len(self.sorted_assets) and len(results) < limit:
+                lowered, asset = self.sorted_assets[position]
+                if not lowered.startswith(prefix):
+                    break
+                paths = sorted(path for digest in self.postings[asset] for path in holders.get(digest, []))
+                if paths:
+                    results.append((asset, paths))
+                position += 1
+        return results
+
+class ExtractionCache:
+    """Extracted archives under the app data folder, keyed by archive hash, with LRU eviction."""
+
+    def __init__(self, folder=EXTRACT_CACHE_FOLDER, max_bytes=4096 * 1024 * 1024):
+        self.folder = folder
+        self.index_path = os.path.join(folder, "index.json")
+        self.max_bytes = max_bytes
+        self.pinned = set()  # Keys in use by this session are never evicted
+        self.lock = threading.RLock()  # The inbox pipeline extracts from its own thread
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with open(self.index_path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        try:
+            write_json_atomic(self.index_path, self.entries)
+        except Exception as e:
+            print(f"ERROR: Failed to save extraction cache index: {e}")
+
+    def get(self, archive_path, extract_func=extract_archive_files):
+        """Return the folder holding the archive's contents, extracting it on a cache miss."""
+        with self.lock:
+            return self._get(archive_path, extract_func)
+
+    def _get(self, archive_path, extract_func):
+        key = cached_hash(archive_path)
+        save_hash_cache()
+        cached_path = os.path.join(self.folder, key)
+        self.pinned.add(key)
+
+        if key in self.entries and os.path.isdir(cached_path):
+            self.entries[key]["last_used"] = time.time()
+            self.save()
+            print(f"DEBUG: Extraction cache hit -> {os.path.basename(archive_path)}")
+            return cached_path
+
+        # Extract under a per-process name and rename, so a crash never leaves a half entry
+        partial_path = os.path.join(self.folder, f"{key}.partial-{os.getpid()}")
+        shutil.rmtree(partial_path, ignore_errors=True)
+        try:
+            extract_func(archive_path, partial_path)
+        except Exception:
+            shutil.rmtree(partial_path, ignore_errors=True)
+            raise
+        shutil.rmtree(cached_path, ignore_errors=True)
+        os.replace(partial_path, cached_path)
+
+        self.entries[key] = {
+            "source": os.path.basename(archive_path),
+            "size": folder_size(cached_path),
+            "last_used": time.time(),
+        }
+        self.evict()
+        self.save()
+        return cached_path
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits its size cap."""
+        total = sum(entry.get("size", 0) for entry in self.entries.values())
+        for key in sorted(self.entries, key=lambda k: self.entries[k].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if key in self.pinned:
+                continue
+            shutil.rmtree(os.path.join(self.folder, key), ignore_errors=True)
+            total -= self.entries.pop(key).get("size", 0)
+            print(f"DEBUG: Evicted extraction cache entry -> {key}")
+
+    def sweep(self):
+        """Reclaim partial extractions from crashed sessions and folders missing from the index."""
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if not os.path.isdir(path):
+                continue
+            if ".partial-" in name:
+                owner = name.rsplit("-", 1)[1]
+                if owner.isdigit() and pid_alive(int(owner)):
+                    continue
+            elif name in self.entries:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"DEBUG: Removed orphaned extraction folder -> {name}")
+
+        # Forget entries whose folder disappeared
+        for key in [k for k in self.entries if not os.path.isdir(os.path.join(self.folder, k))]:
+            del self.entries[key]
+        self.evict()
+        self.save()
+
+class GarbageCollector:
+    """Mark-and-sweep over the app data folder, a few files at a time.
+
+    The profiles that exist are the roots. Marking collects the content hashes their
+    snapshots refer to; everything the sweep then finds outside that set is garbage:
+    stored content no snapshot refers to, snapshots and backups of deleted profiles,
+    scratch folders of dead sessions, extraction-cache folders missing from its index,
+    and hash-cache and pak-index entries for files that are gone. With delete=False it
+    only reports. step() does a bounded slice of work so a caller can interleave it with
+    other work and stop it at any point.
+    """
+
+    def __init__(self, extraction_cache=None, delete=False):
+        self.extraction_cache = extraction_cache
+        self.delete = delete
+        self.found = []  # (category, path or index key, reclaimable bytes)
+        self.reclaimed = 0
+        self.done = False
+        self._work = self._run()
+
+    def step(self, budget=0.05):
+        """Work for up to budget seconds; returns False once the collection has finished."""
+        deadline = time.monotonic() + budget
+        while time.monotonic() < deadline:
+            try:
+                next(self._work)
+            except StopIteration:
+                self.done = True
+                return False
+        return True
+
+    def summary(self):
+        """{category: [items, bytes]} of what was found (and, with delete=True, removed)."""
+        totals = {}
+        for category, _, size in self.found:
+            entry = totals.setdefault(category, [0, 0])
+            entry[0] += 1
+            entry[1] += size
+        return totals
+
+    def _sweep(self, category, path, size, remove):
+        self.found.append((category, path, size))
+        if not self.delete:
+            return
+        try:
+            remove()
+            self.reclaimed += size
+            print(f"DEBUG: GC removed {path}")
+        except OSError as e:
+            print(f"ERROR: GC failed to remove {path}: {e}")
+
+    @staticmethod
+    def _list_profiles():
+        if not os.path.isdir(PROFILES_FOLDER):
+            return set()
+        return {name for name in os.listdir(PROFILES_FOLDER) if os.path.isdir(os.path.join(PROFILES_FOLDER, name))}
+
+    def _mark(self, profiles):
+        reachable = set()
+        for profile in profiles:
+            for _, snapshot in list_snapshots(profile):
+                reachable.update(record["hash"] for record in snapshot.get("files", {}).values())
+        return reachable
+
+    def _run(self):
+        with _snapshot_lock:
+            profiles = self._list_profiles()
+            generation = _snapshot_generation
+            reachable = self._mark(profiles)
+        yield
+
+        # Content store; a snapshot written meanwhile means marking again before deciding
+        for prefix in sorted(os.listdir(CONTENT_STORE_FOLDER)) if os.path.isdir(CONTENT_STORE_FOLDER) else []:
+            prefix_path = os.path.join(CONTENT_STORE_FOLDER, prefix)
+            for name in os.listdir(prefix_path):
+                path = os.path.join(prefix_path, name)
+                with _snapshot_lock:
+                    if generation != _snapshot_generation:
+                        # The snapshot may belong to a profile created since the last listing
+                        profiles = self._list_profiles()
+                        generation = _snapshot_generation
+                        reachable = self._mark(profiles)
+                    if name in reachable:
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    # Content still hard linked from a profile frees nothing when unlinked here
+                    self._sweep("Unreferenced stored files", path, stat.st_size if stat.st_nlink == 1 else 0, lambda: os.remove(path))
+                yield
+            if self.delete and not os.listdir(prefix_path):
+                os.rmdir(prefix_path)
+
+        # Snapshots and backups of profiles that were deleted
+        for category, folder in (
+            ("Snapshots of deleted profiles", SNAPSHOTS_FOLDER),
+            ("Backups of deleted profiles", os.path.join(BACKUP_FOLDER, "Profiles")),
+        ):
+            for name in os.listdir(folder) if os.path.isdir(folder) else []:
+                path = os.path.join(folder, name)
+                if name in profiles or not os.path.isdir(path):
+                    continue
+                # Checked again right before deleting: the profile may have been created (or
+                # restored) since the listing, and no snapshot is written for it meanwhile
+                with _snapshot_lock:
+                    if os.path.isdir(os.path.join(PROFILES_FOLDER, name)):
+                        continue
+                    self._sweep(category, path, folder_size(path), lambda: shutil.rmtree(path))
+                yield
+
+        # Scratch folders of sessions that are no longer running
+        for name in os.listdir(TEMP_FOLDER) if os.path.isdir(TEMP_FOLDER) else []:
+            owner = name.split("-", 1)[0]
+            if owner.isdigit() and pid_alive(int(owner)):
+                continue
+            path = os.path.join(TEMP_FOLDER, name)
+            self._sweep("Leftover temp folders", path, folder_size(path), lambda: shutil.rmtree(path))
+            yield
+
+        # Extraction-cache folders its index does not know about
+        cache = self.extraction_cache
+        if cache is not None:
+            with cache.lock:
+                names = os.listdir(cache.folder)
+            for name in names:
+                path = os.path.join(cache.folder, name)
+                with cache.lock:
+                    if not os.path.isdir(path) or name in cache.entries:
+                        continue
+                    if ".partial-" in name:
+                        owner = name.rsplit("-", 1)[1]
+                        if owner.isdigit() and pid_alive(int(owner)):
+                            continue
+                    self._sweep("Orphaned extraction folders", path, folder_size(path), lambda: shutil.rmtree(path))
+                yield
+
+        # Index entries: hashes of files that are gone, pak metadata no file or snapshot has.
+        # The caches are shared with other threads, so they are only touched under their locks.
+        with _hash_cache_lock:
+            keys = list(load_hash_cache())
+        for key in keys:
+            if not os.path.exists(key):
+                with _hash_cache_lock:
+                    hash_cache = load_hash_cache()
+                    if key in hash_cache and not os.path.exists(key):
+                        self._sweep("Stale index entries", key, len(json.dumps(hash_cache[key])), lambda: hash_cache.pop(key, None))
+            yield
+        # The asset index still needs the asset lists of every pak location it holds
+        asset_index = shared_asset_index()
+        with asset_index.lock:
+            indexed = {location[2] for location in asset_index.locations.values()}
+        with _hash_cache_lock:
+            live_hashes = {entry[2] for entry in load_hash_cache().values()} | reachable | indexed
+        with _pak_index_lock:
+            pak_index = load_pak_index()
+            stale = [digest for digest in pak_index if digest not in live_hashes]
+            for digest in stale:
+                self._sweep("Stale index entries", digest, len(json.dumps(pak_index[digest])), lambda: pak_index.pop(digest, None))
+            if self.delete and stale:
+                save_pak_index(pak_index)
+        if self.delete:
+            save_hash_cache()
+            if stale:
+                reset_asset_index()  # Reloaded against the swept pak index on its next use
+
+class InboxPipeline:
+    """Watches an inbox folder and feeds new downloads through overlapping ingest stages.
+
+    A stability stage waits until a file has stopped changing, a hash stage drops
+    content the inbox has already taken in or the library already holds (an archive in
+    the extraction cache, a pak hashed somewhere outside the inbox), and an extract
+    stage pulls the paks out of archives through the extraction cache and hands them to
+    deliver(paths). The stages run on their own threads joined by queues, so file N+1
+    is hashed while file N is still extracting.
+    """
+
+    STABLE_SECONDS = 2.0
+    POLL_INTERVAL = 0.5
+    # Browsers and download managers write under these names and rename when done
+    PARTIAL_SUFFIXES = (".part", ".crdownload", ".download", ".opdownload", ".tmp", ".partial")
+
+    def __init__(self, folder, extract, deliver, extraction_cache=None):
+        self.folder = folder
+        self.extract = extract  # archive path -> folder with its contents
+        self.deliver = deliver  # called with the pak paths of one download
+        self.extraction_cache = extraction_cache
+        self._stop = threading.Event()
+        self._pending = {}  # path -> (size, mtime_ns, unchanged since)
+        self._lock = threading.Lock()
+        self._hash_queue = queue.Queue()
+        self._extract_queue = queue.Queue()
+        try:
+            with open(INBOX_STATE_FILE, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        self.seen = state.get("seen", {})  # path -> [size, mtime_ns] already handled
+        self.taken = set(state.get("hashes", []))  # content hashes already taken in
+        self.watcher = DirectoryWatcher(folder, self._scan)
+
+    def start(self):
+        for target in (self._stability_loop, self._hash_loop, self._extract_loop):
+            threading.Thread(target=self._governed, args=(target,), daemon=True).start()
+        self.watcher.start()
+        self._scan()  # Files that arrived while the manager was closed
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.watcher.stop()
+        self._hash_queue.put(None)
+        self._extract_queue.put(None)
+
+    @staticmethod
+    def _governed(target):
+        # Downloads arriving mid-match are hashed and extracted at the governor's pace
+        with IO_GOVERNOR.governed():
+            target()
+
+    def _save_state(self):
+        with self._lock:
+            state = {"seen": dict(self.seen), "hashes": sorted(self.taken)}
+        try:
+            write_json_atomic(INBOX_STATE_FILE, state)
+        except Exception as e:
+            print(f"ERROR: Failed to save inbox state: {e}")
+
+    def _mark_seen(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            self.seen[path] = [stat.st_size, stat.st_mtime_ns]
+
+    def _scan(self):
+        try:
+            entries = [entry for entry in os.scandir(self.folder) if entry.is_file()]
+        except OSError:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for entry in entries:
+                if entry.name.lower().endswith(self.PARTIAL_SUFFIXES) or entry.name.lower().endswith((".utoc", ".ucas")):
+                    continue  # Unfinished downloads; IoStore containers travel with their .pak
+                stat = entry.stat()
+                if self.seen.get(entry.path) == [stat.st_size, stat.st_mtime_ns] or entry.path in self._pending:
+                    continue
+                self._pending[entry.path] = (stat.st_size, stat.st_mtime_ns, now)
+
+    def _stability_loop(self):
+        while not self._stop.wait(self.POLL_INTERVAL):
+            now = time.monotonic()
+            ready = []
+            with self._lock:
+                for path, (size, mtime, since) in list(self._pending.items()):
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        del self._pending[path]  # Renamed or deleted before it settled
+                        continue
+                    if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                        self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+                    elif now - since >= self.STABLE_SECONDS:
+                        ready.append(path)
+            for path in ready:
+                try:
+                    # Windows keeps a file locked while the writer still has it open
+                    with open(path, "rb"):
+                        pass
+                except OSError:
+                    continue
+                with self._lock:
+                    self._pending.pop(path, None)
+                self._hash_queue.put(path)
+
+    def _in_library(self, digest, kind):
+        """True when the library already holds this content, so taking it in again adds nothing."""
+        cache = self.extraction_cache
+        if kind == "archive":
+            # Read without cache.lock, which is held for the whole of an extraction
+            return cache is not None and digest in cache.entries and os.path.isdir(os.path.join(cache.folder, digest))
+        inbox = os.path.join(os.path.normcase(os.path.abspath(self.folder)), "")
+        with _hash_cache_lock:
+            holders = [key for key, entry in load_hash_cache().items() if entry[2] == digest and not key.startswith(inbox)]
+        # A cached hash only counts while that file is still there, unchanged
+        return any(lookup_cached_hash(key) == digest for key in holders)
+
+    def _hash_loop(self):
+        while True:
+            path = self._hash_queue.get()
+            if path is None:
+                return
+            try:
+                if path.lower().endswith(".pak"):
+                    kind = "pak"
+                elif detect_archive_format(path):
+                    kind = "archive"
+                else:
+                    self._mark_seen(path)  # Not a mod
+                    continue
+                digest = cached_hash(path)
+                save_hash_cache()
+                if digest in self.taken or self._in_library(digest, kind):
+                    print(f"DEBUG: Inbox: {os.path.basename(path)} is already in the library.")
+                    with self._lock:
+                        self.taken.add(digest)
+                    self._mark_seen(path)
+                    self._save_state()
+                    continue
+                self._extract_queue.put((path, digest, kind))
+            except Exception as e:
+                print(f"ERROR: Inbox failed to hash {path}: {e}")
+
+    def _extract_loop(self):
+        while True:
+            item = self._extract_queue.get()
+            if item is None:
+                return
+            path, digest, kind = item
+            try:
+                paks = [path] if kind == "pak" else find_paks(self.extract(path))
+                print(f"DEBUG: Inbox: {os.path.basename(path)} -> {len(paks)} pak(s)")
+                if paks:
+                    self.deliver(paks)
+                with self._lock:
+                    self.taken.add(digest)
+            except Exception as e:
+                print(f"ERROR: Inbox failed to extract {path}: {e}")
+            self._mark_seen(path)
+            self._save_state()
+
+def extract_archive(self, archive_path, extract_to):
+    """Extract an archive and add .pak files to the Applied Mods list."""
+    try:
+        extract_archive_files(archive_path, extract_to)
+
+        # Add all extracted .pak files to the Applied Mods list in one batch
+        self.ingest_paks(find_paks(extract_to))
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
     except Exception as e:
         messagebox.showerror("Error", f"Failed to extract archive '{os.path.basename(archive_path)}': {e}")
         
        
+class Observable:
+    """A value that calls its subscribers with (new, old) whenever it changes; set it on the Tk thread."""
+
+    def __init__(self, value=None):
+        self._value = value
+        self._subscribers = []
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        if value == self._value:
+            return
+        old, self._value = self._value, value
+        for callback in list(self._subscribers):
+            callback(value, old)
+
+    def subscribe(self, callback):
+        """Call callback now with the current value and on every change; returns an unsubscribe function."""
+        self._subscribers.append(callback)
+        callback(self._value, None)
+        return lambda: callback in self._subscribers and self._subscribers.remove(callback)
+
+class AppState:
+    """What the main window shows; widgets subscribe to the pieces they display."""
+
+    def __init__(self):
+        self.game_folder = Observable()
+        self.active_profile = Observable()
+        self.dark_theme = Observable(False)
+        self.mods = Observable(())  # Mod groups in the Mods folder, by .pak name, sorted
+        self.favorites = Observable(())  # Profiles on the hotbar, in order
+
+# Colors per theme: "list" for listboxes, "frame" for panels, "window" for the window background
+THEME_COLORS = {
+    True: {"bg": "#191918", "fg": "white", "border": "#555", "select": "#555", "window": "#191918", "button": "#555", "ttk": "clam"},
+    False: {
+        "bg": "white", "fg": "black", "border": SYSTEM_FACE_COLOR, "select": SYSTEM_HIGHLIGHT_COLOR,
+        "window": SYSTEM_FACE_COLOR, "button": "white", "ttk": "default",
+    },
+}
+
+def style_widget(widget, role, dark_theme):
+    colors = THEME_COLORS[bool(dark_theme)]
+    if role == "list":
+        widget.config(
+            bg=colors["bg"], fg=colors["fg"], highlightbackground=colors["border"],
+            selectbackground=colors["select"], selectforeground=colors["fg"],
+        )
+    elif role == "window":
+        widget.config(bg=colors["window"])
+    else:
+        widget.config(bg=colors["bg"])
+
+def sync_listbox(listbox, items):
+    """Make a listbox show the sorted items by deleting and inserting only the rows that differ."""
+    wanted = set(items)
+    for index in reversed(range(listbox.size())):
+        if listbox.get(index) not in wanted:
+            listbox.delete(index)
+    # What is left is a sorted subset of items, so each missing item goes in at its final index
+    present = set(listbox.get(0, tk.END))
+    for index, item in enumerate(items):
+        if item not in present:
+            listbox.insert(index, item)
+
 class SettingsWindow(tk.Toplevel):
     def __init__(self, parent, app):
         super().__init__(parent)
@@ -126,22 +3730,48 @@ class SettingsWindow(tk.Toplevel):
         tk.Button(self, text="Change Game Directory", command=self.app.show_folder_selector).pack()
         
 class ModManagerApp:
+    # Backed by self.state, so assigning one updates just the widgets bound to it
+    selected_folder = property(lambda self: self.state.game_folder.get(), lambda self, value: self.state.game_folder.set(value))
+    current_profile = property(lambda self: self.state.active_profile.get(), lambda self, value: self.state.active_profile.set(value))
+    dark_theme = property(lambda self: self.state.dark_theme.get(), lambda self, value: self.state.dark_theme.set(bool(value)))
+
     def __init__(self, root):
         self.root = root
         self.root.title("Marvel Rivals Mod Manager")
         
         # Initialize application state
+        self.state = AppState()
+        self.themed_widgets = []  # (widget, role) pairs restyled on a theme change
+        self.main_frame = None  # Built once by the first show_mod_manager
+        self.folder_frame = None
         self.active_profile = {}
         self.temp_dirs = []  # Temporary directories for extracted mods
+        self.replay_pending = False  # Profile changes wait while earlier sessions' journals are finished
+        self.settings = load_settings()
+        self.state.favorites.set(tuple(self.settings["favorite_profiles"]))
+
+        # Reclaim scratch space from crashed sessions and open the extraction cache
+        sweep_orphaned_temp_dirs()
+        self.extraction_cache = ExtractionCache(
+            max_bytes=self.settings["extract_cache_limit_mb"] * 1024 * 1024
+        )
+        self.extraction_cache.sweep()
+
+        # Background disk work yields to the game while it is running
+        IO_GOVERNOR.limit = self.settings["game_io_limit_mb_s"] * 1024 * 1024
+        IO_GOVERNOR.start()
+
+        # Central scheduler for refresh, sync, apply and verify work
+        self.scheduler = JobScheduler(self.root, on_status=self.show_job_status)
 
         # Configuration and UI setup
         self.selected_folder, self.dark_theme, self.current_profile = load_config()
-        self.show_mod_manager()
-        self.apply_theme()
-        self.update_active_profile_label()
+        self.request_startup_replay()
+        self.start_mods_watcher()
+        self.start_inbox()
         
-        # Sync all profiles before showing the UI
-        self.sync_profiles()       
+        # Sync all profiles in the background (coalesces with the refresh's sync)
+        self.request_profile_sync()
 
         # Register the exit handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit)        
@@ -159,13 +3789,8 @@ class ModManagerApp:
         self.root.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
         self.root.resizable(False, False)
 
-        # Load configuration
-        self.selected_folder, self.dark_theme, self.current_profile = load_config()
-
         # Ensure the current profile exists or create a default profile
-        profiles_folder = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-        )
+        profiles_folder = PROFILES_FOLDER
         if not os.path.exists(profiles_folder) or not os.listdir(profiles_folder):
             # No profiles exist, reset current_profile and create default profile
             self.current_profile = None
@@ -173,28 +3798,73 @@ class ModManagerApp:
             self.ensure_default_profile()  # Create and load the Default profile
             
         # Set application icon
-        icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-        if os.path.exists(icon_path):
-            self.root.iconbitmap(icon_path)
+        set_window_icon(self.root)
 
-        # Show the appropriate initial UI
-        if self.selected_folder and verify_game_folder(self.selected_folder):
+        # The theme and the current view follow the state from here on
+        self.state.dark_theme.subscribe(self.apply_theme)
+        self.state.game_folder.subscribe(self.show_current_view)
+
+    def show_current_view(self, folder, old_folder=None):
+        """Show the mod manager for a valid game folder, otherwise the folder selector."""
+        if folder and verify_game_folder(folder):
             self.show_mod_manager()
         else:
             self.show_folder_selector()
-            
+
+    def request_startup_replay(self):
+        """Repair cut-off copies and finish journals of earlier sessions as the first background job.
+
+        The window opens straight away; changes to profiles wait (see lock_profiles) until
+        the job is done, and background profile work queues up behind it on the worker.
+        """
+        self.replay_pending = True
+
+        def run(job):
+            try:
+                job.report("Repairing interrupted updates")
+                self.recover_interrupted_updates()
+                # A failed journal waits for the next launch
+                for message, replay in (
+                    ("Finishing the last session's changes", replay_sync_journals),
+                    ("Finishing an interrupted bulk edit", replay_bulk_journal),
+                ):
+                    job.report(message)
+                    try:
+                        replay()
+                    except Exception as e:
+                        print(f"ERROR: Pending journal could not be finished: {e}")
+            finally:
+                self.root.after(0, finish)
+
+        def finish():
+            self.replay_pending = False
+            if self.main_frame is not None:
+                self.request_refresh()
+
+        self.scheduler.submit(
+            "startup_replay", run, PRIORITY_USER, background=True, description="Finishing the last session's changes"
+        )
+
+    def recover_interrupted_updates(self):
+        """Repair paks left half-patched by a delta update or half-renamed group copy that was cut off."""
+        profiles_folder = PROFILES_FOLDER
+        folders = []
+        if self.selected_folder:
+            folders.append(os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods"))
+        if self.current_profile:
+            folders.append(os.path.join(profiles_folder, self.current_profile))
+        for folder in folders:
+            recover_group_updates(folder)
+            recover_delta_updates(folder)
+
     def ensure_default_profile(self):
         """Ensure a default profile is created only if no profiles exist and none is active."""
-        profiles_folder = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-        )
+        profiles_folder = PROFILES_FOLDER
         default_profile_name = "Default"
         default_profile_path = os.path.join(profiles_folder, default_profile_name)
 
         # Check if profiles exist
-        profiles_exist = os.path.exists(profiles_folder) and any(
-            os.path.isdir(os.path.join(profiles_folder, d)) for d in os.listdir(profiles_folder)
-        )
+        profiles_exist = bool(load_profile_catalog())
 
         # If profiles exist and current_profile is set, do nothing
         if profiles_exist and self.current_profile:
@@ -206,10 +3876,10 @@ class ModManagerApp:
 
         # Create default profile if no other profiles exist
         if not profiles_exist:
-            os.makedirs(default_profile_path)
+            os.makedirs(default_profile_path, exist_ok=True)
+            update_profile_catalog(default_profile_name, used=True)
             self.current_profile = default_profile_name
             self.save_config()  # Update the config to set the default profile
-            self.update_active_profile_label()
             messagebox.showinfo("Info", "A default profile has been created and loaded.")
         else:
             print("DEBUG: Profiles exist but no active profile. Setting default profile.")
@@ -217,7 +3887,6 @@ class ModManagerApp:
             if not self.current_profile:
                 self.current_profile = default_profile_name
                 self.save_config()
-                self.update_active_profile_label()
 
         
     def _create_popup(self, title, size="300x150", resizable=False, icon_path=None):
@@ -239,7 +3908,7 @@ class ModManagerApp:
         if not resizable:
             popup.resizable(False, False)
         if icon_path and os.path.exists(icon_path):
-            popup.iconbitmap(icon_path)
+            set_window_icon(popup)
         return popup
 
         
@@ -250,72 +3919,294 @@ class ModManagerApp:
         
         # Allow selection of multiple files
         file_paths = filedialog.askopenfilenames(
-            filetypes=[("Supported Mod Files", "*.pak *.zip *.7z *.rar")]  # Unified filter for supported files
+            filetypes=[
+                ("Supported Mod Files", "*.pak *.utoc *.ucas *.zip *.7z *.rar"),  # Unified filter for supported files
+                ("All Files", "*.*"),  # Archives are recognised by content, whatever the extension
+            ]
         )
         if not file_paths:
             return  # User canceled the dialog
 
-        for file_path in file_paths:
-            mod_name = os.path.basename(file_path)
+        self.add_mod_files(file_paths)
+
+    def add_mod_files(self, file_paths):
+        """Add .pak files and archives (from the dialog or another launch) as one batch."""
+        if not self.current_profile:
+            self.ensure_default_profile()
 
-            # Handle .pak files directly
-            if file_path.endswith(".pak"):
-                self.add_pak_to_list(file_path)
+        pak_sources = []  # Collected from every selected file, ingested once at the end
+        archives = []
+        for file_path in file_paths:
+            # Handle mod files directly; picking a .utoc/.ucas adds the whole group through its .pak
+            if is_mod_file(file_path):
+                pak_path = group_pak_path(file_path)
+                if pak_path and pak_path not in pak_sources:
+                    pak_sources.append(pak_path)
+                elif not pak_path:
+                    messagebox.showerror("Error", f"'{os.path.basename(file_path)}' has no matching .pak file.")
                 continue
 
             # Handle archive files
-            if file_path.endswith((".zip", ".7z", ".rar")):
+            if detect_archive_format(file_path):
+                archives.append(file_path)
+
+        if not archives:
+            self.ingest_paks(pak_sources)
+            return
+
+        extractor = self.archive_extractor()
+
+        def run(job):
+            # Hashing multi-GB packs for the cache key and extracting them stay off the Tk thread
+            errors = []
+            for index, archive_path in enumerate(archives):
+                job.report(f"Extracting {os.path.basename(archive_path)}", index / len(archives))
                 try:
-                    # Create a temporary directory for the archive
-                    temp_dir = tempfile.mkdtemp()
-                    self.temp_dirs.append(temp_dir)  # Store temp directory for cleanup later
-
-                    if file_path.endswith(".zip"):
-                        with zipfile.ZipFile(file_path, "r") as archive:
-                            archive.extractall(temp_dir)
-                    elif file_path.endswith(".7z"):
-                        with py7zr.SevenZipFile(file_path, "r") as archive:
-                            archive.extractall(temp_dir)
-                    elif file_path.endswith(".rar"):
-                        with rarfile.RarFile(file_path, "r") as archive:
-                            archive.extractall(temp_dir)
-
-                    # Add all .pak files in the extracted temp directory to the Applied Mods list
-                    for root, _, files in os.walk(temp_dir):
-                        for extracted_file in files:
-                            if extracted_file.endswith(".pak"):
-                                extracted_path = os.path.join(root, extracted_file)
-                                self.add_pak_to_list(extracted_path)
+                    # Extract into the persistent cache (a repeat add is a cache hit)
+                    extracted_dir = self.extraction_cache.get(archive_path, extractor)
 
+                    # Collect all .pak files in the extracted folder
+                    pak_sources.extend(find_paks(extracted_dir))
+                except JobCancelled:
+                    raise
                 except Exception as e:
-                    messagebox.showerror("Error", f"Failed to extract archive: {e}")
+                    errors.append(f"{os.path.basename(archive_path)}: {e}")
+            self.root.after(0, lambda: finish(errors))
+
+        def finish(errors):
+            if errors:
+                messagebox.showerror("Error", "Failed to extract archive:\n" + "\n".join(errors))
+            self.ingest_paks(pak_sources)
+
+        self.scheduler.submit(
+            f"add_archives:{time.monotonic_ns()}", run, PRIORITY_USER, background=True, description="Extracting archives"
+        )
+
+    def archive_extractor(self):
+        """Return the extraction function for the configured memory ceiling and backend choices."""
+        return functools.partial(
+            extract_with_backend,
+            memory_limit=self.settings.get("extract_memory_limit_mb", 0) * 1024 * 1024,
+            preferences=self.settings.get("archive_backends"),
+        )
+
+    def run_archive_benchmark(self):
+        """Measure the archive backends on this machine in the background and remember the fastest per format."""
+        def run(job):
+            try:
+                fastest, timings = benchmark_archive_backends()
+            except Exception as e:
+                error = e
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Benchmark failed: {error}"))
+                raise
+            self.root.after(0, lambda: self.finish_archive_benchmark(fastest, timings))
+
+        self.scheduler.submit(
+            "archive_benchmark", run, PRIORITY_BACKGROUND, background=True, description="Benchmarking archive tools"
+        )
+
+    def finish_archive_benchmark(self, fastest, timings):
+        self.settings["archive_backends"] = fastest
+        self.save_config()
+
+        lines = [f"{name}: {elapsed * 1000:.0f} ms" for name, elapsed in sorted(timings.items())]
+        lines += [f"Using {name} for {archive_format}" for archive_format, name in sorted(fastest.items())]
+        messagebox.showinfo("Benchmark", "\n".join(lines))
+
+    def show_storage_report(self):
+        """Show disk use per profile, backup, cache and temp folder, and the largest mod files."""
+        mods_folder = stage_root = None
+        if self.selected_folder:
+            mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
+            stage_root = stage_path(self.selected_folder)
+        try:
+            report = storage_report(mods_folder, self.extraction_cache, stage_root=stage_root)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to build the storage report: {e}")
+            return
+
+        popup = tk.Toplevel(self.root)
+        popup.title("Storage Report")
+        popup.geometry("640x560")
+        set_window_icon(popup)
+        self.root.after(10, lambda: self.center_popup(popup))
+
+        total = sum(row[2] for row in report["locations"]) + sum(size for _, size in report["other"])
+        tk.Label(popup, text=f"Total: {format_size(total)}", font=("Arial", 12, "bold")).pack(pady=(10, 5))
+
+        usage_table = ttk.Treeview(popup, columns=("files", "size", "unique", "shared"), height=10)
+        for column, heading, width in (
+            ("#0", "Location", 240), ("files", "Files", 60), ("size", "Size", 100), ("unique", "Unique", 100), ("shared", "Shared", 100),
+        ):
+            usage_table.heading(column, text=heading)
+            usage_table.column(column, width=width)
+        usage_table.pack(fill=tk.BOTH, expand=True, padx=10)
+        for label, files, size, unique in sorted(report["locations"], key=lambda row: row[2], reverse=True):
+            usage_table.insert("", tk.END, text=label, values=(files, format_size(size), format_size(unique), format_size(size - unique)))
+        for label, size in report["other"]:
+            usage_table.insert("", tk.END, text=label, values=("", format_size(size), "", ""))
+
+        tk.Label(popup, text="Largest mod files:").pack(pady=(10, 5))
+        largest_table = ttk.Treeview(popup, columns=("size", "locations"), height=8)
+        for column, heading, width in (("#0", "File", 240), ("size", "Size", 100), ("locations", "Kept In", 260)):
+            largest_table.heading(column, text=heading)
+            largest_table.column(column, width=width)
+        largest_table.pack(fill=tk.BOTH, expand=True, padx=10)
+        for size, file, labels in report["largest"]:
+            largest_table.insert("", tk.END, text=file, values=(format_size(size), ", ".join(labels)))
+
+        buttons = tk.Frame(popup)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Clean Up Storage", command=self.collect_garbage).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Close", command=popup.destroy).pack(side=tk.LEFT, padx=5)
+
+    def collect_garbage(self, delete=False):
+        """Run the garbage collector in the background; a dry run shows a report with a Delete option."""
+        collector = GarbageCollector(self.extraction_cache, delete=delete)
+        verb = "Cleaning up" if delete else "Scanning"
+
+        def run(job):
+            while collector.step():
+                # Between slices: progress, and the point where the job can be cancelled
+                job.report(f"{verb} storage: {len(collector.found)} unreferenced items found")
+            self.root.after(0, lambda: self.show_garbage_report(collector))
+
+        self.scheduler.submit(
+            "gc", run, PRIORITY_BACKGROUND, background=True, description=f"{verb} storage", supersede=True
+        )
+
+    def show_garbage_report(self, collector):
+        """Show what a collection found, or what it removed."""
+        summary = collector.summary()
+        if collector.delete:
+            messagebox.showinfo(
+                "Clean Up Storage", f"Removed {len(collector.found)} items, {format_size(collector.reclaimed)} reclaimed."
+            )
+            self.request_profile_sync()
+            return
+        if not summary:
+            messagebox.showinfo("Clean Up Storage", "Nothing to clean up.")
+            return
+
+        popup = tk.Toplevel(self.root)
+        popup.title("Clean Up Storage")
+        popup.geometry("520x360")
+        set_window_icon(popup)
+        self.root.after(10, lambda: self.center_popup(popup))
+
+        total = sum(size for _, size in summary.values())
+        tk.Label(popup, text=f"{format_size(total)} can be reclaimed", font=("Arial", 12, "bold")).pack(pady=(10, 5))
+        text = tk.Text(popup, wrap=tk.NONE, height=12)
+        text.pack(fill=tk.BOTH, expand=True, padx=10)
+        for category, (count, size) in sorted(summary.items()):
+            text.insert(tk.END, f"{category}: {count} ({format_size(size)})\n")
+        text.insert(tk.END, "\n")
+        for category, path, size in collector.found:
+            text.insert(tk.END, f"{path} ({format_size(size)})\n")
+        text.config(state=tk.DISABLED)
+
+        def delete():
+            popup.destroy()
+            # Marks again before sweeping, so anything that became referenced since the scan is kept
+            self.collect_garbage(delete=True)
+
+        buttons = tk.Frame(popup)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Delete", command=delete).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Close", command=popup.destroy).pack(side=tk.LEFT, padx=5)
+
+    def handle_forwarded_args(self, argv):
+        """Bring the window forward and add the files another launch handed over."""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+        file_paths = [path for path in argv if os.path.isfile(path)]
+        if file_paths:
+            self.add_mod_files(file_paths)
 
     def add_pak_to_list(self, file_path):
         """Add a .pak file to the Applied Mods list."""
-        mod_name = os.path.basename(file_path)
+        self.ingest_paks([file_path])
 
-        # Check if the mod already exists in the listbox
-        existing_mods = self.applied_mods_listbox.get(0, tk.END)
-        if mod_name in existing_mods:
-            messagebox.showinfo("Info", f"Mod '{mod_name}' is already added.")
+    def ingest_paks(self, sources, notify=True):
+        """Add a batch of .pak files to Applied Mods with one dedupe pass and one refresh.
+
+        Sources are deduped against the Applied Mods names and against the content of
+        everything already queued or in the Mods folder. A mod is compared as a whole
+        group (.pak plus IoStore containers), and groups are only hashed when one of the
+        same total size exists, so unique mods are never read.
+        """
+        if not sources:
             return
 
+        existing_names = set(self.applied_mods_listbox.get(0, tk.END))
+
+        # Known files grouped by size; hashes are computed lazily on a size collision
+        known_by_size = {}
+        known_paths = [path for path in self.active_profile.values() if os.path.exists(path)]
+        if self.selected_folder:
+            mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
+            known_paths += [os.path.join(mods_folder, pak) for pak in list_paks(self.selected_folder)]
+        for path in known_paths:
+            group = mod_group_paths(path)
+            known_by_size.setdefault(sum(os.path.getsize(p) for p in group), []).append(group)
+        known_hashes = {}  # size -> set of group hashes already computed for that size
+
+        def hashes_for_size(size):
+            if size not in known_hashes:
+                known_hashes[size] = {group_hash(group) for group in known_by_size.get(size, [])}
+            return known_hashes[size]
+
+        accepted = []
+        skipped = []
         try:
-            # Add the mod to the listbox without copying
-            self.applied_mods_listbox.insert(tk.END, mod_name)
-            # Optionally, store the original file path for later use
-            self.active_profile[mod_name] = file_path
-            self.update_pak_list()  # Refresh Paks in folder after adding
+            for source in sources:
+                mod_name = os.path.basename(source)
+                if mod_name in existing_names:
+                    skipped.append(f"{mod_name} (already added)")
+                    continue
+
+                group = mod_group_paths(source)
+                size = sum(os.path.getsize(path) for path in group)
+                if size in known_by_size:
+                    digest = group_hash(group)
+                    if digest in hashes_for_size(size):
+                        skipped.append(f"{mod_name} (identical content already present)")
+                        continue
+                    known_hashes[size].add(digest)
+
+                # Later files in the same batch are deduped against this one
+                known_by_size.setdefault(size, []).append(group)
+                if size in known_hashes:
+                    known_hashes[size].add(group_hash(group))
+                existing_names.add(mod_name)
+                accepted.append((mod_name, source))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add mod: {e}")
-            
+        finally:
+            save_hash_cache()
+
+        # Single model update and a single UI refresh for the whole batch
+        for mod_name, source in accepted:
+            self.applied_mods_listbox.insert(tk.END, mod_name)
+            self.active_profile[mod_name] = source  # Store the original file path for later use
+        if accepted:
+            self.request_refresh()  # Refresh Paks in folder after adding
+
+        if skipped and notify:
+            messagebox.showinfo("Info", "Skipped duplicate mods:\n" + "\n".join(skipped))
+        elif skipped:
+            print("DEBUG: Skipped duplicate mods: " + ", ".join(skipped))
+        return accepted
+
     def on_exit(self):
-        """Sync .paks in the Mods folder with the currently loaded profile before exiting."""
+        """Record the Mods -> profile write-back in the sync journal and close immediately."""
+        self.scheduler.shutdown()
+        if getattr(self, "inbox", None):
+            self.inbox.stop()
         if self.current_profile:
             # Get the current profile path
-            profiles_folder = os.path.join(
-                os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-            )
+            profiles_folder = PROFILES_FOLDER
             current_profile_path = os.path.join(profiles_folder, self.current_profile)
             os.makedirs(current_profile_path, exist_ok=True)
 
@@ -329,24 +4220,13 @@ class ModManagerApp:
                 return
 
             try:
-                # Get lists of .pak files in Mods and Profile folders
-                mods_files = {file for file in os.listdir(mods_folder) if file.endswith(".pak")}
-                profile_files = {file for file in os.listdir(current_profile_path) if file.endswith(".pak")}
-
-                # Copy new .pak files from Mods to Profile
-                for file in mods_files - profile_files:
-                    source_path = os.path.join(mods_folder, file)
-                    destination_path = os.path.join(current_profile_path, file)
-                    shutil.copy2(source_path, destination_path)
-                    print(f"DEBUG: Added {file} to {destination_path}")
-
-                # Remove .pak files from Profile that are no longer in Mods
-                for file in profile_files - mods_files:
-                    file_path = os.path.join(current_profile_path, file)
-                    os.remove(file_path)
-                    print(f"DEBUG: Removed {file} from {file_path}")
+                # The copying happens in a detached helper (or on the next launch)
+                pending = write_sync_journal(mods_folder, current_profile_path)
+                if pending:
+                    spawn_sync_helper()
+                    print(f"DEBUG: Deferred {pending} sync step(s) to the write-back helper.")
             except Exception as e:
-                print(f"ERROR: Failed to sync mods with profile: {e}")
+                print(f"ERROR: Failed to record pending sync: {e}")
 
         # Perform cleanup (temporary directories, etc.)
         self.cleanup_temp_dirs()
@@ -356,28 +4236,27 @@ class ModManagerApp:
 
     def sync_profiles(self):
         """Ensure all profiles have an up-to-date profile.json file."""
-        profiles_folder = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-        )
+        profiles_folder = PROFILES_FOLDER
 
         if not os.path.exists(profiles_folder):
             print("DEBUG: No profiles folder found to sync.")
             return
 
+        manifests = {}
         try:
             for profile_name in os.listdir(profiles_folder):
                 profile_path = os.path.join(profiles_folder, profile_name)
                 if os.path.isdir(profile_path):  # Only process directories
                     json_path = os.path.join(profile_path, "profile.json")
-                    pak_files = [
-                        file for file in os.listdir(profile_path) if file.endswith(".pak")
-                    ]
 
-                    # Write the .pak files to profile.json
-                    with open(json_path, "w") as json_file:
-                        json.dump({"mods": pak_files}, json_file, indent=4)
+                    # Write the mods (one .pak per group) and every group file to profile.json
+                    manifests[profile_name] = scan_profile_manifest(profile_path)
+                    write_json_atomic(json_path, manifests[profile_name])
 
                     print(f"DEBUG: Synced profile.json for profile '{profile_name}'.")
+
+            # This pass saw every profile, so it also drops catalog entries for deleted folders
+            reconcile_profile_catalog(manifests)
         except Exception as e:
             print(f"ERROR: Failed to sync profiles: {e}")           
 
@@ -398,115 +4277,172 @@ class ModManagerApp:
         
     def save_config(self):
         """Save the current configuration to the config.json file."""
-        config_path = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "config.json"
-        )
+        config_path = CONFIG_FILE
         config_data = {
             "game_dir": self.selected_folder,
             "dark_theme": self.dark_theme,
             "current_profile": self.current_profile,
+            **self.settings,
         }
 
         try:
-            with open(config_path, "w") as config_file:
-                json.dump(config_data, config_file)
+            write_json_atomic(config_path, config_data)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save configuration: {e}")
 
 
 
-    def apply_theme(self):
-        """Apply the selected theme to the application."""
-        dark_bg = "#191918"
-        light_bg = "white"
-        light_fg = "black"
-        dark_fg = "white"
-
+    def apply_theme(self, *_):
+        """Style the window and every registered widget for the current theme."""
+        colors = THEME_COLORS[self.dark_theme]
         style = ttk.Style()
-        if self.dark_theme:
-            style.theme_use("clam")
-            style.configure("TLabel", background=dark_bg, foreground=dark_fg)
-            style.configure("TButton", background="#555", foreground=dark_fg)
-            style.configure("TFrame", background=dark_bg)
-            self.root.configure(bg=dark_bg)
-
-            # Apply dark theme to specific widgets
-            if hasattr(self, "pak_listbox"):
-                self.pak_listbox.config(
-                    bg=dark_bg, fg=dark_fg, highlightbackground="#555", selectbackground="#555", selectforeground=dark_fg
-                )
-            if hasattr(self, "applied_mods_listbox"):
-                self.applied_mods_listbox.config(
-                    bg=dark_bg, fg=dark_fg, highlightbackground="#555", selectbackground="#555", selectforeground=dark_fg
-                )
-
-            # Ensure all frames and containers are dark
-            for frame_attr in ["main_frame", "left_frame", "right_frame", "actions_frame"]:
-                if hasattr(self, frame_attr):
-                    getattr(self, frame_attr).config(bg=dark_bg)
-
-        else:
-            style.theme_use("default")
-            style.configure("TLabel", background=light_bg, foreground=light_fg)
-            style.configure("TButton", background=light_bg, foreground=light_fg)
-            style.configure("TFrame", background=light_bg)
-            self.root.configure(bg="SystemButtonFace")
-
-            # Reset to light theme for specific widgets
-            if hasattr(self, "pak_listbox"):
-                self.pak_listbox.config(
-                    bg=light_bg, fg=light_fg, highlightbackground="SystemButtonFace", selectbackground="SystemHighlight", selectforeground=light_fg
-                )
-            if hasattr(self, "applied_mods_listbox"):
-                self.applied_mods_listbox.config(
-                    bg=light_bg, fg=light_fg, highlightbackground="SystemButtonFace", selectbackground="SystemHighlight", selectforeground=light_fg
-                )
-
-            # Reset frame backgrounds
-            for frame_attr in ["main_frame", "left_frame", "right_frame", "actions_frame"]:
-                if hasattr(self, frame_attr):
-                    getattr(self, frame_attr).config(bg=light_bg)
-
-
+        style.theme_use(colors["ttk"])
+        style.configure("TLabel", background=colors["bg"], foreground=colors["fg"])
+        style.configure("TButton", background=colors["button"], foreground=colors["fg"])
+        style.configure("TFrame", background=colors["bg"])
+        self.root.configure(bg=colors["window"])
+
+        # Widgets destroyed since the last change drop out of the list
+        self.themed_widgets = [(widget, role) for widget, role in self.themed_widgets if widget.winfo_exists()]
+        for widget, role in self.themed_widgets:
+            style_widget(widget, role, self.dark_theme)
+
+    def themed(self, widget, role="frame"):
+        """Style a widget for the current theme now and on every theme change; returns the widget."""
+        style_widget(widget, role, self.dark_theme)
+        self.themed_widgets.append((widget, role))
+        return widget
+
+    def bind_state(self, observable, widget, callback):
+        """Subscribe callback to observable for as long as widget exists."""
+        unsubscribe = observable.subscribe(callback)
+        widget.bind("<Destroy>", lambda event: event.widget is widget and unsubscribe(), add="+")
 
     def toggle_theme(self, enabled):
         """Enable or disable the dark theme."""
-        self.dark_theme = enabled
-        self.apply_theme()
+        self.dark_theme = enabled  # Restyles through the state subscription
         self.save_config()  # Save the updated theme setting
 
 
     def show_folder_selector(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-        tk.Label(self.root, text="Select your Marvel Rivals game folder:").pack(pady=20)
-        tk.Button(self.root, text="Browse", command=self.browse_folder).pack()
+        """Swap the main view for the game folder picker (the main view's widgets are kept)."""
+        if self.main_frame is not None:
+            self.main_frame.pack_forget()
+            self.hotbar_frame.pack_forget()
+            self.status_label.pack_forget()
+            self.root.config(menu="")
+        if self.folder_frame is not None:
+            self.folder_frame.destroy()
+        self.folder_frame = self.themed(tk.Frame(self.root), "window")
+        self.folder_frame.pack(fill=tk.BOTH, expand=True)
+
+        tk.Label(self.folder_frame, text="Select your Marvel Rivals game folder:").pack(pady=20)
+        tk.Button(self.folder_frame, text="Browse", command=self.browse_folder).pack()
+
+        # Offer the install found in the Steam libraries (including Proton setups)
+        detected_folder = find_game_folder()
+        if detected_folder:
+            tk.Label(self.folder_frame, text=f"Detected: {detected_folder}").pack(pady=(20, 5))
+            tk.Button(
+                self.folder_frame, text="Use Detected Folder", command=lambda: self.set_game_folder(detected_folder)
+            ).pack()
 
     def browse_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
             if verify_game_folder(folder_selected):
-                self.selected_folder = folder_selected
-                self.save_config()
-                self.show_mod_manager()
+                self.set_game_folder(folder_selected)
             else:
                 messagebox.showerror("Error", "Invalid game folder selected.")
 
+    def set_game_folder(self, folder):
+        self.selected_folder = folder
+        self.save_config()
+        self.start_mods_watcher()
+        self.show_current_view(folder)  # Also when the same folder is picked again
+
+    def start_mods_watcher(self):
+        """Refresh the Paks in Folder list whenever something else changes the Mods folder."""
+        if getattr(self, "mods_watcher", None):
+            self.mods_watcher.stop()
+            self.mods_watcher = None
+        if not self.selected_folder:
+            return
+        mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
+        if os.path.isdir(mods_folder):
+            self.mods_watcher = DirectoryWatcher(
+                mods_folder, lambda: self.root.after(0, self.request_refresh)
+            ).start()
+
+    def start_inbox(self):
+        """Watch the configured inbox folder and queue new downloads in Applied Mods."""
+        if getattr(self, "inbox", None):
+            self.inbox.stop()
+            self.inbox = None
+        folder = self.settings.get("inbox_folder")
+        if not folder:
+            return
+        if not os.path.isdir(folder):
+            print(f"DEBUG: Inbox folder not found: {folder}")
+            return
+        self.inbox = InboxPipeline(
+            folder,
+            extract=lambda path: self.extraction_cache.get(path, self.archive_extractor()),
+            deliver=lambda paks: self.root.after(0, lambda: self.queue_inbox_paks(paks)),
+            extraction_cache=self.extraction_cache,
+        ).start()
+
+    def queue_inbox_paks(self, paks):
+        """Add paks that arrived through the inbox without interrupting with popups."""
+        if not self.current_profile:
+            self.ensure_default_profile()
+        accepted = self.ingest_paks(paks, notify=False)
+        if accepted and hasattr(self, "status_label"):
+            self.status_label.config(text=f"Inbox: queued {', '.join(name for name, _ in accepted)}")
+
+    def set_inbox_folder(self, folder, label=None):
+        """Change (or with an empty folder, turn off) the watched inbox."""
+        self.settings["inbox_folder"] = folder
+        self.save_config()
+        self.start_inbox()
+        if label is not None:
+            label.config(text=folder or "Off")
+
+    def set_game_io_limit(self, limit_mb_s):
+        """Change the cap on background disk work while the game is running."""
+        self.settings["game_io_limit_mb_s"] = max(0, int(limit_mb_s))
+        IO_GOVERNOR.limit = self.settings["game_io_limit_mb_s"] * 1024 * 1024
+        self.save_config()
+
     def show_mod_manager(self):
-        # Clear previous widgets, but ensure the menu remains attached
-        for widget in self.root.winfo_children():
-            if not isinstance(widget, tk.Menu):  # Do not destroy the menu
-                widget.destroy()
+        """Show the main view. Its widgets are built once and bound to self.state, so showing it
+        again only swaps out the folder selector and refreshes the Mods list."""
+        if self.folder_frame is not None:
+            self.folder_frame.destroy()
+            self.folder_frame = None
+        if self.main_frame is None:
+            self.build_mod_manager()
+        self.root.config(menu=self.menubar)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 5))
+        self.hotbar_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # Refresh Paks in folder list
+        self.request_refresh()
+
+    def build_mod_manager(self):
         # Menu Bar
-        menubar = tk.Menu(self.root)
-        self.root.config(menu=menubar)  # Attach menu to the root window
+        self.menubar = menubar = tk.Menu(self.root)
 
         # File Menu
         filemenu = tk.Menu(menubar, tearoff=0)
         filemenu.add_command(label="Launch Game", command=self.launch_game)  # Add Launch Game
         filemenu.add_separator()
+        filemenu.add_command(label="Verify Mods", command=self.verify_mods)
+        filemenu.add_command(label="Profile History", command=lambda: self.show_profile_history(self.current_profile))
+        filemenu.add_command(label="Bulk Edit Profiles", command=self.bulk_edit_profiles)
+        filemenu.add_command(label="Find Asset", command=self.find_asset)
+        filemenu.add_separator()
         filemenu.add_command(label="Settings", command=self.open_settings)
         filemenu.add_separator()
         filemenu.add_command(label="Exit", command=self.root.quit)
@@ -517,38 +4453,52 @@ class ModManagerApp:
         about_menu.add_command(label="Help", command=self.show_about)
         menubar.add_cascade(label="About", menu=about_menu)
 
+        # Status bar for scheduled jobs (packed before the main frame so it keeps its row)
+        self.status_label = tk.Label(self.root, text="Ready", anchor=tk.W)
+
+        # Favorites hotbar; Ctrl+1..9 switch to the same profiles
+        self.hotbar_frame = self.themed(tk.Frame(self.root), "window")
+        self.bind_state(self.state.favorites, self.hotbar_frame, lambda favorites, old: self.render_hotbar())
+        self.bind_state(self.state.active_profile, self.hotbar_frame, lambda profile, old: self.render_hotbar())
+        # Bound on the main window only, so typing in a popup (Bulk Edit, Settings) never switches profiles
+        for slot in range(FAVORITES_LIMIT):
+            self.root.bind(f"<Control-Key-{slot + 1}>", lambda event, slot=slot: self.switch_to_favorite_slot(slot, event))
+
         # Main Frame
-        self.main_frame = tk.Frame(self.root)
-        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.main_frame = self.themed(tk.Frame(self.root))
 
         # Left Frame (Paks in Folder)
-        self.left_frame = tk.Frame(self.main_frame)
+        self.left_frame = self.themed(tk.Frame(self.main_frame))
         self.left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
 
         # Display Current Profile
-        active_profile_text = f"Active Profile: {self.current_profile or 'None'}"
-        print(f"DEBUG: Setting current_profile_label with text: {active_profile_text}")  # Debug
-        self.current_profile_label = tk.Label(self.left_frame, text=active_profile_text, font=("Arial", 10, "bold"))
+        self.current_profile_label = tk.Label(self.left_frame, font=("Arial", 10, "bold"))
         self.current_profile_label.pack(pady=5)
+        self.bind_state(
+            self.state.active_profile, self.current_profile_label,
+            lambda profile, old: self.current_profile_label.config(text=f"Active Profile: {profile or 'None'}"),
+        )
 
         tk.Label(self.left_frame, text="Paks in folder:").pack(pady=(0, 5))
-        self.pak_listbox = tk.Listbox(self.left_frame)
+        self.pak_listbox = self.themed(tk.Listbox(self.left_frame), "list")
         self.pak_listbox.pack(fill=tk.BOTH, expand=True)
+        self.pak_listbox.bind("<Button-3>", self.show_context_menu)
+        self.bind_state(self.state.mods, self.pak_listbox, lambda mods, old: sync_listbox(self.pak_listbox, mods))
 
-        self.actions_frame = tk.Frame(self.left_frame)
+        self.actions_frame = self.themed(tk.Frame(self.left_frame))
         self.actions_frame.pack(fill=tk.X, pady=(10, 0))
 
         tk.Button(self.actions_frame, text="Save Profile", command=self.save_profile, width=15).pack(side=tk.LEFT, padx=5)
         tk.Button(self.actions_frame, text="Load Profile", command=self.load_profile, width=15).pack(side=tk.LEFT, padx=5)
-        tk.Button(self.actions_frame, text="Refresh", command=self.update_pak_list, width=15).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.actions_frame, text="Refresh", command=self.request_refresh, width=15).pack(side=tk.LEFT, padx=5)
         tk.Button(self.actions_frame, text="Clear", command=self.clear_mods, width=15).pack(side=tk.LEFT, padx=5)
 
         # Right Frame (Applied Mods)
-        self.right_frame = tk.Frame(self.main_frame)
+        self.right_frame = self.themed(tk.Frame(self.main_frame))
         self.right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(5, 0))
 
         tk.Label(self.right_frame, text="Applied Mods:").pack(pady=(0, 5))
-        self.applied_mods_listbox = tk.Listbox(self.right_frame)
+        self.applied_mods_listbox = self.themed(tk.Listbox(self.right_frame), "list")
         self.applied_mods_listbox.pack(fill=tk.BOTH, expand=True)
         self.applied_mods_listbox.bind('<<ListboxSelect>>', self.on_mod_select)
 
@@ -560,22 +4510,81 @@ class ModManagerApp:
         self.remove_mod_button = tk.Button(button_frame, text="Remove Mod", command=self.remove_mod, state=tk.DISABLED)
         self.remove_mod_button.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
 
-        tk.Button(button_frame, text="Apply", command=self.apply_mods).pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
+        tk.Button(button_frame, text="Apply", command=self.request_apply).pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
 
-        # Refresh Paks in folder list
-        self.update_pak_list()
-        self.pak_listbox.bind("<Button-3>", self.show_context_menu)
+    def verify_mods(self):
+        """Hash all paks in the Mods folder and profiles in the background and report problems."""
+        profiles_folder = PROFILES_FOLDER
+        mods_folder = os.path.join(
+            self.selected_folder or "", "MarvelGame", "Marvel", "Content", "Paks", "Mods"
+        )
+
+        current_profile = self.current_profile
+
+        def run(job):
+            try:
+                report = verify_integrity(
+                    mods_folder, profiles_folder, current_profile,
+                    progress=lambda done, total: job.report(f"Verifying {done}/{total} paks", done / total),
+                )
+            except JobCancelled:
+                raise
+            except Exception as e:
+                error = e
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Verification failed: {error}"))
+                raise
+            self.root.after(0, lambda: self.show_verify_report(report, profiles_folder))
+
+        # A new verify supersedes one that is still running
+        self.scheduler.submit(
+            "verify", run, PRIORITY_BACKGROUND, background=True, description="Verifying mods", supersede=True
+        )
+
+    def show_verify_report(self, report, profiles_folder):
+        """Show the result of verify_mods with an option to accept the current files."""
+        issue_count = sum(len(issues) for issues in report.values())
+        if not issue_count:
+            messagebox.showinfo("Verify Mods", "All paks match their profile manifests.")
+            return
 
-        # Apply the selected theme
-        self.apply_theme()
+        popup = tk.Toplevel(self.root)
+        popup.title("Verify Mods")
+        popup.geometry("600x400")
+        self.root.after(10, lambda: self.center_popup(popup))
 
+        text = tk.Text(popup, wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        for label, issues in report.items():
+            if not issues:
+                continue
+            text.insert(tk.END, f"{label}\n")
+            for status, file, detail in issues:
+                text.insert(tk.END, f"    [{status}] {file} - {detail}\n")
+        text.config(state=tk.DISABLED)
+
+        def accept_current():
+            popup.destroy()
+
+            def run(job):
+                profiles = [name for name in os.listdir(profiles_folder) if os.path.isdir(os.path.join(profiles_folder, name))]
+                for index, profile_name in enumerate(profiles):
+                    job.report(f"Hashing '{profile_name}'", index / len(profiles))
+                    record_manifest_hashes(os.path.join(profiles_folder, profile_name))
+                self.root.after(0, lambda: messagebox.showinfo("Verify Mods", "Profile manifests updated to the current files."))
+
+            self.scheduler.submit(
+                "accept_hashes", run, PRIORITY_BACKGROUND, background=True, description="Updating profile manifests"
+            )
+
+        tk.Button(popup, text="Accept Current Files", command=accept_current).pack(side=tk.LEFT, padx=10, pady=(0, 10))
+        tk.Button(popup, text="Close", command=popup.destroy).pack(side=tk.RIGHT, padx=10, pady=(0, 10))
 
     def show_about(self):
         """Display the About message."""
         messagebox.showinfo("About", "ARMED AND DANGEROUS!")
         
     def clear_mods(self):
-        """Clear all .paks from the Mods folder and the current profile folder, then update the profile JSON."""
+        """Clear all mod files from the Mods folder and the current profile folder, then update the profile JSON."""
         if not self.current_profile:
             messagebox.showerror("Error", "No active profile to clear.")
             return
@@ -585,9 +4594,7 @@ class ModManagerApp:
             self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods"
         )
         # Get the current profile folder path
-        profiles_folder = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-        )
+        profiles_folder = PROFILES_FOLDER
         current_profile_path = os.path.join(profiles_folder, self.current_profile)
 
         if not os.path.exists(mods_folder) and not os.path.exists(current_profile_path):
@@ -597,41 +4604,43 @@ class ModManagerApp:
         # Confirm clearing the Mods folder and profile folder
         confirm = messagebox.askyesno(
             "Confirm Clear",
-            f"Are you sure you want to clear all .pak files from the Mods folder and profile '{self.current_profile}'?",
+            f"Are you sure you want to clear all mod files from the Mods folder and profile '{self.current_profile}'?",
         )
         if not confirm:
             return
 
+        lock = self.lock_profiles("Clearing mods")
+        if lock is None:
+            return
         try:
             # Clear the Mods folder
-            if os.path.exists(mods_folder):
-                for file in os.listdir(mods_folder):
-                    if file.endswith(".pak"):
-                        os.remove(os.path.join(mods_folder, file))
-                        print(f"DEBUG: Removed {file} from Mods folder.")
+            for file in list_mod_files(mods_folder):
+                os.remove(os.path.join(mods_folder, file))
+                print(f"DEBUG: Removed {file} from Mods folder.")
 
             # Clear the current profile folder
-            if os.path.exists(current_profile_path):
-                for file in os.listdir(current_profile_path):
-                    if file.endswith(".pak"):
-                        os.remove(os.path.join(current_profile_path, file))
-                        print(f"DEBUG: Removed {file} from profile '{self.current_profile}'.")
+            for file in list_mod_files(current_profile_path):
+                os.remove(os.path.join(current_profile_path, file))
+                print(f"DEBUG: Removed {file} from profile '{self.current_profile}'.")
 
             # Save an empty mods list to profile.json
             json_path = os.path.join(current_profile_path, "profile.json")
             with open(json_path, "w") as json_file:
                 json.dump({"mods": []}, json_file, indent=4)
+            update_profile_catalog(self.current_profile, {"mods": [], "files": {}})
             print(f"DEBUG: Updated profile '{self.current_profile}' with no mods.")
 
             # Refresh the Paks in Folder list
-            self.update_pak_list()
+            self.request_refresh()
 
             # Sync all profiles
-            self.sync_profiles()
+            self.request_profile_sync()
 
             messagebox.showinfo("Success", "Mods and profile cleared successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to clear Mods or profile: {e}")
+        finally:
+            lock.release()
 
 
         
@@ -639,16 +4648,14 @@ class ModManagerApp:
         """Open the settings popup."""
         popup = tk.Toplevel(self.root)
         popup.title("Settings")
-        popup.geometry("400x300")  # Adjusted size
+        popup.geometry("400x560")  # Adjusted size
         popup.resizable(False, False)
 
         # Center the popup
         self.root.after(10, lambda: self.center_popup(popup))
 
         # Set app icon
-        icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-        if os.path.exists(icon_path):
-            popup.iconbitmap(icon_path)
+        set_window_icon(popup)
 
         # Add Settings Content
         tk.Label(popup, text="Settings", font=("Arial", 14, "bold")).pack(pady=10)
@@ -658,6 +4665,11 @@ class ModManagerApp:
         # Change Game Directory Button
         tk.Button(popup, text="Change Game Directory", command=self.show_folder_selector).pack(pady=5)
 
+        # Proton prefix used by the game on Linux
+        proton_prefix = find_proton_prefix()
+        if proton_prefix:
+            tk.Label(popup, text=f"Proton prefix: {proton_prefix}", wraplength=380).pack(pady=2)
+
         # Theme Toggle
         theme_var = tk.BooleanVar(value=self.dark_theme)
         tk.Checkbutton(
@@ -667,8 +4679,54 @@ class ModManagerApp:
             command=lambda: self.toggle_theme(theme_var.get()),
         ).pack(pady=5)
 
-        # Clear Backups Button
-        tk.Button(popup, text="Clear Backups", command=self.clear_backups_popup).pack(pady=5)
+        # Inbox folder watched for downloaded mods
+        tk.Label(popup, text="Inbox Folder:").pack(pady=(5, 0))
+        inbox_label = tk.Label(popup, text=self.settings.get("inbox_folder") or "Off", wraplength=380)
+        inbox_label.pack()
+        inbox_frame = tk.Frame(popup)
+        inbox_frame.pack(pady=5)
+        tk.Button(
+            inbox_frame,
+            text="Choose Inbox",
+            command=lambda: self.set_inbox_folder(
+                filedialog.askdirectory(parent=popup) or self.settings.get("inbox_folder", ""), inbox_label
+            ),
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Button(
+            inbox_frame, text="Turn Off", command=lambda: self.set_inbox_folder("", inbox_label)
+        ).pack(side=tk.LEFT, padx=5)
+
+        # Background disk speed while the game is running
+        limit_frame = tk.Frame(popup)
+        limit_frame.pack(pady=5)
+        tk.Label(limit_frame, text="Background I/O while playing (MB/s, 0 = no cap):").pack(side=tk.LEFT)
+        limit_var = tk.IntVar(value=self.settings.get("game_io_limit_mb_s", 0))
+
+        def limit_changed(*_):
+            try:
+                self.set_game_io_limit(limit_var.get())
+            except tk.TclError:
+                pass  # Field emptied while typing; the last valid value stays in effect
+
+        # Digits only (or empty while typing); typed values and arrow clicks both save through the trace
+        only_digits = (popup.register(lambda text: text == "" or (text.isdigit() and int(text) <= 1000)), "%P")
+        tk.Spinbox(
+            limit_frame, from_=0, to=1000, increment=5, width=5, textvariable=limit_var,
+            validate="key", validatecommand=only_digits,
+        ).pack(side=tk.LEFT, padx=5)
+        limit_var.trace_add("write", limit_changed)
+
+        # Clear Backups, with the storage report beside it to decide what to clear
+        storage_frame = tk.Frame(popup)
+        storage_frame.pack(pady=5)
+        tk.Button(storage_frame, text="Clear Backups", command=self.clear_backups_popup).pack(side=tk.LEFT, padx=5)
+        tk.Button(storage_frame, text="Storage Report", command=self.show_storage_report).pack(side=tk.LEFT, padx=5)
+
+        # Report (and optionally delete) data nothing refers to any more
+        tk.Button(popup, text="Clean Up Storage", command=self.collect_garbage).pack(pady=5)
+
+        # Archive Backend Benchmark Button
+        tk.Button(popup, text="Benchmark Archive Tools", command=self.run_archive_benchmark).pack(pady=5)
 
         # Close Button
         tk.Button(popup, text="Close", command=popup.destroy).pack(pady=10)
@@ -687,9 +4745,7 @@ class ModManagerApp:
         self.root.after(10, lambda: self.center_popup(popup))
 
         # Set app icon
-        icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-        if os.path.exists(icon_path):
-            popup.iconbitmap(icon_path)
+        set_window_icon(popup)
 
         # Backup profiles folder
         backup_profiles_folder = os.path.join(
@@ -778,16 +4834,237 @@ class ModManagerApp:
         tk.Button(popup, text="Close", command=popup.destroy).pack(pady=10)
 
 
+    def request_refresh(self):
+        """Schedule a refresh of the Paks in Folder list; repeated requests coalesce into one."""
+        self.scheduler.submit(
+            "refresh", lambda job: self.update_pak_list(), PRIORITY_USER, description="Refreshing mods list"
+        )
+
+    def request_profile_sync(self):
+        """Schedule a background rewrite of every profile.json."""
+        self.scheduler.submit(
+            "sync_profiles", lambda job: self.sync_profiles(), PRIORITY_BACKGROUND,
+            background=True, description="Syncing profiles", heavy=True,
+        )
+        # Anything that changes a profile may have added or removed paks
+        self.request_asset_index_update()
+        self.request_stage_favorites()
+
+    def request_stage_favorites(self):
+        """Keep every favorite's stage folder warm in the background; up-to-date stages cost a few stats."""
+        if not self.selected_folder or not verify_game_folder(self.selected_folder):
+            return
+        game_dir = self.selected_folder
+        favorites = list(self.state.favorites.get())
+
+        def run(job):
+            with _stage_lock:
+                prune_stages(game_dir, favorites)
+                for index, name in enumerate(favorites):
+                    if not os.path.isdir(os.path.join(PROFILES_FOLDER, name)) or stage_is_current(game_dir, name):
+                        continue
+                    job.report(f"Staging '{name}'", index / len(favorites))
+                    stage_profile(game_dir, name)
+
+        self.scheduler.submit(
+            "stage_favorites", run, PRIORITY_BACKGROUND, background=True, description="Staging favorites", heavy=True
+        )
+
+    def render_hotbar(self):
+        """Redraw the favorites hotbar (only its own buttons) for the current favorites and profile."""
+        for widget in self.hotbar_frame.winfo_children():
+            widget.destroy()
+        favorites = self.state.favorites.get()
+        for slot, name in enumerate(favorites):
+            active = name == self.current_profile
+            tk.Button(
+                self.hotbar_frame, text=f"{slot + 1}. {name}", relief=tk.SUNKEN if active else tk.RAISED,
+                command=lambda name=name: self.switch_to_favorite(name),
+            ).pack(side=tk.LEFT, padx=(0, 5))
+        if self.current_profile:
+            text = "Unfavorite" if self.current_profile in favorites else "Add to Favorites"
+            tk.Button(
+                self.hotbar_frame, text=text, command=lambda: self.toggle_favorite(self.current_profile)
+            ).pack(side=tk.RIGHT)
+
+    def set_favorites(self, favorites):
+        self.settings["favorite_profiles"] = list(favorites)
+        self.state.favorites.set(tuple(favorites))
+        self.save_config()
+        self.request_stage_favorites()
+
+    def toggle_favorite(self, profile_name):
+        """Add a profile to the hotbar, or take it off."""
+        favorites = list(self.state.favorites.get())
+        if profile_name in favorites:
+            favorites.remove(profile_name)
+        elif len(favorites) >= FAVORITES_LIMIT:
+            messagebox.showerror("Error", f"The hotbar holds at most {FAVORITES_LIMIT} profiles.")
+            return
+        else:
+            favorites.append(profile_name)
+        self.set_favorites(favorites)
+
+    def switch_to_favorite_slot(self, slot, event=None):
+        if event is not None and getattr(event.widget, "winfo_toplevel", lambda: None)() is not self.root:
+            return  # Keys typed in a popup window
+        favorites = self.state.favorites.get()
+        if slot < len(favorites) and self.main_frame is not None and self.main_frame.winfo_ismapped():
+            self.switch_to_favorite(favorites[slot])
+
+    def switch_to_favorite(self, profile_name):
+        """Load a favorite without any dialog, hard linking from its stage when the stage is warm."""
+        if profile_name == self.current_profile or not self.selected_folder:
+            return
+        profile_path = os.path.join(PROFILES_FOLDER, profile_name)
+        if not os.path.isdir(profile_path):
+            self.status_label.config(text=f"Profile '{profile_name}' no longer exists")
+            return
+        mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
+        os.makedirs(mods_folder, exist_ok=True)
+
+        lock = self.lock_profiles(f"Loading profile '{profile_name}'")
+        if lock is None:
+            return
+        started = time.monotonic()
+        try:
+            warm = False
+            # A stage being refreshed right now is skipped rather than waited for
+            if _stage_lock.acquire(blocking=False):
+                try:
+                    warm = stage_is_current(self.selected_folder, profile_name)
+                    if warm:
+                        switch_mods(stage_path(self.selected_folder, profile_name), mods_folder, link=True)
+                finally:
+                    _stage_lock.release()
+            if not warm:
+                plan = plan_copies(
+                    mod_group_pairs(profile_path, mods_folder),
+                    removals=[
+                        os.path.join(mods_folder, file) for file in list_mod_files(mods_folder)
+                        if not os.path.exists(os.path.join(profile_path, file))
+                    ],
+                )
+                if not self.check_plan(plan, f"Loading profile '{profile_name}'"):
+                    return
+                switch_mods(profile_path, mods_folder)
+                self.record_throughput(plan, time.monotonic() - started)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to switch to profile '{profile_name}': {e}")
+            return
+        finally:
+            lock.release()
+
+        self.current_profile = profile_name
+        update_profile_catalog(profile_name, used=True)
+        self.request_snapshot(profile_name, "load")
+        self.request_refresh()
+        self.save_config()
+        elapsed = time.monotonic() - started
+        self.status_label.config(
+            text=f"Switched to '{profile_name}' in {elapsed:.2f} s" + ("" if warm else " (not staged yet)")
+        )
+        print(f"DEBUG: Switched to '{profile_name}' in {elapsed:.3f} s ({'stage' if warm else 'profile'})")
+
+    def asset_index_folders(self):
+        """Every place the manager keeps paks: Mods, profiles, backups and the extracted library."""
+        folders = [PROFILES_FOLDER, BACKUP_FOLDER, EXTRACT_CACHE_FOLDER]
+        if self.selected_folder:
+            folders.insert(0, os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods"))
+        return folders
+
+    def request_asset_index_update(self):
+        """Schedule a background refresh of the asset index; only new or changed paks are parsed."""
+        folders = self.asset_index_folders()
+
+        def run(job):
+            shared_asset_index().refresh(
+                folders, progress=lambda done, total: job.report(f"Indexing {done}/{total} paks", done / total)
+            )
+
+        self.scheduler.submit(
+            "asset_index", run, PRIORITY_BACKGROUND, background=True, description="Indexing assets", heavy=True
+        )
+
+    def describe_pak_location(self, path):
+        """Short label for where a pak lives, for the asset search results."""
+        mods_folder = self.asset_index_folders()[0] if self.selected_folder else None
+        for folder, label in (
+            (mods_folder, "Mods folder"),
+            (PROFILES_FOLDER, "Profile"),
+            (os.path.join(BACKUP_FOLDER, "Profiles"), "Backup"),
+            (BACKUP_FOLDER, "Backup"),
+            (EXTRACT_CACHE_FOLDER, "Library"),
+        ):
+            if folder and os.path.normcase(path).startswith(os.path.normcase(folder) + os.sep):
+                parts = os.path.relpath(path, folder).split(os.sep)
+                if label in ("Profile", "Backup") and len(parts) > 1:
+                    return f"{label} '{parts[0]}': {parts[-1]}"
+                return f"{label}: {parts[-1]}"
+        return path
+
+    def find_asset(self):
+        """Search every known pak for asset paths starting with the given text."""
+        popup = tk.Toplevel(self.root)
+        popup.title("Find Asset")
+        popup.geometry("700x450")
+        set_window_icon(popup)
+        self.root.after(10, lambda: self.center_popup(popup))
+
+        tk.Label(popup, text="Asset path (e.g. /Game/Marvel/Characters/1021/):").pack(pady=(10, 0))
+        query_var = tk.StringVar()
+        entry = tk.Entry(popup, textvariable=query_var, width=80)
+        entry.pack(pady=5)
+        entry.focus_set()
+        results_label = tk.Label(popup, text="")
+        results_label.pack()
+
+        table = ttk.Treeview(popup, columns=("location",), height=14)
+        table.heading("#0", text="Asset")
+        table.heading("location", text="Found In")
+        table.column("#0", width=380)
+        table.column("location", width=280)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        def search(event=None):
+            table.delete(*table.get_children())
+            results = shared_asset_index().query(query_var.get())  # What is indexed so far
+            for asset, paths in results:
+                node = table.insert("", tk.END, text=asset, values=(f"{len(paths)} pak(s)",), open=len(results) == 1)
+                for path in paths:
+                    table.insert(node, tk.END, text=os.path.basename(path), values=(self.describe_pak_location(path),))
+            results_label.config(text=f"{len(results)} matching asset(s)")
+
+        entry.bind("<Return>", search)
+        tk.Button(popup, text="Search", command=search).pack(pady=(0, 10))
+
+    def show_job_status(self, job):
+        """Show the state of the latest scheduled job in the status bar."""
+        if not hasattr(self, "status_label") or not self.status_label.winfo_exists():
+            return
+        if job.state == "running":
+            text = job.message
+            if job.progress is not None:
+                text += f" ({job.progress * 100:.0f}%)"
+        elif job.state == "failed":
+            text = f"{job.description} failed: {job.error}"
+        elif job.state == "cancelled":
+            text = f"{job.description} cancelled"
+        elif job.state == "deferred":
+            text = f"{job.description} waits until the game exits"
+        else:
+            text = "Ready"
+        self.status_label.config(text=text)
+
     def update_pak_list(self):
         """Refresh the displayed lists of Paks in Folder and Applied Mods."""
-        self.sync_profiles()   
-        self.pak_listbox.delete(0, tk.END)
+        self.request_profile_sync()
+        mods = ()
         if self.selected_folder:
             mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
-            if os.path.exists(mods_folder):
-                for pak in sorted(os.listdir(mods_folder)):  # Alphabetically sort for UX
-                    if pak.endswith(".pak"):
-                        self.pak_listbox.insert(tk.END, pak)
+            # One row per mod group; its IoStore containers travel with the .pak
+            mods = tuple(sorted(group_mod_files(list_mod_files(mods_folder))))  # Alphabetically sort for UX
+        self.state.mods.set(mods)  # The listbox only gains or loses the rows that changed
                         
     def clear_backups_popup(self):
         """Show a popup to clear backups for all profiles or specific profiles."""
@@ -800,9 +5077,7 @@ class ModManagerApp:
         self.root.after(10, lambda: self.center_popup(popup))
 
         # Set app icon
-        icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-        if os.path.exists(icon_path):
-            popup.iconbitmap(icon_path)
+        set_window_icon(popup)
 
         # Backup profiles folder
         backup_profiles_folder = os.path.join(BACKUP_FOLDER, "Profiles")
@@ -826,12 +5101,17 @@ class ModManagerApp:
         profiles_listbox.pack(pady=5, fill=tk.BOTH, expand=True)
 
         # Refresh the profiles list dynamically
-        def refresh_profiles():
-            current_profiles = profiles_var.get()
+        def list_backups(job):
+            # Runs on the scheduler's worker; the listbox is updated back on the UI thread
             updated_profiles = get_profiles()
+            self.root.after(0, lambda: popup.winfo_exists() and profiles_var.set(updated_profiles))
 
-            if current_profiles != updated_profiles:
-                profiles_var.set(updated_profiles)
+        def refresh_profiles():
+            if not popup.winfo_exists():
+                return
+            self.scheduler.submit(
+                "backup_refresh", list_backups, PRIORITY_BACKGROUND, background=True, description="Refreshing backups"
+            )
             
             # Refresh every 2 seconds
             popup.after(2000, refresh_profiles)
@@ -927,7 +5207,10 @@ class ModManagerApp:
             messagebox.showerror("Error", f"Failed to show context menu: {e}")
 
     def remove_from_folder(self, file_path):
-        """Move a file to the current profile's backup folder under the global backup directory."""
+        """Move a mod (with its IoStore containers) to the current profile's backup folder."""
+        lock = self.lock_profiles("Removing the mod")
+        if lock is None:
+            return
         try:
             # Ensure a profile is loaded
             if not self.current_profile:
@@ -935,13 +5218,7 @@ class ModManagerApp:
                 return
 
             # Path to global backup folder for profiles
-            backup_folder = os.path.join(
-                os.getenv("LOCALAPPDATA"),
-                "MarvelRivalsModManager",
-                "backup",
-                "Profiles",
-                self.current_profile
-            )
+            backup_folder = os.path.join(BACKUP_FOLDER, "Profiles", self.current_profile)
             os.makedirs(backup_folder, exist_ok=True)  # Ensure profile's backup directory exists
 
             # Check if the file exists
@@ -949,32 +5226,42 @@ class ModManagerApp:
                 messagebox.showerror("Error", "File not found.")
                 return
 
-            # Determine the destination path in the backup folder
+            # The whole group is backed up together
             file_name = os.path.basename(file_path)
-            backup_path = os.path.join(backup_folder, file_name)
-
-            if os.path.exists(backup_path):
-                # File is already backed up
-                print(f"DEBUG: File already backed up -> {backup_path}")
-            else:
-                # Move the file to the profile's backup folder
-                print(f"DEBUG: Moving file to backup -> {backup_path}")
-                shutil.move(file_path, backup_path)
+            older_suffix = time.strftime(".%Y%m%d-%H%M%S")
+            for group_path in mod_group_paths(file_path):
+                backup_path = os.path.join(backup_folder, os.path.basename(group_path))
+
+                if os.path.exists(backup_path) and files_match(group_path, backup_path):
+                    # File is already backed up
+                    print(f"DEBUG: File already backed up -> {backup_path}")
+                    os.remove(group_path)
+                else:
+                    if os.path.exists(backup_path):
+                        # A different version is backed up; keep it under a dated name
+                        stem, extension = os.path.splitext(backup_path)
+                        print(f"DEBUG: Keeping older backup -> {stem + older_suffix + extension}")
+                        os.replace(backup_path, stem + older_suffix + extension)
+                    # Move the file to the profile's backup folder
+                    print(f"DEBUG: Moving file to backup -> {backup_path}")
+                    shutil.move(group_path, backup_path)
 
             # Refresh the Mods folder list
-            self.update_pak_list()
+            self.request_refresh()
             messagebox.showinfo("Success", f"File removed and backed up: {file_name}")
 
         except Exception as e:
             print(f"DEBUG: Backup error -> {e}")
             messagebox.showerror("Error", f"An error occurred: {e}")
+        finally:
+            lock.release()
             
     def view_file_location(self, file_path):
-        os.startfile(os.path.dirname(file_path))
+        open_path(os.path.dirname(file_path))
 
     def _extract_and_add_paks(self, archive, archive_path):
         for member in archive.namelist():
-            if member.endswith(".pak") and "Paks" in member:
+            if is_mod_file(member) and "Paks" in member:
                 extraction_path = os.path.join(
                     self.selected_folder,
                     "MarvelGame",
@@ -986,7 +5273,8 @@ class ModManagerApp:
                 )
                 with archive.open(member, "r") as source, open(extraction_path, "wb") as target:
                     shutil.copyfileobj(source, target)
-                self.applied_mods_listbox.insert(tk.END, os.path.basename(member))
+                if member.lower().endswith(".pak"):
+                    self.applied_mods_listbox.insert(tk.END, os.path.basename(member))
                 
     def on_mod_select(self, event):
         """Enable the Remove Mod button when a mod is selected in Applied Mods."""
@@ -1002,15 +5290,19 @@ class ModManagerApp:
         if selection:
             selected_mod = self.applied_mods_listbox.get(selection[0])
         mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
-        mod_path = os.path.join(mods_folder, selected_mod)
         try:
-            if os.path.exists(mod_path):
-                os.remove(mod_path)
+            remove_mod_group(mods_folder, selected_mod)
             self.applied_mods_listbox.delete(selection[0])
             messagebox.showinfo("Success", f"Removed mod '{selected_mod}'.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to remove mod: {e}")
 
+    def request_apply(self):
+        """Run apply_mods through the scheduler, ahead of any background work."""
+        self.scheduler.submit(
+            "apply", lambda job: self.apply_mods(), PRIORITY_USER, description="Applying mods", supersede=True
+        )
+
     def apply_mods(self):
         """Apply the selected mods and sync the active profile."""
         if not self.current_profile:
@@ -1025,57 +5317,110 @@ class ModManagerApp:
         )
         os.makedirs(mods_folder, exist_ok=True)
 
+        lock = self.lock_profiles("Applying mods")
+        if lock is None:
+            return
         try:
-            # Apply mods to the Mods folder
+            active_profile_folder = os.path.join(PROFILES_FOLDER, self.current_profile)
+            apply_groups = []
             for i in range(self.applied_mods_listbox.size()):
                 mod_name = self.applied_mods_listbox.get(i)
                 source_path = self.active_profile.get(mod_name)  # Get the original file path
                 if source_path:
-                    destination_path = os.path.join(mods_folder, mod_name)
-                    shutil.copy2(source_path, destination_path)
-
-            # Sync the active profile
-            active_profile_folder = os.path.join(
-                os.getenv("LOCALAPPDATA"),
-                "MarvelRivalsModManager",
-                "profiles",
-                self.current_profile,
-            )
-            os.makedirs(active_profile_folder, exist_ok=True)
+                    apply_groups.append([
+                        (path, os.path.join(mods_folder, os.path.basename(path)))
+                        for path in mod_group_paths(source_path)
+                    ])
+
+            # Plan both steps up front; the profile copy is sourced from what Mods will hold
+            sources = {file: os.path.join(mods_folder, file) for file in list_mod_files(mods_folder)}
+            sources.update({os.path.basename(dst): src for pairs in apply_groups for src, dst in pairs})
+            profile_groups = [
+                [(sources[file], os.path.join(active_profile_folder, file)) for file in members]
+                for members in group_mod_files(sources).values()
+            ]
+            plan = plan_copies(apply_groups + profile_groups)
+            if not self.check_plan(plan, "Applying mods"):
+                return
+            started = time.monotonic()
+
+            # Apply mods to the Mods folder
+            for pairs in apply_groups:
+                # The .pak and its IoStore containers land together or not at all
+                copy_mod_group(pairs)
 
             # Copy mods from Mods folder to the active profile folder
-            for file in os.listdir(mods_folder):
-                if file.endswith(".pak"):
-                    shutil.copy2(os.path.join(mods_folder, file), active_profile_folder)
+            copy_mod_groups(mods_folder, active_profile_folder)
+            self.record_throughput(plan, time.monotonic() - started)
 
             # Sync profile.json for the active profile
-            self.sync_profiles()
+            self.request_profile_sync()
+            self.request_snapshot(self.current_profile, "apply")
 
             self.applied_mods_listbox.delete(0, tk.END)  # Clear applied mods after applying
-            self.update_pak_list()  # Refresh the Paks in folder
+            self.request_refresh()  # Refresh the Paks in folder
             messagebox.showinfo("Success", "Mods applied and profile updated successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to apply mods: {e}")
+        finally:
+            lock.release()
             
-    def update_active_profile_label(self):
-        """Update the Active Profile label to show the current profile."""
-        if hasattr(self, "current_profile_label"):
-            active_profile_text = f"Active Profile: {self.current_profile or 'None'}"
-            self.current_profile_label.config(text=active_profile_text)
-            
-    def update_profile_dropdown(self):
-        """Refresh the profile selection dropdown in the application."""
-        profiles_folder = os.path.join(
-            os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
+    def lock_profiles(self, action):
+        """Take the profiles lock for a change made from the window, or explain why it has to wait.
+
+        Returns the held lock, or None while the startup replay is still running or another
+        process (the write-back helper of the last session, for one) is changing profile folders.
+        """
+        lock = FileLock(PROFILES_LOCK_FILE)
+        if not self.replay_pending and lock.acquire(blocking=False):
+            return lock
+        messagebox.showinfo(
+            "Busy",
+            f"{action} has to wait: changes from the last session are still being written to the profiles. "
+            "Try again in a moment.",
         )
+        return None
+
+    def check_plan(self, plan, action):
+        """Refuse an operation that will not fit on disk and warn when it would leave little room."""
+        throughput = self.settings.get("copy_throughput_mb_s", 0)
+        summary = f"{action} writes {format_size(plan['write'])}"
+        if throughput and plan["write"]:
+            summary += f", about {format_duration(plan['write'] / (throughput * 1024 * 1024))}"
+        print(f"DEBUG: Plan: {summary}; volumes {list(plan['volumes'].values())}")
+
+        for info in plan["volumes"].values():
+            if info["need"] > info["free"]:
+                messagebox.showerror(
+                    "Not Enough Space",
+                    f"{summary}.\n\nIt needs {format_size(info['need'])} on {info['path']} "
+                    f"but only {format_size(info['free'])} is free.",
+                )
+                return False
+
+        low = [
+            f"{info['path']}: {format_size(info['free'] - info['need'])} left afterwards"
+            for info in plan["volumes"].values()
+            if info["need"] > 0 and info["free"] - info["need"] < PLAN_FREE_MARGIN
+        ]
+        if low:
+            return messagebox.askyesno(
+                "Low Disk Space", f"{summary}.\n\n" + "\n".join(low) + "\n\nContinue anyway?"
+            )
+        return True
 
-        if os.path.exists(profiles_folder):
-            profiles = [
-                name for name in os.listdir(profiles_folder)
-                if os.path.isdir(os.path.join(profiles_folder, name))
-            ]
-        else:
-            profiles = []
+    def record_throughput(self, plan, elapsed):
+        """Fold the measured copy speed into the running average used for estimates."""
+        if plan["write"] < THROUGHPUT_MIN_SAMPLE or elapsed <= 0:
+            return
+        measured = plan["write"] / elapsed / (1024 * 1024)
+        previous = self.settings.get("copy_throughput_mb_s", 0)
+        self.settings["copy_throughput_mb_s"] = round(measured if not previous else 0.7 * previous + 0.3 * measured, 1)
+        self.save_config()
+
+    def update_profile_dropdown(self):
+        """Refresh the profile selection dropdown in the application."""
+        profiles = sorted(load_profile_catalog())
 
         # Update dropdown or relevant UI component
         if hasattr(self, "profile_dropdown"):  # Assuming `profile_dropdown` is a combobox
@@ -1104,9 +5449,7 @@ class ModManagerApp:
     def save_profile(self):
         """Save the current Mods folder as a new profile."""
         try:
-            profiles_folder = os.path.join(
-                os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-            )
+            profiles_folder = PROFILES_FOLDER
             os.makedirs(profiles_folder, exist_ok=True)  # Ensure the profiles directory exists
             print(f"DEBUG: profiles_folder -> {profiles_folder}")
 
@@ -1118,16 +5461,7 @@ class ModManagerApp:
             popup.resizable(False, False)
 
             # Set the icon for the popup
-            if hasattr(sys, "_MEIPASS"):
-                icon_path = os.path.join(sys._MEIPASS, "app.ico")
-            else:
-                icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-            print(f"DEBUG: icon_path -> {icon_path}")
-
-            if os.path.exists(icon_path):
-                popup.iconbitmap(icon_path)
-            else:
-                print("DEBUG: app.ico not found for Save Profile popup.")
+            set_window_icon(popup)
 
             # Add label and entry for profile name
             tk.Label(popup, text="Enter a name for the profile:").pack(pady=10)
@@ -1163,31 +5497,32 @@ class ModManagerApp:
                     )
                     return
 
+                lock = self.lock_profiles(f"Saving profile '{profile_name}'")
+                if lock is None:
+                    return
                 try:
-                    # Create profile folder
-                    os.makedirs(profile_path)
-
-                    # Copy .pak files from Mods folder to profile
                     mods_folder = os.path.join(
                         self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods"
                     )
-                    for file in os.listdir(mods_folder):
-                        if file.endswith(".pak"):
-                            shutil.copy(
-                                os.path.join(mods_folder, file),
-                                os.path.join(profile_path, file),
-                            )
+                    plan = plan_copies(mod_group_pairs(mods_folder, profile_path))
+                    if not self.check_plan(plan, f"Saving profile '{profile_name}'"):
+                        return
+                    started = time.monotonic()
+
+                    # Create profile folder
+                    os.makedirs(profile_path)
+
+                    # Copy mod groups from Mods folder to profile
+                    copy_mod_groups(mods_folder, profile_path)
+                    self.record_throughput(plan, time.monotonic() - started)
 
                     # Save profile metadata
-                    profile_metadata = [
-                        file for file in os.listdir(mods_folder) if file.endswith(".pak")
-                    ]
-                    with open(os.path.join(profile_path, "profile.json"), "w") as json_file:
-                        json.dump(profile_metadata, json_file)
+                    profile_metadata = scan_profile_manifest(profile_path)
+                    write_json_atomic(os.path.join(profile_path, "profile.json"), profile_metadata)
+                    update_profile_catalog(profile_name, profile_metadata, used=True)
 
                     # Update active profile
                     self.current_profile = profile_name
-                    self.update_active_profile_label()
                     self.save_config()
 
                     popup.destroy()
@@ -1196,6 +5531,8 @@ class ModManagerApp:
                     messagebox.showerror(
                         "Error", f"An error occurred while saving the profile: {error}", parent=popup
                     )
+                finally:
+                    lock.release()
 
             # Add Save and Cancel buttons
             tk.Button(popup, text="Save", command=confirm_save).pack(pady=5)
@@ -1218,52 +5555,121 @@ class ModManagerApp:
 
 
     def load_profile(self):
-        """Load a selected profile from a dropdown menu with the option to delete profiles."""
+        """Load a selected profile from a sortable table with the option to delete profiles."""
         try:
             # Retrieve profiles folder
-            profiles_folder = os.path.join(
-                os.getenv("LOCALAPPDATA"), "MarvelRivalsModManager", "profiles"
-            )
+            profiles_folder = PROFILES_FOLDER
             if not os.path.exists(profiles_folder):
                 messagebox.showerror("Error", "Profiles folder not found.")
                 return
 
-            # Retrieve list of profiles
-            profiles = [
-                name for name in os.listdir(profiles_folder)
-                if os.path.isdir(os.path.join(profiles_folder, name))
-            ]
-            if not profiles:
+            # Profiles and their summaries come from the catalog, not a folder scan
+            catalog = load_profile_catalog()
+            if not catalog:
                 messagebox.showinfo("Info", "No profiles available to load.")
                 return
 
             # Exclude the current profile
-            profiles = [profile for profile in profiles if profile != self.current_profile]
+            profiles = [profile for profile in catalog if profile != self.current_profile]
             if not profiles:
                 messagebox.showinfo("Info", "No other profiles available to load.")
                 return
+            savings = catalog_savings(catalog)
 
             # Create popup for profile selection
             popup = tk.Toplevel(self.root)
             popup.title("Load Profile")
-            popup.geometry("400x200")
+            popup.geometry("560x460")
             popup.resizable(False, False)
 
             # Set popup icon
-            if hasattr(sys, "_MEIPASS"):
-                icon_path = os.path.join(sys._MEIPASS, "app.ico")
-            else:
-                icon_path = os.path.join(os.path.dirname(__file__), "app.ico")
-            if os.path.exists(icon_path):
-                popup.iconbitmap(icon_path)
+            set_window_icon(popup)
 
-            # Add label and dropdown
+            # Add label and a sortable table of profiles
             tk.Label(popup, text="Select a Profile to Load:").pack(pady=10)
-            profile_var = tk.StringVar(value=profiles[0])
-            profile_dropdown = ttk.Combobox(
-                popup, textvariable=profile_var, values=profiles, state="readonly"
+            profile_var = tk.StringVar(value="")
+            columns = ("mods", "size", "saved", "last_used")
+            headings = {"mods": "Mods", "size": "Size", "saved": "Shared", "last_used": "Last Used"}
+            table_frame = tk.Frame(popup)
+            table_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+            profile_table = ttk.Treeview(table_frame, columns=columns, height=10, selectmode="browse")
+            scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=profile_table.yview)
+            profile_table.configure(yscrollcommand=scrollbar.set)
+            profile_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+            # Raw values used for sorting; the table shows formatted text
+            sort_keys = {
+                "#0": lambda name: name.lower(),
+                "mods": lambda name: catalog[name]["mods"],
+                "size": lambda name: catalog[name]["bytes"],
+                "saved": lambda name: savings.get(name, 0),
+                "last_used": lambda name: catalog[name].get("last_used", 0),
+            }
+            sort_state = {"column": "#0", "reverse": False}
+
+            def sort_table(column):
+                if sort_state["column"] == column:
+                    sort_state["reverse"] = not sort_state["reverse"]
+                else:
+                    sort_state.update(column=column, reverse=column in ("size", "saved", "last_used"))
+                ordered = sorted(profile_table.get_children(), key=sort_keys[column], reverse=sort_state["reverse"])
+                for position, name in enumerate(ordered):
+                    profile_table.move(name, "", position)
+
+            profile_table.heading("#0", text="Profile", command=lambda: sort_table("#0"))
+            profile_table.column("#0", width=170)
+            for column in columns:
+                profile_table.heading(column, text=headings[column], command=lambda c=column: sort_table(c))
+                profile_table.column(column, width=80, anchor=tk.E)
+            profile_table.column("last_used", width=120, anchor=tk.E)
+
+            for name in sorted(profiles, key=str.lower):
+                entry = catalog[name]
+                last_used = entry.get("last_used", 0)
+                profile_table.insert("", tk.END, iid=name, text=name, values=(
+                    entry["mods"],
+                    format_size(entry["bytes"]),
+                    format_size(savings.get(name, 0)),
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used)) if last_used else "Never",
+                ))
+
+            # Preview of what the switch changes, computed from the stored manifests only
+            current_files = (
+                load_profile_manifest(os.path.join(profiles_folder, self.current_profile))["files"]
+                if self.current_profile else {}
             )
-            profile_dropdown.pack(pady=5)
+            pak_index = load_pak_index()
+            diff_label = tk.Label(popup, text="", justify=tk.CENTER)
+            diff_label.pack(pady=5)
+
+            def selected_diff():
+                target_files = load_profile_manifest(os.path.join(profiles_folder, profile_var.get()))["files"]
+                return diff_manifests(current_files, target_files, pak_index)
+
+            def update_diff_preview(event=None):
+                selection = profile_table.selection()
+                profile_var.set(selection[0] if selection else "")
+                if profile_var.get():
+                    diff_label.config(text=summarize_diff(selected_diff()))
+                else:
+                    diff_label.config(text="")
+
+            profile_table.bind("<<TreeviewSelect>>", update_diff_preview)
+            profile_table.bind("<Double-1>", lambda event: confirm_load())
+            first = profile_table.get_children()[0]
+            profile_table.selection_set(first)
+            profile_table.focus(first)
+            update_diff_preview()
+
+            buttons_frame = tk.Frame(popup)
+            buttons_frame.pack(pady=10)
+
+            tk.Button(
+                buttons_frame,
+                text="Compare",
+                command=lambda: self.show_profile_diff(self.current_profile, profile_var.get(), selected_diff()),
+            ).pack(side=tk.LEFT, padx=5)
 
             # Confirm Load Profile Logic
             def confirm_load():
@@ -1272,6 +5678,9 @@ class ModManagerApp:
                     messagebox.showerror("Error", "No profile selected.", parent=popup)
                     return
 
+                lock = self.lock_profiles(f"Loading profile '{selected_profile}'")
+                if lock is None:
+                    return
                 try:
                     # Load the selected profile
                     profile_path = os.path.join(profiles_folder, selected_profile)
@@ -1279,29 +5688,41 @@ class ModManagerApp:
                         self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods"
                     )
 
+                    # Space is checked before anything is removed, counting what the clear frees
+                    plan = plan_copies(
+                        mod_group_pairs(profile_path, mods_folder),
+                        removals=[os.path.join(mods_folder, file) for file in list_mod_files(mods_folder)],
+                    )
+                    if not self.check_plan(plan, f"Loading profile '{selected_profile}'"):
+                        return
+                    started = time.monotonic()
+
                     # Clear the Mods folder
-                    if os.path.exists(mods_folder):
-                        for file in os.listdir(mods_folder):
-                            if file.endswith(".pak"):
-                                os.remove(os.path.join(mods_folder, file))
+                    for file in list_mod_files(mods_folder):
+                        os.remove(os.path.join(mods_folder, file))
 
-                    # Copy profile .pak files to Mods
-                    for file in os.listdir(profile_path):
-                        if file.endswith(".pak"):
-                            shutil.copy(os.path.join(profile_path, file), mods_folder)
+                    # Copy profile mod groups to Mods
+                    copy_mod_groups(profile_path, mods_folder)
+                    self.record_throughput(plan, time.monotonic() - started)
 
                     # Update current profile
                     self.current_profile = selected_profile
-                    self.update_active_profile_label()
-                    self.update_pak_list()
+                    update_profile_catalog(selected_profile, used=True)
+                    self.request_snapshot(selected_profile, "load")
+                    self.request_refresh()
                     self.save_config()
 
                     popup.destroy()
                     messagebox.showinfo("Success", f"Profile '{selected_profile}' loaded.")
                 except Exception as error:
                     messagebox.showerror("Error", f"Failed to load profile: {error}")
+                finally:
+                    lock.release()
 
-            tk.Button(popup, text="Load", command=confirm_load).pack(pady=5)
+            tk.Button(buttons_frame, text="Load", command=confirm_load).pack(side=tk.LEFT, padx=5)
+            tk.Button(
+                buttons_frame, text="History", command=lambda: self.show_profile_history(profile_var.get())
+            ).pack(side=tk.LEFT, padx=5)
 
             # Delete Profile Logic
             def delete_profile():
@@ -1315,18 +5736,26 @@ class ModManagerApp:
                     f"Are you sure you want to delete the profile '{selected_profile}'?",
                     parent=popup,
                 )
-                if confirm:
+                lock = self.lock_profiles(f"Deleting profile '{selected_profile}'") if confirm else None
+                if lock is not None:
                     try:
                         shutil.rmtree(os.path.join(profiles_folder, selected_profile))
-                        profiles.remove(selected_profile)
-                        profile_dropdown["values"] = profiles
-                        profile_var.set(profiles[0] if profiles else "")
+                        remove_from_profile_catalog(selected_profile)
+                        if selected_profile in self.state.favorites.get():
+                            self.set_favorites([name for name in self.state.favorites.get() if name != selected_profile])
+                        profile_table.delete(selected_profile)
+                        remaining = profile_table.get_children()
+                        if remaining:
+                            profile_table.selection_set(remaining[0])
+                        update_diff_preview()
                         messagebox.showinfo("Success", f"Profile '{selected_profile}' deleted.")
                     except Exception as error:
                         messagebox.showerror("Error", f"Failed to delete profile: {error}")
+                    finally:
+                        lock.release()
 
-            tk.Button(popup, text="Delete Profile", command=delete_profile).pack(pady=5)
-            tk.Button(popup, text="Cancel", command=popup.destroy).pack(pady=5)
+            tk.Button(buttons_frame, text="Delete Profile", command=delete_profile).pack(side=tk.LEFT, padx=5)
+            tk.Button(buttons_frame, text="Cancel", command=popup.destroy).pack(side=tk.LEFT, padx=5)
 
             # Center the popup after geometry is set
             self.root.after(10, lambda: self.center_popup(popup))
@@ -1334,8 +5763,241 @@ class ModManagerApp:
         except Exception as error:
             messagebox.showerror("Error", f"An unexpected error occurred: {error}")
 
+    def request_snapshot(self, profile_name, reason):
+        """Snapshot a profile in the background (hashing and storing its files can take a while)."""
+        if not profile_name:
+            return
+        self.scheduler.submit(
+            f"snapshot:{profile_name}", lambda job: take_snapshot(profile_name, reason), PRIORITY_BACKGROUND,
+            background=True, description=f"Snapshotting '{profile_name}'", heavy=True,
+        )
+
+    def show_profile_history(self, profile_name):
+        """List a profile's snapshots with the option to roll back to one."""
+        if not profile_name:
+            messagebox.showerror("Error", "No profile selected.")
+            return
+        history = list_snapshots(profile_name)
+        if not history:
+            messagebox.showinfo("Profile History", f"Profile '{profile_name}' has no snapshots yet.")
+            return
+
+        popup = tk.Toplevel(self.root)
+        popup.title(f"History: {profile_name}")
+        popup.geometry("520x360")
+        set_window_icon(popup)
+        self.root.after(10, lambda: self.center_popup(popup))
+
+        columns = ("reason", "mods", "size")
+        table = ttk.Treeview(popup, columns=columns, height=10, selectmode="browse")
+        table.heading("#0", text="Taken")
+        table.heading("reason", text="On")
+        table.heading("mods", text="Mods")
+        table.heading("size", text="Size")
+        table.column("#0", width=160)
+        for column in columns:
+            table.column(column, width=90, anchor=tk.E)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        snapshots = {}
+        for snapshot_path, snapshot in reversed(history):  # Newest first
+            snapshots[snapshot_path] = snapshot
+            table.insert("", tk.END, iid=snapshot_path, text=time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(snapshot["created"])
+            ), values=(
+                snapshot["reason"],
+                len(snapshot["mods"]),
+                format_size(sum(record["size"] for record in snapshot["files"].values())),
+            ))
+
+        def compare():
+            selection = table.selection()
+            if selection:
+                current_files = load_profile_manifest(os.path.join(PROFILES_FOLDER, profile_name))["files"]
+                diff = diff_manifests(current_files, snapshots[selection[0]]["files"], load_pak_index())
+                self.show_profile_diff(profile_name, table.item(selection[0], "text"), diff)
+
+        def roll_back():
+            selection = table.selection()
+            if selection and self.roll_back_profile(profile_name, snapshots[selection[0]]):
+                popup.destroy()
+
+        buttons_frame = tk.Frame(popup)
+        buttons_frame.pack(pady=(0, 10))
+        tk.Button(buttons_frame, text="Compare", command=compare).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Roll Back", command=roll_back).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Close", command=popup.destroy).pack(side=tk.LEFT, padx=5)
+
+    def roll_back_profile(self, profile_name, snapshot):
+        """Restore a profile (and the Mods folder when it is active) to a snapshot, copying only what differs."""
+        profile_path = os.path.join(PROFILES_FOLDER, profile_name)
+        folders = [profile_path]
+        if profile_name == self.current_profile and self.selected_folder:
+            folders.append(os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods"))
+
+        lock = self.lock_profiles(f"Rolling back '{profile_name}'")
+        if lock is None:
+            return False
+        try:
+            # The state being replaced gets a snapshot of its own, so a rollback can be undone
+            take_snapshot(profile_name, "rollback")
+
+            plans = [plan_restore(folder, snapshot["files"]) for folder in folders]
+            plan = plan_copies(
+                [pairs for groups, _ in plans for pairs in groups],
+                removals=[path for _, removals in plans for path in removals],
+            )
+            if not self.check_plan(plan, f"Rolling back '{profile_name}'"):
+                return False
+            for groups, removals in plans:
+                restore_files(groups, removals)
+
+            manifest = {"mods": snapshot["mods"], "files": snapshot["files"]}
+            write_json_atomic(os.path.join(profile_path, "profile.json"), manifest)
+            update_profile_catalog(profile_name, manifest)
+            if profile_name == self.current_profile:
+                self.request_refresh()
+            messagebox.showinfo("Success", f"Profile '{profile_name}' rolled back.")
+            return True
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to roll back profile: {e}")
+            return False
+        finally:
+            lock.release()
+
+    def bulk_edit_profiles(self):
+        """Add, remove or replace mods in every profile matching a pattern, without loading any of them."""
+        popup = tk.Toplevel(self.root)
+        popup.title("Bulk Edit Profiles")
+        popup.geometry("520x480")
+        set_window_icon(popup)
+        self.root.after(10, lambda: self.center_popup(popup))
+
+        tk.Label(popup, text="Profiles matching (* and ? allowed):").pack(pady=(10, 0))
+        profile_var = tk.StringVar(value="*")
+        tk.Entry(popup, textvariable=profile_var, width=40).pack()
+
+        tk.Label(popup, text="Remove mods matching:").pack(pady=(10, 0))
+        remove_var = tk.StringVar()
+        tk.Entry(popup, textvariable=remove_var, width=40).pack()
+
+        tk.Label(popup, text="Add mods:").pack(pady=(10, 0))
+        add_paths = []
+        add_label = tk.Label(popup, text="None", wraplength=480)
+        add_label.pack()
+
+        def choose_mods():
+            paths = filedialog.askopenfilenames(parent=popup, filetypes=[("Mod Files", "*.pak *.utoc *.ucas")])
+            for path in paths:
+                pak_path = group_pak_path(path) or os.path.splitext(path)[0] + ".pak"
+                if pak_path not in add_paths:
+                    add_paths.append(pak_path)
+            add_label.config(text=", ".join(os.path.basename(path) for path in add_paths) or "None")
+
+        def clear_mods():
+            add_paths.clear()
+            add_label.config(text="None")
+
+        add_frame = tk.Frame(popup)
+        add_frame.pack(pady=5)
+        tk.Button(add_frame, text="Choose...", command=choose_mods).pack(side=tk.LEFT, padx=5)
+        tk.Button(add_frame, text="Clear", command=clear_mods).pack(side=tk.LEFT, padx=5)
+
+        preview = tk.Text(popup, wrap=tk.WORD, height=10)
+        preview.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        def describe(changes):
+            lines = []
+            for profile, (removed, added) in changes.items():
+                marker = " (active, Mods folder too)" if profile == self.current_profile else ""
+                lines.append(f"{profile}{marker}")
+                lines += [f"  - {pak}" for pak in removed] + [f"  + {pak}" for pak in added]
+            return "\n".join(lines) or "No profile would change."
+
+        def show_preview():
+            try:
+                _, changes = plan_bulk_change(profile_var.get(), remove_var.get(), add_paths, stage=False)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to plan the bulk edit: {e}", parent=popup)
+                return
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            preview.insert(tk.END, describe(changes))
+            preview.config(state=tk.DISABLED)
+
+        def run_edit():
+            profile_pattern, remove_pattern, paths = profile_var.get(), remove_var.get(), list(add_paths)
+            if not remove_pattern and not paths:
+                messagebox.showerror("Error", "Enter mods to remove or choose mods to add.", parent=popup)
+                return
+            mods_folder = None
+            if self.selected_folder:
+                mods_folder = os.path.join(self.selected_folder, "MarvelGame", "Marvel", "Content", "Paks", "Mods")
+
+            active_profile = self.current_profile
+
+            def run(job):
+                # Staging, hashing and the per-profile snapshots run on the worker; results go back through after()
+                try:
+                    changes = run_bulk_change(profile_pattern, remove_pattern, paths, mods_folder, active_profile)
+                except Exception as e:
+                    error = e
+                    self.root.after(0, lambda: messagebox.showerror(
+                        "Error",
+                        f"Bulk edit stopped: {error}\n\nIt will be finished on the next launch. "
+                        "Each affected profile also has a 'before bulk edit' snapshot to roll back to.",
+                    ))
+                    raise
+                self.root.after(0, lambda: finish_edit(changes))
+
+            def finish_edit(changes):
+                if changes is None:
+                    messagebox.showerror("Error", "Another bulk edit is still being finished. Try again shortly.")
+                    return
+                if active_profile in changes:
+                    self.request_refresh()
+                if popup.winfo_exists():
+                    popup.destroy()
+                messagebox.showinfo("Bulk Edit", f"Edited {len(changes)} profile(s).\n\n{describe(changes)}")
+
+            self.scheduler.submit("bulk_edit", run, PRIORITY_USER, background=True, description="Editing profiles")
+
+        buttons = tk.Frame(popup)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Preview", command=show_preview).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Run", command=run_edit).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Close", command=popup.destroy).pack(side=tk.LEFT, padx=5)
+
+    def show_profile_diff(self, current_profile, target_profile, diff):
+        """Show the full manifest diff between the active profile and another profile."""
+        popup = tk.Toplevel(self.root)
+        popup.title(f"Compare: {current_profile or 'None'} -> {target_profile}")
+        popup.geometry("600x400")
+        self.root.after(10, lambda: self.center_popup(popup))
+
+        text = tk.Text(popup, wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        text.insert(tk.END, summarize_diff(diff) + "\n\n")
+        for file, size in diff["added"]:
+            text.insert(tk.END, f"+ {file} ({format_size(size)})\n")
+        for file, size in diff["removed"]:
+            text.insert(tk.END, f"- {file} ({format_size(size)})\n")
+        for file, old_size, new_size in diff["changed"]:
+            text.insert(tk.END, f"~ {file} ({format_size(old_size)} -> {format_size(new_size)})\n")
+        if diff["assets"] is not None:
+            for asset in diff["assets"]["added"]:
+                text.insert(tk.END, f"+ asset {asset}\n")
+            for asset in diff["assets"]["removed"]:
+                text.insert(tk.END, f"- asset {asset}\n")
+        text.config(state=tk.DISABLED)
+
+        tk.Button(popup, text="Close", command=popup.destroy).pack(pady=(0, 10))
+
     def apply_profile(self, profile_name):
         """Apply the mods from the selected profile."""
+        lock = self.lock_profiles(f"Loading profile '{profile_name}'")
+        if lock is None:
+            return
         try:
             profiles_folder = os.path.join(BACKUP_FOLDER, "Profiles")
             profile_folder = os.path.join(profiles_folder, profile_name)
@@ -1363,19 +6025,20 @@ class ModManagerApp:
                 source_path = os.path.join(profile_folder, pak)
                 destination_path = os.path.join(mods_folder, pak)
                 if not os.path.exists(destination_path):
-                    shutil.copy2(source_path, destination_path)
+                    copy_file(source_path, destination_path)
 
             # Update the current profile
             self.current_profile = profile_name
             self.save_config()  # Save the updated profile to config
 
-            # Refresh the UI and reapply the theme
-            self.show_mod_manager()
-            self.apply_theme()
+            # The profile label follows the state; the Mods list needs a rescan
+            self.request_refresh()
 
             messagebox.showinfo("Success", f"Profile '{profile_name}' loaded successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to apply profile: {e}")
+        finally:
+            lock.release()
 
     def launch_game(self):
         """Confirm and launch the game via Steam."""
@@ -1383,7 +6046,11 @@ class ModManagerApp:
         if confirm:
             try:
                 # Run the command silently
-                subprocess.run(["cmd", "/c", "start", "steam://rungameid/2767030"], shell=True)
+                if IS_WINDOWS:
+                    subprocess.run(["cmd", "/c", "start", f"steam://rungameid/{STEAM_APP_ID}"], shell=True)
+                else:
+                    # Steam starts the game through Proton
+                    open_path(f"steam://rungameid/{STEAM_APP_ID}")
                 messagebox.showinfo("Success", "The game has been launched!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to launch the game: {e}")
@@ -1403,6 +6070,36 @@ class ModManagerApp:
 
 
 if __name__ == "__main__":
+    # Needed for the verify process pool in the frozen exe
+    multiprocessing.freeze_support()
+
+    if "--finish-sync" in sys.argv:
+        # Detached write-back helper started by on_exit; it may run while the game is starting
+        IO_GOVERNOR.limit = load_settings()["game_io_limit_mb_s"] * 1024 * 1024
+        with IO_GOVERNOR.start().governed():
+            try:
+                replay_sync_journals()
+            except Exception as e:
+                print(f"ERROR: Write-back stopped, it resumes on the next launch: {e}")
+        sys.exit(0)
+
+    # Files passed by a file association or drag onto the exe
+    file_args = [os.path.abspath(arg) for arg in sys.argv[1:] if not arg.startswith("--")]
+
+    # A second launch forwards its arguments to the running instance and exits
+    instance = InstanceServer()
+    if not instance.acquire():
+        if forward_to_running_instance(file_args):
+            sys.exit(0)
+        print("ERROR: Another instance is running but did not respond.")
+        sys.exit(1)
+
     root = tk.Tk()
     app = ModManagerApp(root)
+    instance.listen(
+        lambda message: root.after(0, lambda: app.handle_forwarded_args(message.get("argv", [])))
+    )
+    if file_args:
+        root.after_idle(lambda: app.add_mod_files(file_args))
     root.mainloop()
+    instance.close()
@@ -0,0 +1,37 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# The app data folder is fixed when the module is imported, so point it at a scratch folder first
+_DATA_ROOT = tempfile.mkdtemp(prefix="mrmm-tests-")
+os.environ["LOCALAPPDATA"] = _DATA_ROOT
+os.environ["XDG_DATA_HOME"] = _DATA_ROOT
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MarvelRivalsModManager as mm  # noqa: E402
+
+
+@pytest.fixture
+def app_data():
+    """An empty app data folder, with the module's in-memory caches dropped."""
+    shutil.rmtree(mm.APPDATA_FOLDER, ignore_errors=True)
+    os.makedirs(mm.APPDATA_FOLDER)
+    mm._hash_cache = None
+    mm._profile_catalog = None
+    mm.reset_asset_index()
+    yield mm.APPDATA_FOLDER
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
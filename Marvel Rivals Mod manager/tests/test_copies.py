@@ -0,0 +1,178 @@
+import json
+import os
+
+import pytest
+
+from conftest import mm, read_file, write_file
+
+CHUNK = 1024
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def no_reflink(monkeypatch):
+    # Clones finish in one call, so the chunked paths are only taken without them
+    monkeypatch.setattr(mm, "reflink_copy", lambda source, destination: False)
+
+
+def interrupt_after(monkeypatch, calls):
+    """Make the copy loops fail on their next throttle call after `calls` of them."""
+    count = {"calls": 0}
+
+    def throttle(num_bytes):
+        count["calls"] += 1
+        if count["calls"] > calls:
+            raise Interrupted()
+
+    monkeypatch.setattr(mm.IO_GOVERNOR, "throttle", throttle)
+
+
+def test_resumable_copy_resumes_from_checkpoint(app_data, tmp_path, monkeypatch, no_reflink, capsys):
+    data = os.urandom(10 * CHUNK)
+    source = write_file(str(tmp_path / "mod.pak"), data)
+    partial = str(tmp_path / "out" / "mod.pak.partial")
+    os.makedirs(os.path.dirname(partial))
+
+    interrupt_after(monkeypatch, 3)
+    with pytest.raises(Interrupted):
+        mm.resumable_copy(source, partial, chunk_size=CHUNK)
+    with open(partial + mm.CHECKPOINT_SUFFIX) as f:
+        assert len(json.load(f)["chunks"]) == 3
+
+    monkeypatch.undo()
+    mm.resumable_copy(source, partial, chunk_size=CHUNK)
+    assert "Resuming copy" in capsys.readouterr().out
+    assert read_file(partial) == data
+    assert not os.path.exists(partial + mm.CHECKPOINT_SUFFIX)
+
+
+def test_resumable_copy_redoes_a_damaged_last_chunk(app_data, tmp_path, monkeypatch, no_reflink):
+    data = os.urandom(6 * CHUNK)
+    source = write_file(str(tmp_path / "mod.pak"), data)
+    partial = str(tmp_path / "mod.pak.partial")
+
+    interrupt_after(monkeypatch, 2)
+    with pytest.raises(Interrupted):
+        mm.resumable_copy(source, partial, chunk_size=CHUNK)
+    with open(partial, "r+b") as f:
+        f.seek(CHUNK + 10)
+        f.write(b"\xff")
+
+    monkeypatch.undo()
+    mm.resumable_copy(source, partial, chunk_size=CHUNK)
+    assert read_file(partial) == data
+
+
+def test_resumable_copy_restarts_when_the_source_changed(app_data, tmp_path, monkeypatch, no_reflink):
+    source = write_file(str(tmp_path / "mod.pak"), os.urandom(6 * CHUNK))
+    partial = str(tmp_path / "mod.pak.partial")
+
+    interrupt_after(monkeypatch, 2)
+    with pytest.raises(Interrupted):
+        mm.resumable_copy(source, partial, chunk_size=CHUNK)
+
+    monkeypatch.undo()
+    data = os.urandom(5 * CHUNK)
+    write_file(source, data)
+    mm.resumable_copy(source, partial, chunk_size=CHUNK)
+    assert read_file(partial) == data
+
+
+def test_interrupted_full_copy_leaves_destination_intact(app_data, tmp_path, monkeypatch, no_reflink):
+    source = write_file(str(tmp_path / "src" / "mod.pak"), b"new" * 1000)
+    destination = write_file(str(tmp_path / "dst" / "mod.pak"), b"old")
+    monkeypatch.setattr(mm, "RESUMABLE_COPY_THRESHOLD", 0)
+
+    interrupt_after(monkeypatch, 0)
+    with pytest.raises(Interrupted):
+        mm.full_copy(source, destination)
+    assert read_file(destination) == b"old"
+
+    monkeypatch.undo()
+    mm.full_copy(source, destination)
+    assert read_file(destination) == b"new" * 1000
+    assert os.listdir(os.path.dirname(destination)) == ["mod.pak"]
+
+
+@pytest.fixture
+def clone_by_copy(monkeypatch):
+    # Stands in for a copy-on-write clone on filesystems without one
+    def clone(source, destination):
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            dst.write(src.read())
+        return True
+
+    monkeypatch.setattr(mm, "reflink_copy", clone)
+
+
+def patched(data, index, byte=b"\x00"):
+    return data[: index * CHUNK] + byte * CHUNK + data[(index + 1) * CHUNK:]
+
+
+def test_delta_copy_rewrites_only_changed_blocks(app_data, tmp_path, clone_by_copy):
+    old = os.urandom(8 * CHUNK)
+    new = patched(old, 3)
+    source = write_file(str(tmp_path / "src" / "mod.pak"), new)
+    destination = write_file(str(tmp_path / "dst" / "mod.pak"), old)
+
+    assert mm.delta_copy(source, destination, chunk_size=CHUNK) == CHUNK
+    assert read_file(destination) == new
+    assert os.listdir(os.path.dirname(destination)) == ["mod.pak"]
+
+
+def test_interrupted_delta_copy_leaves_destination_intact(app_data, tmp_path, monkeypatch, clone_by_copy):
+    old = os.urandom(8 * CHUNK)
+    new = patched(patched(old, 1), 6)
+    source = write_file(str(tmp_path / "src" / "mod.pak"), new)
+    destination = write_file(str(tmp_path / "dst" / "mod.pak"), old)
+
+    interrupt_after(monkeypatch, 4)
+    with pytest.raises(Interrupted):
+        mm.delta_copy(source, destination, chunk_size=CHUNK)
+    assert read_file(destination) == old
+    assert os.listdir(os.path.dirname(destination)) == ["mod.pak"]
+
+    monkeypatch.setattr(mm.IO_GOVERNOR, "throttle", lambda num_bytes: None)
+    assert mm.delta_copy(source, destination, chunk_size=CHUNK) == 2 * CHUNK
+    assert read_file(destination) == new
+
+
+def test_delta_copy_falls_back_on_a_stale_signature(app_data, tmp_path, clone_by_copy):
+    old = os.urandom(4 * CHUNK)
+    new = patched(old, 2)
+    source = write_file(str(tmp_path / "src" / "mod.pak"), new)
+    destination = write_file(str(tmp_path / "dst" / "mod.pak"), old)
+
+    # The index claims the destination already holds the new blocks, so nothing would be patched
+    stat = os.stat(destination)
+    mm.update_pak_index({"stale": {"chunk_size": CHUNK, "chunks": mm.chunk_signature(source, CHUNK)}})
+    with mm._hash_cache_lock:
+        mm.load_hash_cache()[os.path.normcase(os.path.abspath(destination))] = [stat.st_size, stat.st_mtime_ns, "stale"]
+
+    assert mm.delta_copy(source, destination, chunk_size=CHUNK) == len(new)
+    assert read_file(destination) == new
+
+
+def test_delta_copy_without_clones_copies_in_full(app_data, tmp_path, no_reflink):
+    old = os.urandom(4 * CHUNK)
+    new = patched(old, 0)
+    source = write_file(str(tmp_path / "src" / "mod.pak"), new)
+    destination = write_file(str(tmp_path / "dst" / "mod.pak"), old)
+
+    assert mm.delta_copy(source, destination, chunk_size=CHUNK) == len(new)
+    assert read_file(destination) == new
+
+
+def test_delta_copy_never_patches_a_hard_linked_file(app_data, tmp_path, clone_by_copy):
+    old = os.urandom(4 * CHUNK)
+    source = write_file(str(tmp_path / "src" / "mod.pak"), patched(old, 1))
+    destination = write_file(str(tmp_path / "dst" / "mod.pak"), old)
+    stored = str(tmp_path / "store")
+    os.link(destination, stored)
+
+    mm.delta_copy(source, destination, chunk_size=CHUNK)
+    assert read_file(destination) == read_file(source)
+    assert read_file(stored) == old
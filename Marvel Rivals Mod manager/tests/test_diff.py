@@ -0,0 +1,53 @@
+from conftest import mm
+
+
+def record(size, digest=None):
+    return {"size": size, "hash": digest} if digest else {"size": size}
+
+
+def test_added_removed_and_changed():
+    current = {"keep.pak": record(10, "k"), "old.pak": record(20, "o"), "swap.pak": record(30, "s1")}
+    target = {"keep.pak": record(10, "k"), "new.pak": record(40, "n"), "swap.pak": record(35, "s2")}
+
+    diff = mm.diff_manifests(current, target)
+
+    assert diff["added"] == [("new.pak", 40)]
+    assert diff["removed"] == [("old.pak", 20)]
+    assert diff["changed"] == [("swap.pak", 30, 35)]
+    assert diff["unchanged"] == 1
+    assert diff["bytes_to_copy"] == 75
+    assert diff["assets"] is None
+
+
+def test_hashes_win_over_sizes():
+    # Same size, different content; and different recorded size, same content
+    current = {"a.pak": record(10, "x"), "b.pak": record(10, "y")}
+    target = {"a.pak": record(10, "z"), "b.pak": record(12, "y")}
+
+    diff = mm.diff_manifests(current, target)
+
+    assert diff["changed"] == [("a.pak", 10, 10)]
+    assert diff["unchanged"] == 1
+
+
+def test_sizes_decide_without_hashes():
+    current = {"a.pak": record(10), "b.pak": record(10, "y")}
+    target = {"a.pak": record(11), "b.pak": record(10)}
+
+    diff = mm.diff_manifests(current, target)
+
+    assert diff["changed"] == [("a.pak", 10, 11)]
+    assert diff["unchanged"] == 1
+
+
+def test_asset_overlap_needs_every_pak_analysed():
+    current = {"a_P.pak": record(10, "a"), "a_P.utoc": record(5, "au")}
+    target = {"b_P.pak": record(10, "b")}
+    pak_index = {"a": {"assets": ["/Game/Hero/Mesh", "/Game/Hero/Tex"]}, "b": {"assets": ["/Game/Hero/Tex", "/Game/Map"]}}
+
+    diff = mm.diff_manifests(current, target, pak_index)
+    assert diff["assets"] == {"added": ["/Game/Map"], "removed": ["/Game/Hero/Mesh"], "shared": 1}
+    assert "Assets: +1 -1 shared 1" in mm.summarize_diff(diff)
+
+    del pak_index["b"]["assets"]
+    assert mm.diff_manifests(current, target, pak_index)["assets"] is None
@@ -0,0 +1,84 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import mm, write_file
+
+
+def run(collector):
+    while collector.step():
+        pass
+    return collector
+
+
+@pytest.fixture
+def garbage(app_data):
+    """A kept profile, plus the leftovers of a deleted one and a dead session."""
+    write_file(os.path.join(mm.PROFILES_FOLDER, "Keep", "Keep_P.pak"), b"keep" * 100)
+    mm.take_snapshot("Keep", "test")
+    write_file(os.path.join(mm.PROFILES_FOLDER, "Gone", "Gone_P.pak"), b"gone" * 100)
+    mm.take_snapshot("Gone", "test")
+    gone_hash = mm.cached_hash(os.path.join(mm.PROFILES_FOLDER, "Gone", "Gone_P.pak"))
+    shutil.rmtree(os.path.join(mm.PROFILES_FOLDER, "Gone"))
+
+    write_file(os.path.join(mm.BACKUP_FOLDER, "Profiles", "Gone", "old_P.pak"), b"old")
+    write_file(os.path.join(mm.TEMP_FOLDER, "999999999-dead", "x.pak"), b"x")
+    return {
+        "kept_snapshots": os.path.join(mm.SNAPSHOTS_FOLDER, "Keep"),
+        "kept_content": mm.content_path(mm.cached_hash(os.path.join(mm.PROFILES_FOLDER, "Keep", "Keep_P.pak"))),
+        "gone_snapshots": os.path.join(mm.SNAPSHOTS_FOLDER, "Gone"),
+        "gone_content": mm.content_path(gone_hash),
+        "gone_backup": os.path.join(mm.BACKUP_FOLDER, "Profiles", "Gone"),
+        "dead_temp": os.path.join(mm.TEMP_FOLDER, "999999999-dead"),
+    }
+
+
+def test_dry_run_reports_without_deleting(garbage, monkeypatch):
+    monkeypatch.setattr(mm, "pid_alive", lambda pid: False)
+    collector = run(mm.GarbageCollector(delete=False))
+
+    summary = collector.summary()
+    assert summary["Unreferenced stored files"] == [1, 400]
+    assert summary["Snapshots of deleted profiles"][0] == 1
+    assert summary["Backups of deleted profiles"] == [1, 3]
+    assert summary["Leftover temp folders"] == [1, 1]
+    assert collector.reclaimed == 0
+    assert all(os.path.exists(path) for path in garbage.values())
+
+
+def test_delete_removes_only_garbage(garbage, monkeypatch):
+    monkeypatch.setattr(mm, "pid_alive", lambda pid: False)
+    collector = run(mm.GarbageCollector(delete=True))
+
+    assert collector.reclaimed > 0
+    for key in ("gone_snapshots", "gone_content", "gone_backup", "dead_temp"):
+        assert not os.path.exists(garbage[key]), key
+    for key in ("kept_snapshots", "kept_content"):
+        assert os.path.exists(garbage[key]), key
+
+
+def test_profile_created_during_the_run_is_kept(garbage, monkeypatch):
+    monkeypatch.setattr(mm, "pid_alive", lambda pid: False)
+    collector = mm.GarbageCollector(delete=True)
+    next(collector._work)  # Profiles listed and marked
+
+    os.makedirs(os.path.join(mm.PROFILES_FOLDER, "Gone"))
+    run(collector)
+
+    assert os.path.exists(garbage["gone_snapshots"])
+    assert os.path.exists(garbage["gone_backup"])
+
+
+def test_stale_hash_cache_entries_are_dropped(app_data, tmp_path):
+    path = write_file(str(tmp_path / "a.pak"), b"a")
+    mm.cached_hash(path)
+    mm.save_hash_cache()
+    os.remove(path)
+
+    dry = run(mm.GarbageCollector(delete=False))
+    assert dry.summary()["Stale index entries"][0] == 1
+    assert os.path.normcase(os.path.abspath(path)) in mm.load_hash_cache()
+
+    run(mm.GarbageCollector(delete=True))
+    assert os.path.normcase(os.path.abspath(path)) not in mm.load_hash_cache()
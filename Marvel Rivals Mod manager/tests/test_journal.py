@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from conftest import mm, read_file, write_file
+
+
+def write_journal(path, ops, done=0):
+    mm.write_json_atomic(path, {"id": "test", "created": 0, "done": done, "ops": ops})
+
+
+def test_replay_resumes_after_checkpoint(app_data, tmp_path):
+    first = write_file(str(tmp_path / "first.pak"), b"first")
+    second = write_file(str(tmp_path / "second.pak"), b"second")
+    journal_path = os.path.join(app_data, "pending_sync-1.json")
+    write_journal(journal_path, [{"op": "remove", "path": first}, {"op": "remove", "path": second}], done=1)
+
+    mm._replay_journal(journal_path)
+
+    # The step before the checkpoint is not run again
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert not os.path.exists(journal_path)
+
+
+def test_failed_step_keeps_checkpoint_and_resumes(app_data, tmp_path, monkeypatch):
+    removed = write_file(str(tmp_path / "old.pak"), b"old")
+    source = write_file(str(tmp_path / "src" / "new.pak"), b"new")
+    destination = str(tmp_path / "profile" / "new.pak")
+    journal_path = os.path.join(app_data, "pending_sync-1.json")
+    write_journal(journal_path, [
+        {"op": "remove", "path": removed},
+        {"op": "copy", "src": source, "dst": destination},
+    ])
+
+    def failing_copy(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mm, "full_copy", failing_copy)
+    with pytest.raises(OSError):
+        mm._replay_journal(journal_path)
+    with open(journal_path) as f:
+        assert json.load(f)["done"] == 1
+    assert not os.path.exists(removed)
+
+    monkeypatch.undo()
+    mm._replay_journal(journal_path)
+    assert read_file(destination) == b"new"
+    assert not os.path.exists(journal_path)
+
+
+def test_replaced_journal_is_left_alone(app_data, tmp_path, monkeypatch):
+    target = write_file(str(tmp_path / "a.pak"), b"a")
+    journal_path = os.path.join(app_data, "pending_bulk.json")
+    write_journal(journal_path, [{"op": "remove", "path": target}])
+
+    # Another process swaps in a new journal while this one replays its first step
+    original = mm._journal_is
+
+    def replaced(path, journal):
+        mm.write_json_atomic(path, {"id": "newer", "created": 0, "done": 0, "ops": []})
+        return original(path, journal)
+
+    monkeypatch.setattr(mm, "_journal_is", replaced)
+    mm._replay_journal(journal_path)
+
+    with open(journal_path) as f:
+        assert json.load(f)["id"] == "newer"
+
+
+def test_replay_sync_journals_runs_sessions_in_order(app_data, tmp_path):
+    target = str(tmp_path / "profile" / "mod.pak")
+    older = write_file(str(tmp_path / "older.pak"), b"older")
+    newer = write_file(str(tmp_path / "newer.pak"), b"newer")
+    write_journal(mm.SYNC_JOURNAL_PATTERN.replace("*", "1"), [{"op": "copy", "src": older, "dst": target}])
+    write_journal(mm.SYNC_JOURNAL_PATTERN.replace("*", "2"), [{"op": "copy", "src": newer, "dst": target}])
+
+    assert mm.replay_sync_journals()
+    assert read_file(target) == b"newer"
+    assert mm.pending_sync_journals() == []
+
+
+def test_unreadable_journal_is_discarded(app_data):
+    journal_path = write_file(os.path.join(app_data, "pending_sync-1.json"), b"{not json")
+    mm._replay_journal(journal_path)
+    assert not os.path.exists(journal_path)
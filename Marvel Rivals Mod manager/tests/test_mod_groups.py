@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from conftest import mm, write_file
+
+
+def test_groups_match_extensions_in_any_case():
+    groups = mm.group_mod_files(["Hero_P.PAK", "Hero_P.Utoc", "Hero_P.UCAS", "Map_P.pak", "readme.txt"])
+
+    assert groups == {"Hero_P.PAK": ["Hero_P.PAK", "Hero_P.Utoc", "Hero_P.UCAS"], "Map_P.pak": ["Map_P.pak"]}
+
+
+def test_containers_without_a_pak_are_not_a_mod():
+    assert mm.group_mod_files(["Lone_P.utoc", "Lone_P.ucas"]) == {}
+
+
+def test_pak_comes_first_then_utoc_then_ucas():
+    groups = mm.group_mod_files(["a_P.ucas", "a_P.utoc", "a_P.pak"])
+    assert groups["a_P.pak"] == ["a_P.pak", "a_P.utoc", "a_P.ucas"]
+
+
+@pytest.mark.skipif(os.path.normcase("A") != "a", reason="file names are case sensitive here")
+def test_stems_match_in_any_case_where_names_do():
+    groups = mm.group_mod_files(["Hero_P.pak", "hero_p.utoc"])
+    assert groups == {"Hero_P.pak": ["Hero_P.pak", "hero_p.utoc"]}
+
+
+def test_group_paths_on_disk(tmp_path):
+    pak = write_file(str(tmp_path / "Hero_P.pak"), b"p")
+    utoc = write_file(str(tmp_path / "Hero_P.UTOC"), b"t")
+    write_file(str(tmp_path / "Other_P.ucas"), b"o")
+
+    assert mm.mod_group_paths(pak) == [pak, utoc]
+    assert mm.group_pak_path(utoc) == pak
+    assert mm.group_pak_path(str(tmp_path / "Other_P.ucas")) is None
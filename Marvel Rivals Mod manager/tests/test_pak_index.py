@@ -0,0 +1,83 @@
+import struct
+
+import pytest
+
+from conftest import mm, write_file
+
+MOUNT_POINT = "../../../Marvel/Content/"
+NAMES = ["Characters/Hero/Mesh.uasset", "Characters/Hero/Mesh.uexp", "UI/Icon.uasset"]
+EXPECTED = [
+    "/Game/Characters/Hero/Mesh.uasset",
+    "/Game/Characters/Hero/Mesh.uexp",
+    "/Game/UI/Icon.uasset",
+]
+
+
+def fstring(text):
+    data = text.encode() + b"\0"
+    return struct.pack("<i", len(data)) + data
+
+
+def make_v3_pak(path):
+    """A version 3 pak: index entries are listed with their full FPakEntry."""
+    body = b"\0" * 64
+    index = fstring(MOUNT_POINT) + struct.pack("<i", len(NAMES))
+    for name in NAMES:
+        # Offset, sizes, no compression, SHA-1, flags and block size
+        index += fstring(name) + struct.pack("<qqqi", 0, 0, 0, 0) + b"\0" * 20 + b"\0" * 5
+    footer = struct.pack("<IiqQ", mm.PAK_MAGIC, 3, len(body), len(index)) + b"\0" * 20
+    return write_file(path, body + index + footer)
+
+
+def make_v11_pak(path, encrypted=False):
+    """A version 11 pak: the paths come from the directory index."""
+    body = b"\0" * 64
+    directories = {}
+    for name in NAMES:
+        folder, _, file = name.rpartition("/")
+        directories.setdefault(folder + "/", []).append(file)
+    directory = struct.pack("<i", len(directories))
+    for folder, files in directories.items():
+        directory += fstring(folder) + struct.pack("<i", len(files))
+        for file in files:
+            directory += fstring(file) + struct.pack("<i", 0)
+
+    index = (
+        fstring(MOUNT_POINT) + struct.pack("<i", len(NAMES))
+        + struct.pack("<Q", 0)  # Path hash seed
+        + struct.pack("<i", 0)  # No path hash index
+        + struct.pack("<i", 1)  # Directory index follows, stored right after this index
+    )
+    index_offset = len(body)
+    index_size = len(index) + 16
+    index += struct.pack("<qq", index_offset + index_size, len(directory))
+    footer = (
+        b"\0" * 16 + (b"\1" if encrypted else b"\0")
+        + struct.pack("<IiqQ", mm.PAK_MAGIC, 11, index_offset, index_size)
+        + b"\0" * 20 + b"\0" * 160
+    )
+    assert len(footer) == 221
+    return write_file(path, body + index + directory + footer)
+
+
+def test_reads_a_v3_index(tmp_path):
+    assert mm.read_pak_asset_paths(make_v3_pak(str(tmp_path / "old_P.pak"))) == EXPECTED
+
+
+def test_reads_a_v11_directory_index(tmp_path):
+    assert mm.read_pak_asset_paths(make_v11_pak(str(tmp_path / "new_P.pak"))) == EXPECTED
+
+
+def test_rejects_encrypted_indexes(tmp_path):
+    with pytest.raises(ValueError, match="encrypted"):
+        mm.read_pak_asset_paths(make_v11_pak(str(tmp_path / "locked_P.pak"), encrypted=True))
+
+
+def test_rejects_files_that_are_not_paks(tmp_path):
+    with pytest.raises(ValueError, match="no pak footer"):
+        mm.read_pak_asset_paths(write_file(str(tmp_path / "fake.pak"), b"not a pak" * 40))
+
+
+def test_normalize_asset_path():
+    assert mm.normalize_asset_path("..\\..\\..\\Marvel\\Content\\UI\\Icon.uasset") == "/Game/UI/Icon.uasset"
+    assert mm.normalize_asset_path("../../../Engine/Plugins/X.uasset") == "/Engine/Plugins/X.uasset"
@@ -0,0 +1,92 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import mm, write_file
+
+
+@pytest.fixture
+def reflink(monkeypatch):
+    """Set whether the test volume clones; the real probe depends on the filesystem."""
+    def set_support(supported):
+        monkeypatch.setattr(mm, "supports_reflink", lambda folder: supported)
+    return set_support
+
+
+def only_volume(plan):
+    assert len(plan["volumes"]) == 1
+    return next(iter(plan["volumes"].values()))
+
+
+def test_new_files_are_written_in_full(app_data, tmp_path, reflink):
+    reflink(False)
+    pak = write_file(str(tmp_path / "src" / "a_P.pak"), b"p" * 300)
+    utoc = write_file(str(tmp_path / "src" / "a_P.utoc"), b"t" * 50)
+    dst = str(tmp_path / "dst")
+
+    plan = mm.plan_copies([[(pak, os.path.join(dst, "a_P.pak")), (utoc, os.path.join(dst, "a_P.utoc"))]])
+
+    assert plan["write"] == 350
+    volume = only_volume(plan)
+    assert volume["need"] == 350
+    assert volume["free"] > 0
+
+
+def test_matching_and_repeated_destinations_cost_nothing_extra(app_data, tmp_path, reflink):
+    reflink(False)
+    source = write_file(str(tmp_path / "src" / "a.pak"), b"a" * 100)
+    synced = str(tmp_path / "dst" / "a.pak")
+    os.makedirs(os.path.dirname(synced))
+    shutil.copy2(source, synced)
+    fresh = str(tmp_path / "other" / "a.pak")
+
+    plan = mm.plan_copies([[(source, synced)], [(source, fresh)], [(source, fresh)]])
+
+    assert plan["write"] == 100
+
+
+def test_removals_free_space_first(app_data, tmp_path, reflink):
+    reflink(False)
+    source = write_file(str(tmp_path / "profile" / "a.pak"), b"a" * 100)
+    mods = str(tmp_path / "mods")
+    old = write_file(os.path.join(mods, "old.pak"), b"o" * 400)
+    # A file that is removed first is copied again even when it matches
+    same = os.path.join(mods, "a.pak")
+    shutil.copy2(source, same)
+
+    plan = mm.plan_copies([[(source, same)]], removals=[old, same])
+
+    assert plan["write"] == 100
+    assert only_volume(plan)["need"] == 0  # Never below zero
+
+
+def test_clones_take_no_space(app_data, tmp_path, reflink):
+    reflink(True)
+    source = write_file(str(tmp_path / "src" / "a_P.pak"), b"a" * 100)
+    utoc = write_file(str(tmp_path / "src" / "a_P.utoc"), b"t" * 10)
+    dst = str(tmp_path / "dst")
+
+    plan = mm.plan_copies([[(source, os.path.join(dst, "a_P.pak")), (utoc, os.path.join(dst, "a_P.utoc"))]])
+
+    assert plan["write"] == 0
+    assert only_volume(plan)["need"] == 0
+
+
+def test_delta_updates_count_rewritten_blocks(app_data, tmp_path, reflink, monkeypatch):
+    reflink(True)
+    chunk = 1024
+    monkeypatch.setattr(mm, "DELTA_CHUNK_SIZE", chunk)
+    old = os.urandom(8 * chunk)
+    new = old[:chunk] + b"\0" * chunk + old[2 * chunk:]
+    source = write_file(str(tmp_path / "src" / "a.pak"), new)
+    destination = write_file(str(tmp_path / "dst" / "a.pak"), old)
+
+    # Without signatures the whole file may be rewritten
+    assert mm.plan_copies([[(source, destination)]])["write"] == len(new)
+
+    for path in (source, destination):
+        mm.update_pak_index({mm.cached_hash(path): {"chunk_size": chunk, "chunks": mm.chunk_signature(path, chunk)}})
+    plan = mm.plan_copies([[(source, destination)]])
+    assert plan["write"] == chunk
+    assert only_volume(plan)["need"] == chunk